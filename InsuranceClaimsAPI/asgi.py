@@ -7,10 +7,38 @@ For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 """
 
+import asyncio
 import os
 
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'InsuranceClaimsAPI.settings')
 
-application = get_asgi_application()
+
+class ConcurrencyLimit:
+    """
+    Let at most ``limit`` HTTP requests into Django at once per process and
+    queue the rest on the event loop. Every request in flight holds its own
+    database connection, so without a cap a burst of clients exhausts
+    PostgreSQL's max_connections instead of waiting its turn.
+    """
+
+    def __init__(self, app, limit):
+        self.app = app
+        self.limit = limit
+        self._semaphore = None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not self.limit:
+            return await self.app(scope, receive, send)
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.limit)
+        async with self._semaphore:
+            await self.app(scope, receive, send)
+
+
+django_application = get_asgi_application()
+
+from django.conf import settings  # noqa: E402  (configured by get_asgi_application)
+
+application = ConcurrencyLimit(django_application, getattr(settings, 'ASGI_MAX_CONCURRENT_REQUESTS', 20))
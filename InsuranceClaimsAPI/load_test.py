@@ -0,0 +1,195 @@
+"""
+Load-test claim submission (save + predict) under gunicorn/WSGI with the sync
+customer:customer_claim view and under uvicorn/ASGI with the async
+customer:customer_claim_async view, reporting throughput and p50/p99 latency.
+
+    python -m InsuranceClaimsAPI.load_test [--clients 200] [--requests 4000] [--workers 4]
+
+Both servers run against the database of DJANGO_SETTINGS_MODULE; the claims
+created by the run and its throwaway user are deleted afterwards.
+"""
+import argparse
+import http.client
+import itertools
+import os
+import socket
+import statistics
+import subprocess
+import threading
+import time
+from urllib.parse import urlencode
+from .startup_benchmark import BASE_DIR
+
+LOAD_TEST_USERNAME = 'load_test_client'
+CSRF_TOKEN = 'loadtestloadtestloadtestloadtest'  # any 32 alphanumerics pass CsrfViewMiddleware
+PREDICTION_MARKER = b'Predicted Settlement Value'
+
+SERVERS = {
+    'gunicorn': (
+        'customer:customer_claim',
+        lambda port, workers: ['gunicorn', 'InsuranceClaimsAPI.wsgi:application', '--bind', f'127.0.0.1:{port}',
+                               '--workers', str(workers), '--backlog', '4096', '--log-level', 'warning'],
+    ),
+    'uvicorn': (
+        'customer:customer_claim_async',
+        lambda port, workers: ['uvicorn', 'InsuranceClaimsAPI.asgi:application', '--port', str(port),
+                               '--workers', str(workers), '--backlog', '4096', '--no-access-log',
+                               '--log-level', 'warning'],
+    ),
+}
+
+
+def claim_payload():
+    """A valid CustomerClaimForm submission built from the form's own fields and choices."""
+    import datetime
+    from django import forms
+    from InsuranceClaimsCustomer.forms import CustomerClaimForm
+
+    data = {}
+    for name, field in CustomerClaimForm().fields.items():
+        if isinstance(field.widget, forms.Select):
+            data[name] = field.widget.choices[0][0]
+        elif isinstance(field, forms.DateField):
+            data[name] = datetime.date.today().isoformat()
+        elif isinstance(field, forms.IntegerField):
+            data[name] = 30 if name == 'Driver_Age' else 2
+        elif isinstance(field, forms.DecimalField):
+            data[name] = '1000.00' if name == 'SpecialHealthExpenses' else '0.00'
+        else:
+            data[name] = 'Load test'
+    return urlencode(data)
+
+
+def login_cookie():
+    """Session and CSRF cookies for a throwaway logged-in user."""
+    from django.contrib.auth import get_user_model
+    from django.test import Client
+
+    user, _ = get_user_model().objects.get_or_create(
+        username=LOAD_TEST_USERNAME,
+        defaults={'email': f'{LOAD_TEST_USERNAME}@example.com', 'full_name': 'Load Test'},
+    )
+    client = Client()
+    client.force_login(user)
+    return f"sessionid={client.cookies['sessionid'].value}; csrftoken={CSRF_TOKEN}"
+
+
+def cleanup():
+    from django.contrib.auth import get_user_model
+    get_user_model().objects.filter(username=LOAD_TEST_USERNAME).delete()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, process, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with status {process.returncode}")
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server did not listen on port {port} within {timeout}s")
+
+
+def run_load(port, path, body, cookie, clients, total):
+    """POST ``body`` ``total`` times from ``clients`` keep-alive connections; returns (latencies, errors, seconds)."""
+    headers = {
+        'Content-Type': 'application/x-www-form-urlencoded',
+        'Cookie': cookie,
+        'X-CSRFToken': CSRF_TOKEN,
+    }
+    counter = itertools.count()
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def client():
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+        mine = []
+        failed = 0
+        while next(counter) < total:
+            started = time.perf_counter()
+            try:
+                connection.request('POST', path, body, headers)
+                response = connection.getresponse()
+                # An invalid form is re-rendered with 200 too, so look for the result
+                ok = response.status == 200 and PREDICTION_MARKER in response.read()
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                connection = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+                ok = False
+            mine.append(time.perf_counter() - started)
+            failed += not ok
+        connection.close()
+        with lock:
+            latencies.extend(mine)
+            errors.append(failed)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, sum(errors), time.perf_counter() - started
+
+
+def benchmark(server, args, body, cookie):
+    from django.urls import reverse
+
+    url_name, command = SERVERS[server]
+    path = reverse(url_name)
+    port = free_port()
+    process = subprocess.Popen(command(port, args.workers), cwd=BASE_DIR, env=dict(os.environ))
+    try:
+        wait_for_port(port, process)
+        # Warm every worker up (model load, URLconf) before measuring
+        run_load(port, path, body, cookie, args.workers * 2, args.workers * 8)
+        latencies, errors, seconds = run_load(port, path, body, cookie, args.clients, args.requests)
+    finally:
+        process.terminate()
+        process.wait(30)
+    percentiles = statistics.quantiles(latencies, n=100)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput': len(latencies) / seconds,
+        'p50': percentiles[49],
+        'p99': percentiles[98],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=200, help='Concurrent keep-alive clients.')
+    parser.add_argument('--requests', type=int, default=4000, help='Claim submissions per server.')
+    parser.add_argument('--workers', type=int, default=4, help='Server worker processes.')
+    parser.add_argument('--servers', nargs='+', choices=list(SERVERS), default=list(SERVERS))
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'InsuranceClaimsAPI.settings')
+    import django
+    django.setup()
+
+    body = claim_payload()
+    cookie = login_cookie()
+    print(f"🚦 {args.clients} clients, {args.requests} claim submissions, {args.workers} workers per server")
+    print(f"{'server':<10}{'requests':>10}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    try:
+        for server in args.servers:
+            result = benchmark(server, args, body, cookie)
+            print(f"{server:<10}{result['requests']:>10}{result['errors']:>8}{result['throughput']:>10.1f}"
+                  f"{result['p50'] * 1000:>10.1f}{result['p99'] * 1000:>10.1f}")
+    finally:
+        cleanup()
+
+
+if __name__ == '__main__':
+    main()
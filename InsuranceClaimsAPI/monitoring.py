@@ -0,0 +1,48 @@
+"""
+Access control for the Prometheus /metrics export.
+
+MetricsExportMiddleware answers METRICS_PATH itself, before the login
+middleware, for staff users and for clients whose address is in
+METRICS_ALLOWED_NETWORKS (the Prometheus scraper). Every other request to the
+path falls through as if the export did not exist: anonymous users are sent
+to the login page and everyone else gets a 404.
+"""
+import ipaddress
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django_prometheus.exports import ExportToDjangoView
+
+
+def parse_networks(networks):
+    return tuple(ipaddress.ip_network(network.strip(), strict=False) for network in networks if network.strip())
+
+
+class MetricsExportMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.path = getattr(settings, 'METRICS_PATH', '/metrics')
+        self.networks = parse_networks(getattr(settings, 'METRICS_ALLOWED_NETWORKS', ()))
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if request.path == self.path and (self._allowed_address(request) or request.user.is_staff):
+            return ExportToDjangoView(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        if request.path == self.path and (self._allowed_address(request) or (await request.auser()).is_staff):
+            return await sync_to_async(ExportToDjangoView)(request)
+        return await self.get_response(request)
+
+    def _allowed_address(self, request):
+        try:
+            address = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+        except ValueError:
+            return False
+        return any(address in network for network in self.networks)
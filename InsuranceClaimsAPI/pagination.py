@@ -0,0 +1,167 @@
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.db.models import F, Q
+
+CURSOR_SALT = 'InsuranceClaimsAPI.pagination.cursor'
+
+
+class KeysetPage:
+    """One page of a KeysetPaginator; iterate it like a Paginator page."""
+
+    def __init__(self, object_list, next_cursor, previous_cursor, estimated_count):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.estimated_count = estimated_count
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+class KeysetPaginator:
+    """
+    Seek pagination on ``(sort field, primary key)``.
+
+    Instead of ``OFFSET n`` every page filters on the last row of the page
+    before it, so each page is an index range scan no matter how deep it is,
+    and no ``COUNT(*)`` is issued. NULL sort values are ordered as the largest
+    value on every backend (``NULLS LAST`` ascending, ``NULLS FIRST``
+    descending), which matches how PostgreSQL B-tree indexes are scanned.
+
+    Cursors are opaque signed tokens; a missing, tampered or foreign cursor
+    (e.g. from another sort order) yields the first page.
+    """
+
+    def __init__(self, queryset, sort, per_page=10):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.descending = sort.startswith('-')
+        model = queryset.model
+        self.pk_name = model._meta.pk.name
+        self.field = model._meta.get_field(sort.lstrip('-'))
+        self.key = f"{model._meta.label}:{sort}"
+
+    def page(self, cursor=None):
+        position = self._decode(cursor)
+        forward = position is None or position['d'] == 'n'
+        ordering = self._ordering(reverse=not forward)
+        limit = self.per_page + 1
+        if position is None:
+            rows = list(self.queryset.order_by(*ordering)[:limit])
+        else:
+            rows = []
+            for segment in self._seek(position, after=forward):
+                rows += self.queryset.filter(segment).order_by(*ordering)[:limit - len(rows)]
+                if len(rows) >= limit:
+                    break
+        more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if not forward:
+            rows.reverse()
+
+        next_cursor = previous_cursor = None
+        if rows:
+            if more or not forward:
+                next_cursor = self._encode(rows[-1], 'n')
+            if position is not None and (forward or more):
+                previous_cursor = self._encode(rows[0], 'p')
+        return KeysetPage(rows, next_cursor, previous_cursor, estimated_count(self.queryset.model))
+
+    def _ordering(self, reverse=False):
+        descending = self.descending != reverse
+        if self.field.name == self.pk_name:
+            return [F(self.pk_name).desc() if descending else F(self.pk_name).asc()]
+        if descending:
+            return [F(self.field.name).desc(nulls_first=True), F(self.pk_name).desc()]
+        return [F(self.field.name).asc(nulls_last=True), F(self.pk_name).asc()]
+
+    def _seek(self, position, after):
+        """
+        Q objects selecting the rows strictly after (or before) ``position``,
+        as consecutive segments of the sort order. Each segment is a single
+        index range (``field >= value`` rather than an OR with ``IS NULL``),
+        so the database can seek into a ``(field, pk)`` index; the NULL block
+        is queried separately only when the first segment runs out.
+        """
+        pk = position['pk']
+        greater = self.descending != after
+        if self.field.name == self.pk_name:
+            return [Q(**{f"{self.pk_name}__{'gt' if greater else 'lt'}": pk})]
+
+        name = self.field.name
+        value = position['v']
+        # NULL sorts as the largest value, so it comes after every non-NULL value.
+        if greater:
+            if value is None:
+                return [Q(**{f"{name}__isnull": True, f"{self.pk_name}__gt": pk})]
+            return [
+                Q(**{f"{name}__gte": value}) & (Q(**{f"{name}__gt": value}) | Q(**{f"{self.pk_name}__gt": pk})),
+                Q(**{f"{name}__isnull": True}),
+            ]
+        if value is None:
+            return [
+                Q(**{f"{name}__isnull": True, f"{self.pk_name}__lt": pk}),
+                Q(**{f"{name}__isnull": False}),
+            ]
+        return [Q(**{f"{name}__lte": value}) & (Q(**{f"{name}__lt": value}) | Q(**{f"{self.pk_name}__lt": pk}))]
+
+    def _encode(self, obj, direction):
+        value = getattr(obj, self.field.attname)
+        return signing.dumps({
+            'k': self.key,
+            'v': None if value is None else str(value),
+            'pk': getattr(obj, self.pk_name),
+            'd': direction,
+        }, salt=CURSOR_SALT, compress=True)
+
+    def _decode(self, cursor):
+        if not cursor:
+            return None
+        try:
+            position = signing.loads(cursor, salt=CURSOR_SALT)
+            if position.get('k') != self.key or position.get('d') not in ('n', 'p'):
+                return None
+            if position['v'] is not None:
+                position['v'] = self.field.to_python(position['v'])
+            return position
+        except (signing.BadSignature, ValidationError, KeyError, TypeError, ValueError, AttributeError):
+            return None
+
+
+def estimated_count(model):
+    """
+    Planner row estimate for ``model``'s table from ``pg_class.reltuples``;
+    ``None`` when not on PostgreSQL or the table has never been analyzed.
+    Kept in the cache for ESTIMATED_COUNT_TIMEOUT seconds, so paging through
+    a list does not look it up again on every page.
+    """
+    if connection.vendor != 'postgresql':
+        return None
+    key = f"pagination:estimated_count:{model._meta.db_table}"
+    count = cache.get(key, -1)
+    if count == -1:
+        count = _reltuples(model)
+        cache.set(key, count, getattr(settings, 'ESTIMATED_COUNT_TIMEOUT', 60))
+    return count
+
+
+def _reltuples(model):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT reltuples FROM pg_class WHERE oid = %s::regclass",
+                       [connection.ops.quote_name(model._meta.db_table)])
+        row = cursor.fetchone()
+    if row is None or row[0] < 0:
+        return None
+    return int(row[0])
@@ -0,0 +1,157 @@
+"""
+Opt-in per-request SQL and timing profiler.
+
+QueryProfilerMiddleware profiles a request when QUERY_PROFILER_ENABLED is set
+(every request, e.g. on staging) or when a staff user sends the
+``X-Profile-Queries: 1`` header. A profiled request records its query count,
+total DB time, wall time and the fingerprints of statements run more than
+once (the N+1 pattern), logs itself to ``InsuranceClaimsAPI.profiling`` when
+it is slower than QUERY_PROFILER_SLOW_REQUEST_MS, and logs every statement
+slower than QUERY_PROFILER_SLOW_QUERY_MS. Header-triggered requests are always
+logged and get the numbers back as Server-Timing/X-Query-* response headers.
+
+Queries are collected by a database execute wrapper that the middleware,
+when it is loaded, adds to every connection as it opens. It only records
+while a profile is active in the current context, so sync views, async views
+and their sync_to_async calls are all covered, and unprofiled requests pay
+one ContextVar lookup per query. Without the middleware no wrapper is
+installed at all.
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'HTTP_X_PROFILE_QUERIES'
+
+_active_profile = ContextVar('query_profile', default=None)
+
+_WHITESPACE = re.compile(r'\s+')
+_PLACEHOLDER_LIST = re.compile(r'\((?:\s*%s\s*,)+\s*%s\s*\)')
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+
+
+def fingerprint(sql):
+    """SQL with literals and IN-lists reduced to placeholders, so repeats of one statement compare equal."""
+    sql = _STRING_LITERAL.sub('%s', sql)
+    sql = _NUMBER_LITERAL.sub('%s', sql)
+    sql = _PLACEHOLDER_LIST.sub('(%s, ...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+class RequestProfile:
+    def __init__(self):
+        self.queries = []
+        self.started = time.perf_counter()
+        self.wall_seconds = None
+
+    def record(self, sql, seconds):
+        self.queries.append((sql, seconds))
+
+    def finish(self):
+        self.wall_seconds = time.perf_counter() - self.started
+
+    @property
+    def db_seconds(self):
+        return sum(seconds for _, seconds in self.queries)
+
+    def duplicates(self, limit=5):
+        """``[(count, fingerprint), ...]`` for statements run more than once, most repeated first."""
+        counts = Counter(fingerprint(sql) for sql, _ in self.queries)
+        return [(count, sql) for sql, count in counts.most_common(limit) if count > 1]
+
+    def slow_queries(self, threshold_seconds):
+        return [(seconds, sql) for sql, seconds in self.queries if seconds >= threshold_seconds]
+
+
+def _record_query(execute, sql, params, many, context):
+    profile = _active_profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.record(sql, time.perf_counter() - started)
+
+
+def install_query_recorder(sender=None, connection=None, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+class QueryProfilerMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'QUERY_PROFILER_ENABLED', False)
+        self.slow_request = getattr(settings, 'QUERY_PROFILER_SLOW_REQUEST_MS', 500) / 1000
+        self.slow_query = getattr(settings, 'QUERY_PROFILER_SLOW_QUERY_MS', 100) / 1000
+        connection_created.connect(install_query_recorder, dispatch_uid='query_profiler')
+        for connection in connections.all(initialized_only=True):
+            install_query_recorder(connection=connection)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        requested = self._requested(request, request.user)
+        if not (requested or self.enabled):
+            return self.get_response(request)
+        profile, token = self._start()
+        try:
+            response = self.get_response(request)
+        finally:
+            _active_profile.reset(token)
+        return self._finish(request, response, profile, requested)
+
+    async def __acall__(self, request):
+        requested = PROFILE_HEADER in request.META and self._requested(request, await request.auser())
+        if not (requested or self.enabled):
+            return await self.get_response(request)
+        profile, token = self._start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _active_profile.reset(token)
+        return self._finish(request, response, profile, requested)
+
+    @staticmethod
+    def _requested(request, user):
+        return request.META.get(PROFILE_HEADER) == '1' and user.is_staff
+
+    @staticmethod
+    def _start():
+        profile = RequestProfile()
+        return profile, _active_profile.set(profile)
+
+    def _finish(self, request, response, profile, requested):
+        profile.finish()
+        duplicates = profile.duplicates()
+        if requested or profile.wall_seconds >= self.slow_request:
+            logger.log(
+                logging.WARNING if profile.wall_seconds >= self.slow_request else logging.INFO,
+                "%s %s %.1f ms, %d queries (%.1f ms DB)%s",
+                request.method, request.path, profile.wall_seconds * 1000, len(profile.queries),
+                profile.db_seconds * 1000,
+                ''.join(f"\n  {count}x {sql}" for count, sql in duplicates),
+            )
+        for seconds, sql in profile.slow_queries(self.slow_query):
+            logger.warning("Slow query on %s %s: %.1f ms: %s", request.method, request.path, seconds * 1000, sql)
+        if requested:
+            response['Server-Timing'] = (f'db;dur={profile.db_seconds * 1000:.1f};desc="{len(profile.queries)} queries", '
+                                         f'total;dur={profile.wall_seconds * 1000:.1f}')
+            response['X-Query-Count'] = str(len(profile.queries))
+            response['X-Duplicate-Queries'] = str(sum(count - 1 for count, _ in profile.duplicates(limit=None)))
+        return response
@@ -0,0 +1,28 @@
+from django.db import models
+
+
+class ListColumns:
+    """
+    The columns a list template shows for ``model``, so its queryset can load
+    just those with ``.only()``. Large ``TextField`` columns are left out by
+    default: they dominate row size on wide tables and belong on the detail
+    page, which loads the full row.
+    """
+
+    def __init__(self, model, exclude=(), include_text=False):
+        self.model = model
+        self.names = [
+            field.name for field in model._meta.concrete_fields
+            if field.name not in exclude
+            and (include_text or not isinstance(field, models.TextField))
+        ]
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+    def apply(self, queryset, *required):
+        """Restrict ``queryset`` to the listed columns plus ``required`` ones (e.g. the sort key)."""
+        return queryset.only(*dict.fromkeys([*self.names, *required]))
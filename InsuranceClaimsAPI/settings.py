@@ -29,6 +29,8 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'rest_framework',
+    'django_prometheus',
     'InsuranceClaimsRecords',
     'InsuranceClaimsUser',
     'InsuranceClaimsML.apps.InsuranceclaimsmlConfig',  # ✅ FIXED: use custom AppConfig
@@ -37,14 +39,20 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Request counts/latency per view for /metrics; must stay first and last
+    'django_prometheus.middleware.PrometheusBeforeMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'InsuranceClaimsAPI.profiling.QueryProfilerMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # Serves /metrics to staff and METRICS_ALLOWED_NETWORKS ahead of the login check
+    'InsuranceClaimsAPI.monitoring.MetricsExportMiddleware',
     'InsuranceClaimsUser.middleware.AuthenticationMiddleware',
+    'django_prometheus.middleware.PrometheusAfterMiddleware',
 ]
 
 ROOT_URLCONF = 'InsuranceClaimsAPI.urls'
@@ -80,6 +88,53 @@ DATABASES = {
     }
 }
 
+# Cache shared by all workers (compiled role permissions, ...). Set REDIS_URL
+# to use redis; without it each process gets its own in-memory cache.
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Seconds a compiled role permission table stays in the cache; changes to
+# roles and permissions invalidate it immediately through a version counter
+PERMISSION_CACHE_TIMEOUT = 3600
+
+# Seconds the CustomerClaimForm dropdown choices read from Patient_records.csv stay cached
+CLAIM_FORM_CHOICES_TIMEOUT = 3600
+
+# Seconds the "of about N" row estimate shown under keyset-paginated lists stays cached
+ESTIMATED_COUNT_TIMEOUT = 60
+
+# 'sync' scores a claim inside the claim_entry request; 'async' saves it, hands
+# it to InsuranceClaimsCustomer.prediction_queue and lets the page poll for the
+# result. PREDICTION_WORKERS background threads per process (0 runs jobs inline
+# after commit) score up to PREDICTION_BATCH_SIZE queued claims per model call.
+PREDICTION_MODE = os.getenv('PREDICTION_MODE', 'sync')
+PREDICTION_WORKERS = int(os.getenv('PREDICTION_WORKERS', '2'))
+PREDICTION_BATCH_SIZE = 32
+# A failed batch is retried after PREDICTION_RETRY_DELAY seconds, at most
+# PREDICTION_MAX_ATTEMPTS times per claim before it is left to score_claims.
+PREDICTION_RETRY_DELAY = 5
+PREDICTION_MAX_ATTEMPTS = 3
+
+# Threads per process that the async claim views (customer/async/...) run model
+# inference on; bounds concurrent predictions under ASGI
+INFERENCE_THREADS = 4
+
+# Requests each ASGI worker lets into Django at once (the rest wait on the event
+# loop); each holds a database connection, so workers x this must stay below
+# PostgreSQL's max_connections. 0 disables the limit.
+ASGI_MAX_CONCURRENT_REQUESTS = 20
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -112,3 +167,62 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Login route
 LOGIN_URL = '/login/'
+
+# URLs InsuranceClaimsUser.middleware.AuthenticationMiddleware lets anonymous
+# users reach: URL names resolved once at startup, plus path prefixes. API
+# views are listed by name: they authenticate themselves and answer 401
+# instead of redirecting, and any other /api/ view still requires a login.
+PUBLIC_URL_NAMES = ['accounts:login', 'accounts:signup', 'home', 'api_predict']
+PUBLIC_URL_PREFIXES = [STATIC_URL]
+
+# Prometheus export (InsuranceClaimsAPI.monitoring): staff users and clients in
+# METRICS_ALLOWED_NETWORKS (comma-separated CIDRs, e.g. the scraper's address)
+# can read METRICS_PATH. Empty by default: behind a reverse proxy on the same
+# host every request comes from 127.0.0.1, so only list addresses that public
+# traffic cannot arrive from.
+METRICS_PATH = '/metrics'
+METRICS_ALLOWED_NETWORKS = [network for network in os.getenv('METRICS_ALLOWED_NETWORKS', '').split(',') if network]
+
+# JSON API (/api/...): HTTP Basic for external systems, sessions for the browser
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'rest_framework.authentication.BasicAuthentication',
+        'rest_framework.authentication.SessionAuthentication',
+    ],
+    'DEFAULT_PERMISSION_CLASSES': ['rest_framework.permissions.IsAuthenticated'],
+}
+
+# /api/predict/: the micro-batcher collects concurrent requests for up to
+# PREDICT_BATCH_WAIT_MS or PREDICT_MAX_BATCH claims before one model call
+PREDICT_MAX_BATCH = 64
+PREDICT_BATCH_WAIT_MS = 2
+PREDICT_API_MAX_CLAIMS = 1000
+
+# Query profiler (InsuranceClaimsAPI.profiling): off unless enabled here or a
+# staff user sends "X-Profile-Queries: 1"; profiled requests slower than
+# QUERY_PROFILER_SLOW_REQUEST_MS and statements slower than
+# QUERY_PROFILER_SLOW_QUERY_MS are logged
+QUERY_PROFILER_ENABLED = os.getenv('QUERY_PROFILER_ENABLED', '') == '1'
+QUERY_PROFILER_SLOW_REQUEST_MS = 500
+QUERY_PROFILER_SLOW_QUERY_MS = 100
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'InsuranceClaimsAPI.profiling': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
+# Prediction cache (InsuranceClaimsML.prediction_cache): encoded claims per
+# process in an LRU (0 disables the cache) and seconds they stay in CACHES
+PREDICTION_CACHE_SIZE = 10000
+PREDICTION_CACHE_TIMEOUT = 86400
+
+# Model serving: how often (seconds) workers re-check which MLModel is active,
+# and how often buffered last_used timestamps are written back
+ML_MODEL_CHECK_INTERVAL = 5
+ML_MODEL_LAST_USED_FLUSH_INTERVAL = 60
@@ -0,0 +1,70 @@
+"""
+Measure cold Django startup (django.setup() plus loading the URLconf, which
+imports every app's views and forms) in fresh interpreters.
+
+    python -m InsuranceClaimsAPI.startup_benchmark [--runs 5] [--top 15]
+"""
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# Only prediction and import paths may load these; plain startup must not
+HEAVY_MODULES = ('pandas', 'numpy', 'sklearn', 'scipy', 'joblib', 'matplotlib')
+
+STARTUP_SNIPPET = (
+    "import time; started = time.perf_counter(); "
+    "import django; django.setup(); "
+    "from django.urls import get_resolver; get_resolver().url_patterns; "
+    "print(time.perf_counter() - started)"
+)
+
+
+def _run(importtime=False, settings_module=None):
+    env = dict(os.environ)
+    env['DJANGO_SETTINGS_MODULE'] = settings_module or env.get('DJANGO_SETTINGS_MODULE', 'InsuranceClaimsAPI.settings')
+    command = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', STARTUP_SNIPPET]
+    result = subprocess.run(command, cwd=BASE_DIR, env=env, capture_output=True, text=True, check=True)
+    return result
+
+
+def startup_seconds(runs=3, settings_module=None):
+    """Best wall time of ``runs`` cold startups, each in a new interpreter."""
+    return min(float(_run(settings_module=settings_module).stdout.strip().splitlines()[-1]) for _ in range(runs))
+
+
+def import_times(settings_module=None):
+    """``{module: (self_us, cumulative_us)}`` from ``python -X importtime`` for one cold startup."""
+    times = {}
+    for line in _run(importtime=True, settings_module=settings_module).stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def heavy_imports(times):
+    """Heavy top-level packages that appear in ``times``."""
+    return sorted({name.split('.')[0] for name in times} & set(HEAVY_MODULES))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15, help='Slowest modules (self time) to list.')
+    args = parser.parse_args()
+
+    print(f"⏱️ Cold startup: {startup_seconds(args.runs) * 1000:.1f} ms (best of {args.runs})")
+    times = import_times()
+    heavy = heavy_imports(times)
+    print(f"📦 {len(times)} modules imported; heavy: {', '.join(heavy) if heavy else 'none'}")
+    for name, (self_us, cumulative_us) in sorted(times.items(), key=lambda item: -item[1][0])[:args.top]:
+        print(f"  {self_us / 1000:8.1f} ms self {cumulative_us / 1000:8.1f} ms cumulative  {name}")
+
+
+if __name__ == '__main__':
+    main()
@@ -4,6 +4,7 @@ from django.shortcuts import redirect
 from django.conf import settings
 from django.conf.urls.static import static
 from InsuranceClaimsUser.views import home_view
+from InsuranceClaimsCustomer.api import PredictView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -12,6 +13,7 @@ urlpatterns = [
     path('records/', include('InsuranceClaimsRecords.urls')),
     path('customer/', include('InsuranceClaimsCustomer.urls')),
     path('ml/', include('InsuranceClaimsML.urls')),
+    path('api/predict/', PredictView.as_view(), name='api_predict'),
     path('accounts/login/', lambda request: redirect('accounts:login', permanent=True)),
 ]
 
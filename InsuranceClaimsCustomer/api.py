@@ -0,0 +1,76 @@
+import time
+from django.conf import settings
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from InsuranceClaimsML.metrics import PREDICTED_CLAIMS
+from InsuranceClaimsML.registry import model_registry
+from .models import CustomerClaim
+from .scoring import to_settlement
+
+
+class ClaimFeaturesSerializer(serializers.ModelSerializer):
+    """The CustomerClaim fields the settlement model reads; any left out are encoded as 0."""
+
+    class Meta:
+        model = CustomerClaim
+        exclude = ['id', 'user', 'predicted_settlement', 'Accident_Description', 'Injury_Description']
+
+    def get_fields(self):
+        fields = super().get_fields()
+        for field in fields.values():
+            field.required = False
+        return fields
+
+
+class PredictView(APIView):
+    """
+    POST one claim as a JSON object, or many as a list, to get predicted
+    settlements in the same order. Encoding happens on the request thread and
+    the model call goes through InsuranceClaimsML.batching.micro_batcher, so
+    concurrent single-claim requests share one vectorized predict; claims
+    scored before come from the prediction cache without reaching it. GET
+    returns the batcher's batch-size/latency totals and the cache hit rate.
+    """
+
+    def get(self, request):
+        # numpy, the batcher and the cache are loaded on first use, not at startup
+        from InsuranceClaimsML.batching import micro_batcher
+        from InsuranceClaimsML.prediction_cache import prediction_cache
+        return Response({'batching': micro_batcher.stats(), 'cache': prediction_cache.stats()})
+
+    def post(self, request):
+        from InsuranceClaimsML.batching import micro_batcher
+        from InsuranceClaimsML.prediction_cache import prediction_cache
+
+        started = time.perf_counter()
+        many = isinstance(request.data, list)
+        max_claims = getattr(settings, 'PREDICT_API_MAX_CLAIMS', 1000)
+        if many and len(request.data) > max_claims:
+            raise ValidationError(f"At most {max_claims} claims per request.")
+        serializer = ClaimFeaturesSerializer(data=request.data, many=many)
+        serializer.is_valid(raise_exception=True)
+        claims = serializer.validated_data if many else [serializer.validated_data]
+        if not claims:
+            return Response({'predictions': []})
+
+        loaded_model = model_registry.get()
+        batch_sizes = []
+
+        def predict(rows):
+            result = micro_batcher.predict(loaded_model, rows)
+            batch_sizes.append(result.batch_size)
+            return result.predictions
+
+        PREDICTED_CLAIMS.labels(loaded_model.label, 'api').inc(len(claims))
+        values = prediction_cache.predict(loaded_model, loaded_model.encode(claims), predict)
+        predictions = [str(to_settlement(value)) for value in values]
+        body = {'predictions': predictions} if many else {'predicted_settlement': predictions[0]}
+        body.update({
+            'model_version': loaded_model.version,
+            # 0 when every claim was answered from the cache
+            'batch_size': batch_sizes[0] if batch_sizes else 0,
+            'latency_ms': round((time.perf_counter() - started) * 1000, 3),
+        })
+        return Response(body)
@@ -0,0 +1,55 @@
+import csv
+import os
+from django.conf import settings
+from django.core.cache import cache
+
+CSV_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'InsuranceClaimsML', 'Patient_records.csv')
+CACHE_KEY = 'customer:claim_form_choices'
+
+# CustomerClaimForm field -> Patient_records.csv column it takes its choices from
+DROPDOWN_COLUMNS = {
+    'AccidentType': 'AccidentType',
+    'Injury_Prognosis': 'Injury_Prognosis',
+    'Exceptional_Circumstances': 'Exceptional_Circumstances',
+    'Minor_Psychological_Injury': 'Minor_Psychological_Injury',
+    'Dominant_injury': 'Dominant injury',
+    'Whiplash': 'Whiplash',
+    'Vehicle_Type': 'Vehicle Type',
+    'Weather_Conditions': 'Weather Conditions',
+    'Accident_Description': 'Accident Description',
+    'Injury_Description': 'Injury Description',
+    'Police_Report_Filed': 'Police Report Filed',
+    'Witness_Present': 'Witness Present',
+    'Gender': 'Gender',
+}
+
+# Cells pandas.read_csv would have treated as missing
+MISSING_VALUES = {'', 'NA', 'N/A', 'n/a', 'NaN', 'nan', '-NaN', '-nan', 'NULL', 'null', 'None', '<NA>', '#N/A', '#NA'}
+
+
+def load_dropdown_choices(path=CSV_PATH, fallback="N/A"):
+    """
+    Read the CSV once with the csv module and return ``{field: [(value, value), ...]}``
+    with each column's distinct non-missing values sorted. A column that is
+    missing or empty gets a single ``fallback`` choice.
+    """
+    values = {field: set() for field in DROPDOWN_COLUMNS}
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            for field, column in DROPDOWN_COLUMNS.items():
+                value = row.get(column)
+                if value is not None and value not in MISSING_VALUES:
+                    values[field].add(value)
+    return {
+        field: [(v, v) for v in sorted(found)] if found else [(fallback, fallback)]
+        for field, found in values.items()
+    }
+
+
+def get_dropdown_choices():
+    """Dropdown choices for CustomerClaimForm, computed on first use and kept in the cache."""
+    choices = cache.get(CACHE_KEY)
+    if choices is None:
+        choices = load_dropdown_choices()
+        cache.set(CACHE_KEY, choices, getattr(settings, 'CLAIM_FORM_CHOICES_TIMEOUT', 3600))
+    return choices
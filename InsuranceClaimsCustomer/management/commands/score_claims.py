@@ -0,0 +1,44 @@
+import time
+from django.core.management.base import BaseCommand
+from InsuranceClaimsCustomer.models import CustomerClaim
+from InsuranceClaimsCustomer.scoring import score_pending_claims
+from InsuranceClaimsML.registry import model_registry
+
+
+class Command(BaseCommand):
+    help = 'Predict settlements for every CustomerClaim without a predicted_settlement, in vectorized batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Claims locked, encoded, predicted and written per batch.')
+        parser.add_argument('--limit', type=int, default=None,
+                            help='Stop after scoring this many claims.')
+
+    def handle(self, *args, **options):
+        loaded_model = model_registry.get()
+        field_names = {field.name for field in CustomerClaim._meta.concrete_fields}
+        needed = set(loaded_model.encoder.feature_names) | {
+            'id', 'AccidentType', 'Injury_Prognosis', 'Accident_Date', 'Claim_Date'
+        }
+        fields = sorted(needed & field_names)
+
+        scored = 0
+        started = time.perf_counter()
+        # Walk up the ids so claims skipped because the prediction queue holds
+        # their lock are not selected again on every batch
+        last_id = 0
+        while options['limit'] is None or scored < options['limit']:
+            batch_size = options['batch_size']
+            if options['limit'] is not None:
+                batch_size = min(batch_size, options['limit'] - scored)
+            batch = score_pending_claims(batch_size, after_id=last_id, fields=fields, loaded_model=loaded_model)
+            if not batch:
+                break
+            scored += len(batch)
+            last_id = batch[-1].id
+
+        elapsed = time.perf_counter() - started
+        rate = scored / elapsed if elapsed > 0 else 0.0
+        self.stdout.write(self.style.SUCCESS(
+            f'Scored {scored} claims in {elapsed:.2f}s ({rate:.1f} claims/sec).'
+        ))
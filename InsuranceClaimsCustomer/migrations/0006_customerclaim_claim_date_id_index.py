@@ -0,0 +1,17 @@
+# Generated by Django 5.1.6 on 2026-10-18 21:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('InsuranceClaimsCustomer', '0005_insuranceclaim_customer_claim'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customerclaim',
+            index=models.Index(fields=['Claim_Date', 'id'], name='InsuranceCl_Claim_D_daa39c_idx'),
+        ),
+    ]
@@ -49,6 +49,12 @@ class CustomerClaim(models.Model):
     # Prediction Field
     predicted_settlement = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
 
+    class Meta:
+        # Serves the newest-first claims list and its keyset seeks on (Claim_Date, id)
+        indexes = [
+            models.Index(fields=['Claim_Date', 'id']),
+        ]
+
     def __str__(self):
         return f"Claim by {self.user.username} on {self.Claim_Date}"
 
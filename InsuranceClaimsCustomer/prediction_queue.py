@@ -0,0 +1,157 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+
+logger = logging.getLogger(__name__)
+
+FAILED_KEY = 'prediction_queue:failed:{}'
+# How long claim_prediction reports a claim the queue gave up on as failed
+FAILED_TIMEOUT = 86400
+
+
+class PredictionQueue:
+    """
+    Scores saved claims off the request thread.
+
+    The queue is the database itself: a claim whose ``predicted_settlement``
+    is NULL is a pending job, so nothing is lost if the process dies (the
+    ``score_claims`` command picks up leftovers) and no broker is needed.
+    ``enqueue`` hands the claim id to a small in-process thread pool once the
+    saving transaction commits; the pool scores whatever has accumulated in
+    batches of ``PREDICTION_BATCH_SIZE`` with one model call per batch. With
+    ``PREDICTION_WORKERS = 0`` jobs run inline, which tests use.
+
+    Each batch is re-read with ``score_pending_claims``, which locks the rows
+    (``SELECT ... FOR UPDATE SKIP LOCKED``) and skips claims that were scored
+    meanwhile, so a drain and the ``score_claims`` command never score the
+    same claim twice. A failed batch goes back to the front of the queue and
+    is retried after ``PREDICTION_RETRY_DELAY`` seconds, up to
+    ``PREDICTION_MAX_ATTEMPTS`` times per claim; the first background drain of
+    a process also queues claims a previous process left pending. Claims it
+    gives up on are flagged in the cache (shared by all workers) so the
+    polling endpoint can report them as failed instead of pending.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = []
+        # Failed scoring attempts per queued claim id
+        self._attempts = {}
+        self._executor = None
+        self._future = None
+        # Background drains submitted and not yet finished (at most PREDICTION_WORKERS)
+        self._running = 0
+        self._recovered = False
+
+    def enqueue(self, claim_id):
+        transaction.on_commit(partial(self._submit, claim_id))
+
+    def _submit(self, claim_id=None):
+        workers = getattr(settings, 'PREDICTION_WORKERS', 2)
+        with self._lock:
+            if claim_id is not None:
+                self._pending.append(claim_id)
+            if workers <= 0:
+                run_inline = True
+            else:
+                run_inline = False
+                if self._pending and self._running < workers:
+                    self._running += 1
+                    if self._executor is None:
+                        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='prediction')
+                    self._future = self._executor.submit(self._drain_in_thread)
+        if run_inline:
+            try:
+                self.drain()
+            except Exception:
+                # The failed batch stays queued and is retried by the next submit
+                logger.exception("Prediction failed")
+
+    def _drain_in_thread(self):
+        try:
+            self.drain(background=True)
+        except Exception:
+            delay = getattr(settings, 'PREDICTION_RETRY_DELAY', 5)
+            logger.exception("Background prediction failed; retrying in %ss", delay)
+            with self._lock:
+                self._running -= 1
+            timer = threading.Timer(delay, self._submit)
+            timer.daemon = True
+            timer.start()
+        finally:
+            connections.close_all()
+
+    def _recover(self):
+        """Queue claims still pending in the database, e.g. ones a restarted process never scored."""
+        from .models import CustomerClaim
+
+        claim_ids = list(CustomerClaim.objects.filter(predicted_settlement__isnull=True)
+                         .order_by('id').values_list('id', flat=True))
+        with self._lock:
+            queued = set(self._pending)
+            self._pending.extend(claim_id for claim_id in claim_ids if claim_id not in queued)
+
+    def _requeue(self, claim_ids):
+        max_attempts = getattr(settings, 'PREDICTION_MAX_ATTEMPTS', 3)
+        retry, dropped = [], []
+        with self._lock:
+            for claim_id in claim_ids:
+                attempts = self._attempts.get(claim_id, 0) + 1
+                if attempts < max_attempts:
+                    self._attempts[claim_id] = attempts
+                    retry.append(claim_id)
+                else:
+                    self._attempts.pop(claim_id, None)
+                    dropped.append(claim_id)
+            self._pending[:0] = retry
+        if dropped:
+            cache.set_many({FAILED_KEY.format(claim_id): True for claim_id in dropped}, FAILED_TIMEOUT)
+            logger.error("Giving up on claims %s after %s attempts; the score_claims command will pick them up",
+                         dropped, max_attempts)
+
+    def has_failed(self, claim_id):
+        """Whether the queue gave up scoring ``claim_id`` (in any worker)."""
+        return cache.get(FAILED_KEY.format(claim_id), False)
+
+    async def ahas_failed(self, claim_id):
+        """Async has_failed() for the ASGI polling view."""
+        return await cache.aget(FAILED_KEY.format(claim_id), False)
+
+    def drain(self, background=False):
+        """Score every pending claim in the calling thread; returns how many were scored."""
+        from .scoring import score_pending_claims
+
+        if background and not self._recovered:
+            self._recovered = True
+            self._recover()
+        batch_size = getattr(settings, 'PREDICTION_BATCH_SIZE', 32)
+        scored = 0
+        while True:
+            with self._lock:
+                claim_ids, self._pending = self._pending[:batch_size], self._pending[batch_size:]
+                if not claim_ids and background:
+                    # Checked under the lock so a claim queued now starts a new drain
+                    self._running -= 1
+            if not claim_ids:
+                return scored
+            try:
+                scored += len(score_pending_claims(batch_size, claim_ids=claim_ids))
+            except Exception:
+                self._requeue(claim_ids)
+                raise
+            with self._lock:
+                for claim_id in claim_ids:
+                    self._attempts.pop(claim_id, None)
+
+    def join(self, timeout=None):
+        """Wait for the most recently submitted background drain (used by tests and shutdown)."""
+        future = self._future
+        if future is not None:
+            future.result(timeout)
+
+
+prediction_queue = PredictionQueue()
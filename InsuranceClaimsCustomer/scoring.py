@@ -0,0 +1,121 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal, ROUND_HALF_UP
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from InsuranceClaimsML.metrics import PREDICTED_CLAIMS
+from InsuranceClaimsML.registry import model_registry
+
+CENTS = Decimal('0.01')
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def predict_settlements(claims, loaded_model=None):
+    """
+    Predict settlement values for a list of claims (CustomerClaim instances or
+    dicts) with one encode/scale/predict pass over the whole batch. Claims
+    whose encoded features were scored before by the same model come from
+    the prediction cache.
+    """
+    from InsuranceClaimsML.prediction_cache import prediction_cache
+
+    if loaded_model is None:
+        loaded_model = model_registry.get()
+    claims = list(claims)
+    PREDICTED_CLAIMS.labels(loaded_model.label, 'scoring').inc(len(claims))
+    return prediction_cache.predict(loaded_model, loaded_model.encode(claims), loaded_model.predict)
+
+
+def to_settlement(value):
+    """Round a raw prediction to the two decimal places stored on the models."""
+    return Decimal(str(float(value))).quantize(CENTS, rounding=ROUND_HALF_UP)
+
+
+def score_claims(claims, loaded_model=None):
+    """
+    Predict and store settlements for saved CustomerClaims: sets
+    ``predicted_settlement`` and creates the linked InsuranceClaim rows, with
+    one UPDATE and one INSERT for the whole batch.
+    """
+    claims = list(claims)
+    if not claims:
+        return claims
+    store_settlements(claims, predict_settlements(claims, loaded_model))
+    return claims
+
+
+def score_pending_claims(limit, claim_ids=None, after_id=None, fields=None, loaded_model=None):
+    """
+    Lock and score up to ``limit`` claims that still have no
+    ``predicted_settlement``, lowest id first, optionally only those in
+    ``claim_ids`` or above ``after_id``. Rows another worker has locked are
+    skipped rather than waited for, so the prediction queue and the
+    ``score_claims`` command never both create an InsuranceClaim for one
+    claim. Returns the scored claims.
+    """
+    from .models import CustomerClaim
+
+    claims = CustomerClaim.objects.select_for_update(skip_locked=True).filter(predicted_settlement__isnull=True)
+    if claim_ids is not None:
+        claims = claims.filter(id__in=claim_ids)
+    if after_id is not None:
+        claims = claims.filter(id__gt=after_id)
+    if fields:
+        claims = claims.only(*fields)
+    with transaction.atomic():
+        return score_claims(claims.order_by('id')[:limit], loaded_model)
+
+
+def store_settlements(claims, predictions):
+    from .models import CustomerClaim, InsuranceClaim
+
+    insurance_claims = []
+    for claim, prediction in zip(claims, predictions):
+        claim.predicted_settlement = to_settlement(prediction)
+        insurance_claims.append(InsuranceClaim(
+            customer_claim=claim,
+            accident_type=claim.AccidentType,
+            injury_prognosis=claim.Injury_Prognosis,
+            settlement_value=claim.predicted_settlement,
+        ))
+    with transaction.atomic():
+        CustomerClaim.objects.bulk_update(claims, ['predicted_settlement'])
+        InsuranceClaim.objects.bulk_create(insurance_claims)
+
+
+def inference_executor():
+    """Process-wide pool of INFERENCE_THREADS threads that async views run model calls on."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=getattr(settings, 'INFERENCE_THREADS', 4),
+                                               thread_name_prefix='inference')
+    return _executor
+
+
+async def apredict_settlements(claims, loaded_model=None):
+    """
+    Async predict_settlements. Only the model lookup (a DB query) goes through
+    the thread-sensitive sync_to_async; encoding and predict, which touch no
+    connection, run on inference_executor() so a slow model cannot tie up the
+    event loop or the request's sync thread.
+    """
+    if loaded_model is None:
+        loaded_model = await sync_to_async(model_registry.get)()
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(inference_executor(), predict_settlements, claims, loaded_model)
+
+
+async def ascore_claims(claims, loaded_model=None):
+    """Async score_claims."""
+    claims = list(claims)
+    if not claims:
+        return claims
+    predictions = await apredict_settlements(claims, loaded_model)
+    await sync_to_async(store_settlements)(claims, predictions)
+    return claims
@@ -1,15 +1,108 @@
-from django.test import TestCase, Client
+from django.test import TestCase, Client, SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 from django.urls import reverse
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
 from .models import CustomerClaim, InsuranceClaim, Feedback
 from .forms import CustomerClaimForm, FeedbackForm
+from . import choices
+from .api import ClaimFeaturesSerializer
+from .prediction_queue import prediction_queue
+from .scoring import predict_settlements, to_settlement
+from .views import CLAIM_LIST_COLUMNS
+from InsuranceClaimsAPI import startup_benchmark
+from InsuranceClaimsAPI.pagination import KeysetPaginator
+from InsuranceClaimsML.prediction_cache import prediction_cache
+from InsuranceClaimsUser.models import Role
 from decimal import Decimal
+from io import StringIO
+from unittest import skipUnless
+from unittest.mock import patch
+import base64
 import datetime
+import threading
 from django.contrib.auth.models import Permission
 from django.contrib.contenttypes.models import ContentType
 
 User = get_user_model()
 
+def claim_form_data(**overrides):
+    """POST data for a valid CustomerClaimForm submission."""
+    data = {
+        'AccidentType': 'Rear-end collision',
+        'Injury_Prognosis': 'Full recovery expected',
+        'Exceptional_Circumstances': 'No',
+        'Minor_Psychological_Injury': 'No',
+        'Dominant_injury': 'Neck',
+        'Whiplash': 'Yes',
+        'Vehicle_Type': 'Car',
+        'Weather_Conditions': 'Clear',
+        'Accident_Description': 'Test accident description',
+        'Injury_Description': 'Test injury description',
+        'Police_Report_Filed': 'Yes',
+        'Witness_Present': 'Yes',
+        'Gender': 'Male',
+        'Driver_Age': 30,
+        'Vehicle_Age': 5,
+        'Number_of_Passengers': 2,
+        'SpecialHealthExpenses': '1000.00',
+        'SpecialReduction': '0.00',
+        'SpecialOverage': '0.00',
+        'GeneralRest': '0.00',
+        'SpecialAdditionalInjury': '0.00',
+        'SpecialEarningsLoss': '0.00',
+        'SpecialUsageLoss': '0.00',
+        'SpecialMedications': '0.00',
+        'SpecialAssetDamage': '0.00',
+        'SpecialRehabilitation': '0.00',
+        'SpecialFixes': '0.00',
+        'GeneralFixed': '0.00',
+        'GeneralUplift': '0.00',
+        'SpecialLoanerVehicle': '0.00',
+        'SpecialTripCosts': '0.00',
+        'SpecialJourneyExpenses': '0.00',
+        'SpecialTherapy': '0.00',
+        'Accident_Date': datetime.date.today(),
+        'Claim_Date': datetime.date.today()
+    }
+    data.update(overrides)
+    return data
+
+def create_claim(user, **fields):
+    """Save a CustomerClaim for ``user`` with zero-valued expenses unless given in ``fields``."""
+    values = {
+        'AccidentType': 'Rear-end collision',
+        'Injury_Prognosis': 'Full recovery expected',
+        'Driver_Age': 30,
+        'Vehicle_Age': 5,
+        'Number_of_Passengers': 1,
+        'SpecialHealthExpenses': Decimal('1000.00'),
+        'Accident_Date': datetime.date(2024, 1, 1),
+        'Claim_Date': datetime.date(2024, 2, 1),
+    }
+    for name in ('SpecialReduction', 'SpecialOverage', 'GeneralRest', 'SpecialAdditionalInjury',
+                 'SpecialEarningsLoss', 'SpecialUsageLoss', 'SpecialMedications', 'SpecialAssetDamage',
+                 'SpecialRehabilitation', 'SpecialFixes', 'GeneralFixed', 'GeneralUplift',
+                 'SpecialLoanerVehicle', 'SpecialTripCosts', 'SpecialJourneyExpenses', 'SpecialTherapy'):
+        values[name] = Decimal('0.00')
+    values.update(fields)
+    return CustomerClaim.objects.create(user=user, **values)
+
+class ClaimEntryMixin:
+    """Logs in ``testuser`` and provides ``form_data`` for the claim entry views."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123',
+            full_name='Test User'
+        )
+        self.client.login(username='testuser', password='testpass123')
+        self.form_data = claim_form_data()
+
 class CustomerClaimModelTest(TestCase):
     def setUp(self):
         print("\nSetting up CustomerClaimModelTest...")
@@ -156,6 +249,18 @@ class FeedbackModelTest(TestCase):
         self.assertEqual(self.feedback.q5, 4)
 
 class CustomerClaimFormTest(TestCase):
+    def test_dropdown_choices_computed_once(self):
+        """Test that the CSV is read once and later forms reuse the cached choices"""
+        cache.delete(choices.CACHE_KEY)
+        with patch('InsuranceClaimsCustomer.choices.load_dropdown_choices',
+                   wraps=choices.load_dropdown_choices) as load:
+            CustomerClaimForm()
+            form = CustomerClaimForm()
+        self.assertEqual(load.call_count, 1)
+        self.assertEqual(form.fields['Gender'].widget.choices,
+                         [('Female', 'Female'), ('Male', 'Male'), ('Other', 'Other')])
+        self.assertEqual(form.fields['Whiplash'].widget.choices, [('No', 'No'), ('Yes', 'Yes')])
+
     def test_valid_form(self):
         print("\nTesting valid form submission...")
         form_data = {
@@ -505,3 +610,331 @@ class ServiceTest(TestCase):
         })
         self.assertEqual(response.status_code, 200)
         self.assertIsNotNone(response.context.get('prediction'))
+
+class ScoreClaimsCommandTest(TestCase):
+    """Tests for the score_claims management command"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123',
+            full_name='Test User'
+        )
+        for driver_age in [25, 40, 60]:
+            create_claim(self.user, Driver_Age=driver_age)
+        self.already_scored = CustomerClaim.objects.first()
+        self.already_scored.predicted_settlement = Decimal('123.45')
+        self.already_scored.save()
+
+    def test_scores_only_pending_claims(self):
+        """Test that pending claims are scored in batches and linked InsuranceClaims are created"""
+        out = StringIO()
+        call_command('score_claims', batch_size=1, stdout=out)
+        self.assertIn('Scored 2 claims', out.getvalue())
+        self.assertIn('claims/sec', out.getvalue())
+        self.assertFalse(CustomerClaim.objects.filter(predicted_settlement__isnull=True).exists())
+        self.assertEqual(InsuranceClaim.objects.filter(customer_claim__isnull=False).count(), 2)
+        self.already_scored.refresh_from_db()
+        self.assertEqual(self.already_scored.predicted_settlement, Decimal('123.45'))
+
+class PredictionQueueTest(ClaimEntryMixin, TestCase):
+    """Tests for PREDICTION_MODE = 'async' and the prediction polling endpoint"""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_claim_entry_without_prediction_is_pending(self):
+        """Test that async mode answers before scoring and scores the claim after commit"""
+        with override_settings(PREDICTION_MODE='async', PREDICTION_WORKERS=0):
+            with self.captureOnCommitCallbacks() as callbacks:
+                response = self.client.post(reverse('customer:customer_claim'), self.form_data)
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.context['prediction_pending'])
+            self.assertIsNone(response.context['prediction'])
+            claim = CustomerClaim.objects.get(user=self.user)
+            self.assertIsNone(claim.predicted_settlement)
+            self.assertContains(response, reverse('customer:claim_prediction', args=[claim.id]))
+
+            poll_url = reverse('customer:claim_prediction', args=[claim.id])
+            self.assertEqual(self.client.get(poll_url).json(), {'status': 'pending', 'predicted_settlement': None})
+
+            self.assertEqual(len(callbacks), 1)
+            callbacks[0]()
+
+        claim.refresh_from_db()
+        self.assertIsNotNone(claim.predicted_settlement)
+        self.assertTrue(InsuranceClaim.objects.filter(customer_claim=claim).exists())
+        self.assertEqual(self.client.get(poll_url).json(),
+                         {'status': 'ready', 'predicted_settlement': str(claim.predicted_settlement)})
+
+    def test_queue_scores_pending_claims_in_batches(self):
+        """Test that drain scores queued claims in PREDICTION_BATCH_SIZE chunks and skips scored ones"""
+        with override_settings(PREDICTION_MODE='async', PREDICTION_WORKERS=0):
+            with self.captureOnCommitCallbacks():
+                for _ in range(3):
+                    self.client.post(reverse('customer:customer_claim'), self.form_data)
+        scored = CustomerClaim.objects.first()
+        scored.predicted_settlement = Decimal('123.45')
+        scored.save()
+        prediction_queue._pending.extend(CustomerClaim.objects.values_list('id', flat=True))
+        with override_settings(PREDICTION_BATCH_SIZE=1), patch(
+                'InsuranceClaimsCustomer.scoring.predict_settlements',
+                side_effect=lambda claims, loaded_model=None: [1000.0] * len(claims)) as predict:
+            self.assertEqual(prediction_queue.drain(), 2)
+        self.assertEqual(predict.call_count, 2)
+        self.assertFalse(CustomerClaim.objects.filter(predicted_settlement__isnull=True).exists())
+        scored.refresh_from_db()
+        self.assertEqual(scored.predicted_settlement, Decimal('123.45'))
+
+    def test_failed_drain_requeues_claims_until_max_attempts(self):
+        """Test that a batch whose scoring fails stays queued and is dropped after PREDICTION_MAX_ATTEMPTS"""
+        with override_settings(PREDICTION_MODE='async', PREDICTION_WORKERS=0):
+            with self.captureOnCommitCallbacks() as callbacks:
+                self.client.post(reverse('customer:customer_claim'), self.form_data)
+        claim = CustomerClaim.objects.get(user=self.user)
+        failing = patch('InsuranceClaimsCustomer.scoring.predict_settlements', side_effect=RuntimeError('model down'))
+        with override_settings(PREDICTION_WORKERS=0, PREDICTION_MAX_ATTEMPTS=2), failing:
+            with self.assertLogs('InsuranceClaimsCustomer.prediction_queue', 'ERROR'):
+                callbacks[0]()
+            self.assertEqual(prediction_queue._pending, [claim.id])
+            with self.assertLogs('InsuranceClaimsCustomer.prediction_queue', 'ERROR') as logs:
+                prediction_queue._submit()
+        self.assertTrue(any('Giving up on claims' in line for line in logs.output))
+        self.assertEqual(prediction_queue._pending, [])
+        self.assertFalse(InsuranceClaim.objects.exists())
+        self.assertEqual(self.client.get(reverse('customer:claim_prediction', args=[claim.id])).json(),
+                         {'status': 'failed', 'predicted_settlement': None})
+
+        prediction_queue._pending.append(claim.id)
+        with override_settings(PREDICTION_WORKERS=0):
+            self.assertEqual(prediction_queue.drain(), 1)
+        self.assertEqual(InsuranceClaim.objects.filter(customer_claim=claim).count(), 1)
+        self.assertEqual(self.client.get(reverse('customer:claim_prediction', args=[claim.id])).json()['status'],
+                         'ready')
+
+    def test_queue_and_command_do_not_score_a_claim_twice(self):
+        """Test that a claim scored by score_claims is skipped by a later drain"""
+        with override_settings(PREDICTION_MODE='async', PREDICTION_WORKERS=0):
+            with self.captureOnCommitCallbacks():
+                self.client.post(reverse('customer:customer_claim'), self.form_data)
+        claim = CustomerClaim.objects.get(user=self.user)
+        call_command('score_claims', stdout=StringIO())
+        prediction_queue._pending.append(claim.id)
+        self.assertEqual(prediction_queue.drain(), 0)
+        self.assertEqual(InsuranceClaim.objects.filter(customer_claim=claim).count(), 1)
+
+    def test_poll_is_limited_to_claim_owner(self):
+        """Test that other users cannot poll someone else's claim"""
+        with self.captureOnCommitCallbacks():
+            with override_settings(PREDICTION_MODE='async', PREDICTION_WORKERS=0):
+                self.client.post(reverse('customer:customer_claim'), self.form_data)
+        claim = CustomerClaim.objects.get(user=self.user)
+        User.objects.create_user(username='other', email='other@example.com',
+                                 password='testpass123', full_name='Other User')
+        self.client.login(username='other', password='testpass123')
+        response = self.client.get(reverse('customer:claim_prediction', args=[claim.id]))
+        self.assertEqual(response.status_code, 404)
+
+class AsyncViewsTest(ClaimEntryMixin, TestCase):
+    """Tests for the async claim views served under customer/async/"""
+
+    def test_async_entry_scores_claim_on_inference_executor(self):
+        """Test that the async entry view saves and scores the claim with predict on the inference pool"""
+        threads = []
+
+        def predict(claims, loaded_model=None):
+            threads.append(threading.current_thread().name)
+            return [2500.0] * len(claims)
+
+        with patch('InsuranceClaimsCustomer.scoring.predict_settlements', side_effect=predict):
+            response = self.client.post(reverse('customer:customer_claim_async'), self.form_data)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(threads[0].startswith('inference'))
+        claim = CustomerClaim.objects.get(user=self.user)
+        self.assertEqual(claim.predicted_settlement, Decimal('2500.00'))
+        self.assertEqual(response.context['prediction'], Decimal('2500.00'))
+        self.assertTrue(InsuranceClaim.objects.filter(customer_claim=claim).exists())
+        self.assertContains(response, reverse('customer:submit_feedback_async'))
+
+        poll = self.client.get(reverse('customer:claim_prediction_async', args=[claim.id]))
+        self.assertEqual(poll.json(), {'status': 'ready', 'predicted_settlement': '2500.00'})
+
+    def test_entry_views_log_invalid_form_and_prediction_errors(self):
+        """Test that both entry views log form errors and failed predictions instead of printing them"""
+        for url_name in ('customer:customer_claim', 'customer:customer_claim_async'):
+            with self.subTest(url_name=url_name):
+                with self.assertLogs('InsuranceClaimsCustomer.views', 'WARNING') as logs:
+                    response = self.client.post(reverse(url_name), dict(self.form_data, Driver_Age=''))
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('Driver_Age', logs.output[0])
+                self.assertFalse(CustomerClaim.objects.exists())
+
+                with self.assertLogs('InsuranceClaimsCustomer.views', 'ERROR') as logs, patch(
+                        'InsuranceClaimsCustomer.scoring.predict_settlements', side_effect=RuntimeError('model down')):
+                    response = self.client.post(reverse(url_name), self.form_data)
+                self.assertIsNone(response.context['prediction'])
+                self.assertIn('Prediction failed', logs.output[0])
+                CustomerClaim.objects.all().delete()
+
+    def test_async_feedback(self):
+        """Test that feedback posted to the async view is saved for the user's own claim only"""
+        with patch('InsuranceClaimsCustomer.scoring.predict_settlements', return_value=[2500.0]):
+            self.client.post(reverse('customer:customer_claim_async'), self.form_data)
+        claim = CustomerClaim.objects.get(user=self.user)
+        feedback = {'claim_id': claim.id, 'q1': 5, 'q2': 4, 'q3': 5, 'q4': 3, 'q5': 4}
+        response = self.client.post(reverse('customer:submit_feedback_async'), feedback)
+        self.assertRedirects(response, reverse('customer:claim_form'))
+        self.assertEqual(Feedback.objects.filter(claim=claim).count(), 1)
+
+        self.client.logout()
+        response = self.client.post(reverse('customer:submit_feedback_async'), feedback)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Feedback.objects.count(), 1)
+
+class PredictAPITest(TestCase):
+    """Tests for the /api/predict/ JSON endpoint"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='apiuser',
+            email='api@example.com',
+            password='testpass123',
+            full_name='API User'
+        )
+        self.claim = {
+            'AccidentType': 'Rear-end collision',
+            'Injury_Prognosis': 'Full recovery expected',
+            'Whiplash': 'Yes',
+            'Gender': 'Male',
+            'Driver_Age': 30,
+            'Vehicle_Age': 5,
+            'Number_of_Passengers': 2,
+            'SpecialHealthExpenses': '1000.00',
+            'Accident_Date': '2024-01-01',
+            'Claim_Date': '2024-02-01',
+        }
+        self.client.login(username='apiuser', password='testpass123')
+        cache.clear()
+        prediction_cache.clear()
+
+    def post(self, data, **extra):
+        return self.client.post(reverse('api_predict'), data, content_type='application/json', **extra)
+
+    def expected(self, claims):
+        serializer = ClaimFeaturesSerializer(data=claims, many=True)
+        serializer.is_valid(raise_exception=True)
+        return [str(to_settlement(value)) for value in predict_settlements(serializer.validated_data)]
+
+    def test_single_claim(self):
+        """Test that one JSON claim gets the same settlement the form flow would predict"""
+        response = self.post(self.claim)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['predicted_settlement'], self.expected([self.claim])[0])
+        self.assertGreaterEqual(response.json()['batch_size'], 1)
+        self.assertIn('latency_ms', response.json())
+
+    def test_repeated_claim_is_served_from_cache(self):
+        """Test that resubmitting an equivalent claim skips the model and is counted as a hit"""
+        self.post(self.claim)
+        resubmitted = dict(self.claim, SpecialHealthExpenses='1000', Accident_Description='Reworded')
+        response = self.post(resubmitted)
+        self.assertEqual(response.json()['batch_size'], 0)
+        self.assertEqual(response.json()['predicted_settlement'], self.expected([self.claim])[0])
+        self.assertGreaterEqual(self.client.get(reverse('api_predict')).json()['cache']['local_hits'], 1)
+
+    def test_many_claims_in_order(self):
+        """Test that a list of claims is predicted in one call and returned in order"""
+        claims = [dict(self.claim, Driver_Age=age, SpecialHealthExpenses=str(age * 100)) for age in (20, 45, 70)]
+        response = self.post(claims)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['predictions'], self.expected(claims))
+        self.assertEqual(self.post([]).json(), {'predictions': []})
+
+    def test_invalid_claim_and_limit(self):
+        """Test that bad fields and oversized batches are rejected with 400"""
+        self.assertEqual(self.post(dict(self.claim, Driver_Age='old')).status_code, 400)
+        with override_settings(PREDICT_API_MAX_CLAIMS=2):
+            self.assertEqual(self.post([self.claim] * 3).status_code, 400)
+
+    def test_requires_authentication(self):
+        """Test that anonymous callers get 401 (not a login redirect) and Basic auth works"""
+        self.client.logout()
+        self.assertEqual(self.post(self.claim).status_code, 401)
+        credentials = base64.b64encode(b'apiuser:testpass123').decode()
+        response = self.post(self.claim, HTTP_AUTHORIZATION=f'Basic {credentials}')
+        self.assertEqual(response.status_code, 200)
+
+class ClaimListColumnsTest(TestCase):
+    """Tests that the claims list loads only its declared columns"""
+
+    def setUp(self):
+        role = Role.objects.create(name='admin')
+        self.user = User.objects.create_user(
+            username='listadmin',
+            password='testpass123',
+            full_name='List Admin',
+            role=role
+        )
+        self.client.login(username='listadmin', password='testpass123')
+        self.claim = create_claim(
+            self.user,
+            Accident_Description='A long accident description',
+            Injury_Description='A long injury description'
+        )
+
+    def test_list_skips_text_columns(self):
+        """Test that the list query does not select the description columns"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('customer:new_customer_records'))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Accident_Description', response.context['fields'])
+        claim_queries = [q['sql'] for q in queries
+                         if 'InsuranceClaimsCustomer_customerclaim' in q['sql'] and 'pg_class' not in q['sql']]
+        self.assertEqual(len(claim_queries), 1)
+        self.assertNotIn('Accident_Description', claim_queries[0])
+        self.assertNotContains(response, 'A long accident description')
+        self.assertContains(response, reverse('customer:customer_claim_detail', args=[self.claim.id]))
+
+    @skipUnless(connection.vendor == 'postgresql', "EXPLAIN output checked is PostgreSQL's")
+    def test_claims_list_is_index_served(self):
+        """Test that every claims list page seeks on the (Claim_Date, id) index"""
+        self.claim.pk = None
+        self.claim.save()
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE " + connection.ops.quote_name(CustomerClaim._meta.db_table))
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        claims_list = CLAIM_LIST_COLUMNS.apply(CustomerClaim.objects.all())
+        paginator = KeysetPaginator(claims_list, '-Claim_Date', per_page=1)
+        first = paginator.page()
+        with CaptureQueriesContext(connection) as queries:
+            paginator.page(first.next_cursor)
+            paginator.page(paginator.page(first.next_cursor).previous_cursor)
+        legacy = str(claims_list.order_by('-Claim_Date', '-id')[:10].query)
+        statements = [q['sql'] for q in queries if 'pg_class' not in q['sql']] + [legacy]
+        for sql in statements:
+            with self.subTest(sql=sql), connection.cursor() as cursor:
+                cursor.execute("EXPLAIN " + sql)
+                plan = "\n".join(row[0] for row in cursor.fetchall())
+                self.assertIn("Index", plan)
+                self.assertNotRegex(plan, r"(?m)^\s*(->\s*)?(Incremental )?Sort\b")
+
+    def test_detail_page_shows_text_columns(self):
+        """Test that the detail page loads the full claim"""
+        response = self.client.get(reverse('customer:customer_claim_detail', args=[self.claim.id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'A long accident description')
+        self.assertContains(response, 'A long injury description')
+
+class StartupImportTest(SimpleTestCase):
+    """
+    Regression guard for which modules a cold Django startup imports; startup
+    time is measured with ``python -m InsuranceClaimsAPI.startup_benchmark``.
+    """
+
+    def test_startup_does_not_import_ml_stack(self):
+        """Test that django.setup() and the URLconf load without pandas/numpy/sklearn"""
+        times = startup_benchmark.import_times()
+        self.assertIn('InsuranceClaimsCustomer.views', times)
+        self.assertEqual(startup_benchmark.heavy_imports(times), [])
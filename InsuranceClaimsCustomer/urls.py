@@ -9,4 +9,10 @@ urlpatterns = [
     path('feedback/submit/', views.submit_feedback, name='submit_feedback'),
     path('claim/new/', views.customer_claim_form, name='customer_claim_form'),
     path('claims/', views.new_customer_records, name='new_customer_records'),
+    path('claims/<int:claim_id>/', views.customer_claim_detail, name='customer_claim_detail'),
+    path('claims/<int:claim_id>/prediction/', views.claim_prediction, name='claim_prediction'),
+    # Async views for ASGI deployments (uvicorn InsuranceClaimsAPI.asgi:application)
+    path('async/entry/', views.claim_entry_async, name='customer_claim_async'),
+    path('async/claims/<int:claim_id>/prediction/', views.claim_prediction_async, name='claim_prediction_async'),
+    path('async/feedback/submit/', views.submit_feedback_async, name='submit_feedback_async'),
 ]
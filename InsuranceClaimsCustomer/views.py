@@ -1,35 +1,29 @@
-from django.shortcuts import render, redirect
+import logging
+from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from .forms import CustomerClaimForm, FeedbackForm
-from .models import InsuranceClaim, CustomerClaim, Feedback
-import pandas as pd
-import numpy as np
-import pickle
-import os
+from .models import CustomerClaim, Feedback
 from django.contrib import messages
 from django.core.paginator import Paginator
 from django.core.exceptions import PermissionDenied
+from django.conf import settings
+from django.http import Http404, JsonResponse
+from asgiref.sync import sync_to_async
+from .prediction_queue import prediction_queue
+from .scoring import ascore_claims, score_claims
+from InsuranceClaimsAPI.pagination import KeysetPaginator
+from InsuranceClaimsAPI.projection import ListColumns
 
-# Load model
-model_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'knn_model_sklearn.pkl')
+# Columns shown by new_customer_records.html; the descriptions are only loaded
+# by customer_claim_detail.html
+CLAIM_LIST_COLUMNS = ListColumns(CustomerClaim, exclude=['id', 'user'])
 
-try:
-    with open(model_path, 'rb') as f:
-        bundle = pickle.load(f)
-
-    model = bundle["model"]
-    scaler = bundle["scaler"]
-    feature_names = bundle["feature_names"]
-
-    print(" Sklearn model loaded successfully!")
-
-except Exception as e:
-    print(f" Error loading model bundle:", e)
-    model = None
+logger = logging.getLogger(__name__)
 
 @login_required
 def claim_entry(request):
     prediction = None
+    prediction_pending = False
     claim = None
     feedback_form = None
 
@@ -40,61 +34,21 @@ def claim_entry(request):
             claim.user = request.user  # Set the user field
             claim.save()  # Save the claim with the user set
 
-            try:
-                # Prepare input dictionary
-                input_data = {}
-                numeric_fields = [
-                    'SpecialHealthExpenses', 'SpecialReduction', 'SpecialOverage', 'GeneralRest',
-                    'SpecialAdditionalInjury', 'SpecialEarningsLoss', 'SpecialUsageLoss', 'SpecialMedications',
-                    'SpecialAssetDamage', 'SpecialRehabilitation', 'SpecialFixes', 'GeneralFixed',
-                    'GeneralUplift', 'SpecialLoanerVehicle', 'SpecialTripCosts', 'SpecialJourneyExpenses',
-                    'SpecialTherapy', 'Vehicle_Age', 'Driver_Age', 'Number_of_Passengers'
-                ]
-                for field in numeric_fields:
-                    val = getattr(claim, field, None)
-                    input_data[field] = float(val) if val is not None else 0.0
-                try:
-                    input_data['duration_days'] = (claim.Claim_Date - claim.Accident_Date).days
-                except:
-                    input_data['duration_days'] = 0.0
-                category_mappings = {
-                    'AccidentType': {'Rear-end collision': 1, 'Side-impact collision': 2, 'Head-on collision': 3, 'Single vehicle accident': 4, 'Other': 5},
-                    'Injury_Prognosis': {'Full recovery expected': 1, 'Partial recovery expected': 2, 'Long-term effects expected': 3, 'Permanent disability': 4},
-                    'Exceptional_Circumstances': {'Yes': 1, 'No': 0},
-                    'Minor_Psychological_Injury': {'Yes': 1, 'No': 0},
-                    'Dominant_injury': {'Head': 1, 'Neck': 2, 'Back': 3, 'Limbs': 4, 'Internal': 5},
-                    'Whiplash': {'Yes': 1, 'No': 0},
-                    'Vehicle_Type': {'Car': 1, 'SUV': 2, 'Truck': 3, 'Motorcycle': 4, 'Other': 5},
-                    'Weather_Conditions': {'Clear': 1, 'Rain': 2, 'Snow': 3, 'Fog': 4, 'Other': 5},
-                    'Police_Report_Filed': {'Yes': 1, 'No': 0},
-                    'Witness_Present': {'Yes': 1, 'No': 0},
-                    'Gender': {'Male': 1, 'Female': 2, 'Other': 3}
-                }
-                categorical_fields = [
-                    'AccidentType', 'Injury_Prognosis', 'Exceptional_Circumstances',
-                    'Minor_Psychological_Injury', 'Dominant_injury', 'Whiplash',
-                    'Vehicle_Type', 'Weather_Conditions', 'Police_Report_Filed',
-                    'Witness_Present', 'Gender'
-                ]
-                for field in categorical_fields:
-                    val = getattr(claim, field, None)
-                    mapped_val = category_mappings.get(field, {}).get(val, 0)
-                    input_data[field] = mapped_val
-                df = pd.DataFrame([input_data])
-                df = df.reindex(columns=feature_names, fill_value=0)
-                df = df.apply(pd.to_numeric, errors='coerce').fillna(0)
-                X_scaled = scaler.transform(df)
-                prediction = model.predict(X_scaled)[0]
-                InsuranceClaim.objects.create(
-                    accident_type=claim.AccidentType,
-                    injury_prognosis=claim.Injury_Prognosis,
-                    settlement_value=prediction
-                )
+            if getattr(settings, 'PREDICTION_MODE', 'sync') == 'async':
+                # Scored by the prediction queue once the claim is committed;
+                # the page polls customer:claim_prediction for the result
+                prediction_queue.enqueue(claim.id)
+                prediction_pending = True
                 feedback_form = FeedbackForm()
-            except Exception as e:
-                print(" Prediction error:", e)
+            else:
+                try:
+                    score_claims([claim])
+                    prediction = claim.predicted_settlement
+                    feedback_form = FeedbackForm()
+                except Exception:
+                    logger.exception("Prediction failed for claim %s", claim.id)
         else:
-            print("Form invalid:", form.errors)
+            logger.warning("Invalid claim form: %s", form.errors.as_json())
     else:
         form = CustomerClaimForm()
         claim = None
@@ -103,11 +57,110 @@ def claim_entry(request):
     context = {
         'form': form,
         'prediction': prediction,
+        'prediction_pending': prediction_pending,
         'claim': claim,
         'feedback_form': feedback_form
     }
     return render(request, 'customer_claim_form.html', context)
 
+@login_required
+def claim_prediction(request, claim_id):
+    # Polled by customer_claim_form.html while a queued prediction is pending
+    claim = get_object_or_404(CustomerClaim.objects.only('id', 'predicted_settlement'),
+                              pk=claim_id, user=request.user)
+    if claim.predicted_settlement is None:
+        return _prediction_status(claim, prediction_queue.has_failed(claim.id))
+    return _prediction_status(claim)
+
+def _prediction_status(claim, failed=False):
+    # 'failed' once the prediction queue has given up on the claim, so the
+    # page stops polling; score_claims may still score it later
+    if claim.predicted_settlement is not None:
+        return JsonResponse({'status': 'ready', 'predicted_settlement': str(claim.predicted_settlement)})
+    return JsonResponse({'status': 'failed' if failed else 'pending', 'predicted_settlement': None})
+
+# Async versions of claim_entry, claim_prediction and submit_feedback for
+# ASGI servers. The ORM calls use the async API, inference runs on
+# scoring.inference_executor(), and only template rendering (base.html loads
+# the user's groups) and transactions go through thread-sensitive sync_to_async.
+
+def _validated_claim_form(data):
+    # Building and cleaning the form reads the cached dropdown choices and
+    # may query the database, so async views run it through sync_to_async
+    form = CustomerClaimForm(data)
+    form.is_valid()
+    return form
+
+@login_required
+async def claim_entry_async(request):
+    prediction = None
+    prediction_pending = False
+    claim = None
+    feedback_form = None
+
+    if request.method == 'POST':
+        form = await sync_to_async(_validated_claim_form)(request.POST)
+        if form.is_valid():
+            claim = form.save(commit=False)
+            claim.user = await request.auser()
+            await claim.asave()
+
+            if getattr(settings, 'PREDICTION_MODE', 'sync') == 'async':
+                await sync_to_async(prediction_queue.enqueue)(claim.id)
+                prediction_pending = True
+                feedback_form = FeedbackForm()
+            else:
+                try:
+                    await ascore_claims([claim])
+                    prediction = claim.predicted_settlement
+                    feedback_form = FeedbackForm()
+                except Exception:
+                    logger.exception("Prediction failed for claim %s", claim.id)
+        else:
+            logger.warning("Invalid claim form: %s", form.errors.as_json())
+    else:
+        form = await sync_to_async(CustomerClaimForm)()
+
+    context = {
+        'form': form,
+        'prediction': prediction,
+        'prediction_pending': prediction_pending,
+        'claim': claim,
+        'feedback_form': feedback_form,
+        'async_views': True,
+    }
+    return await sync_to_async(render)(request, 'customer_claim_form.html', context)
+
+@login_required
+async def claim_prediction_async(request, claim_id):
+    try:
+        claim = await CustomerClaim.objects.only('id', 'predicted_settlement').aget(
+            pk=claim_id, user=await request.auser())
+    except CustomerClaim.DoesNotExist:
+        raise Http404
+    if claim.predicted_settlement is None:
+        return _prediction_status(claim, await prediction_queue.ahas_failed(claim.id))
+    return _prediction_status(claim)
+
+@login_required
+async def submit_feedback_async(request):
+    if request.method == 'POST':
+        user = await request.auser()
+        try:
+            claim = await CustomerClaim.objects.aget(id=request.POST.get('claim_id'), user=user)
+            form = FeedbackForm(request.POST)
+            if form.is_valid():
+                feedback = form.save(commit=False)
+                feedback.claim = claim
+                await feedback.asave()
+                messages.success(request, 'Thank you for your feedback!')
+            else:
+                messages.error(request, 'Please provide valid feedback.')
+        except (CustomerClaim.DoesNotExist, ValueError):
+            messages.error(request, 'Invalid claim.')
+
+    return redirect('customer:claim_form')
+
 @login_required
 def customer_claim_form(request):
     if request.method == 'POST':
@@ -173,15 +226,27 @@ def ai_engineer_or_admin_required(view_func):
 @ai_engineer_or_admin_required
 def new_customer_records(request):
     # Get all customer claims ordered by claim date (newest first)
-    claims_list = CustomerClaim.objects.all().order_by('-Claim_Date')
-    # Paginate the claims (10 per page)
-    paginator = Paginator(claims_list, 10)
     page_number = request.GET.get('page')
-    claims = paginator.get_page(page_number)
-    # Get all field names for the table headers
-    fields = [field.name for field in CustomerClaim._meta.fields if field.name not in ['id', 'user']]
+    claims_list = CLAIM_LIST_COLUMNS.apply(CustomerClaim.objects.all())
+    if page_number:
+        # Numbered pages (COUNT + OFFSET) are kept for existing links
+        claims = Paginator(claims_list.order_by('-Claim_Date', '-id'), 10).get_page(page_number)
+    else:
+        # Seek on (Claim_Date, id), 10 per page
+        claims = KeysetPaginator(claims_list, '-Claim_Date', 10).page(request.GET.get('cursor'))
     context = {
         'claims': claims,
-        'fields': fields,
+        'fields': CLAIM_LIST_COLUMNS.names,
+        'keyset': not page_number,
     }
     return render(request, 'new_customer_records.html', context)
+
+@ai_engineer_or_admin_required
+def customer_claim_detail(request, claim_id):
+    claim = get_object_or_404(CustomerClaim.objects.select_related('user'), pk=claim_id)
+    fields = [(field.verbose_name, getattr(claim, field.name))
+              for field in CustomerClaim._meta.fields if field.name not in ['id', 'user']]
+    return render(request, 'customer_claim_detail.html', {
+        'claim': claim,
+        'fields': fields,
+    })
@@ -1,5 +1,5 @@
 from django.apps import AppConfig
-from django.db.models.signals import post_migrate
+from django.db.models.signals import post_migrate, post_save, post_delete
 import os
 
 class InsuranceclaimsmlConfig(AppConfig):
@@ -9,6 +9,14 @@ class InsuranceclaimsmlConfig(AppConfig):
 
     def ready(self):
         from InsuranceClaimsUser.models import Role, Permission
+        from .models import MLModel
+        from .registry import model_registry
+
+        def invalidate_model_registry(sender, **kwargs):
+            model_registry.invalidate()
+
+        post_save.connect(invalidate_model_registry, sender=MLModel, dispatch_uid='ml_registry_save')
+        post_delete.connect(invalidate_model_registry, sender=MLModel, dispatch_uid='ml_registry_delete')
 
         def setup_ml_permissions(sender, **kwargs):
             # Ensure AI Engineer role has ML permissions
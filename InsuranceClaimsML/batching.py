@@ -0,0 +1,131 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+import numpy as np
+from django.conf import settings
+from .metrics import BATCH_SIZE
+
+
+class BatchResult:
+    """Predictions for one submission plus how it was served."""
+
+    def __init__(self, predictions, batch_size, wait_seconds, predict_seconds):
+        self.predictions = predictions
+        self.batch_size = batch_size
+        self.wait_seconds = wait_seconds
+        self.predict_seconds = predict_seconds
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent prediction requests into one vectorized model call.
+
+    Request threads encode their own claims and ``submit`` the rows; a single
+    background thread takes the first waiting submission, keeps collecting
+    for up to ``max_wait`` seconds or until ``max_batch`` rows are queued,
+    then runs ``LoadedModel.predict`` once per model in the batch and hands
+    each submission its slice. A lone request pays at most ``max_wait`` extra;
+    under load many requests share the scaler/KNN pass.
+    """
+
+    def __init__(self, max_batch=64, max_wait=0.002):
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.reset_stats()
+
+    def predict(self, loaded_model, rows, timeout=None):
+        """Predict ``rows`` (encoded claims) with ``loaded_model``, batched with concurrent callers."""
+        return self.submit(loaded_model, rows).result(timeout)
+
+    def submit(self, loaded_model, rows):
+        future = Future()
+        self._ensure_thread()
+        self._queue.put((loaded_model, rows, future, time.perf_counter()))
+        return future
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._start_lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            items = [self._queue.get()]
+            size = len(items[0][1])
+            deadline = time.perf_counter() + self.max_wait
+            while size < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                items.append(item)
+                size += len(item[1])
+            self._process(items)
+
+    def _process(self, items):
+        # Rows were encoded against the model their request loaded; a model
+        # swap mid-batch splits the batch rather than mixing layouts
+        groups = {}
+        for item in items:
+            groups.setdefault(id(item[0]), []).append(item)
+        for group in groups.values():
+            loaded_model = group[0][0]
+            started = time.perf_counter()
+            try:
+                predictions = loaded_model.predict(np.vstack([rows for _, rows, _, _ in group]))
+            except Exception as exc:
+                for _, _, future, _ in group:
+                    future.set_exception(exc)
+                continue
+            finished = time.perf_counter()
+            batch_size = len(predictions)
+            self._record(batch_size, len(group), finished - started)
+            offset = 0
+            for _, rows, future, queued in group:
+                future.set_result(BatchResult(predictions[offset:offset + len(rows)], batch_size,
+                                              started - queued, finished - started))
+                offset += len(rows)
+
+    def _record(self, batch_size, requests, predict_seconds):
+        BATCH_SIZE.observe(batch_size)
+        with self._stats_lock:
+            self._batches += 1
+            self._requests += requests
+            self._claims += batch_size
+            self._max_batch_size = max(self._max_batch_size, batch_size)
+            self._predict_seconds += predict_seconds
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self._batches = self._requests = self._claims = self._max_batch_size = 0
+            self._predict_seconds = 0.0
+
+    def stats(self):
+        """Totals since the last reset_stats(): how many requests shared each model call and what it cost."""
+        with self._stats_lock:
+            batches = self._batches
+            return {
+                'batches': batches,
+                'requests': self._requests,
+                'claims': self._claims,
+                'mean_batch_size': self._claims / batches if batches else 0.0,
+                'max_batch_size': self._max_batch_size,
+                'mean_requests_per_batch': self._requests / batches if batches else 0.0,
+                'mean_predict_ms': self._predict_seconds / batches * 1000 if batches else 0.0,
+            }
+
+
+micro_batcher = MicroBatcher(
+    max_batch=getattr(settings, 'PREDICT_MAX_BATCH', 64),
+    max_wait=getattr(settings, 'PREDICT_BATCH_WAIT_MS', 2) / 1000,
+)
@@ -0,0 +1,162 @@
+import argparse
+import copy
+import io
+import os
+import pickle
+import struct
+import zipfile
+import numpy as np
+from .mlmodels import KNN
+
+# Model bundles are dicts of the form
+#   {"ml": MLModule, "feature_names": [...], "X_min": ..., "denom": ..., "category_mappings": {...}}
+# save_bundle writes them as one uploadable file: an uncompressed zip holding
+# the bundle pickle without its big arrays, plus one .npy member per KNN
+# array (training matrix, targets, training norms, scaler stats). Members are
+# stored 64-byte aligned, so load_bundle memory-maps them straight out of the
+# file and every worker process shares one page-cache copy instead of
+# unpickling a private one.
+
+KNN_ARRAYS = ['X_train', 'y_train', 'train_sq_norms', 'scaler_mean', 'scaler_std']
+
+METADATA_MEMBER = 'bundle.pkl'
+
+# Local zip file header: fixed part, then file name and extra field
+_LOCAL_HEADER_SIZE = 30
+# Extra field id used (as by Android's zipalign) to pad member data into alignment
+_ALIGN_EXTRA_ID = 0xD935
+_ALIGNMENT = 64
+
+
+def _get_array(model, name):
+    if name == 'scaler_mean':
+        return model.scaler.mean
+    if name == 'scaler_std':
+        return model.scaler.std
+    return getattr(model, name)
+
+
+def _set_array(model, name, value):
+    if name == 'scaler_mean':
+        model.scaler.mean = value
+    elif name == 'scaler_std':
+        model.scaler.std = value
+    else:
+        setattr(model, name, value)
+
+
+def _strip_model(model):
+    stripped = copy.copy(model)
+    stripped.scaler = copy.copy(model.scaler)
+    for name in KNN_ARRAYS:
+        _set_array(stripped, name, None)
+    if model.tree is not None:
+        stripped.tree = copy.copy(model.tree)
+        stripped.tree.X = None
+    return stripped
+
+
+def _write_aligned(archive, name, data):
+    # Pad the extra field so the member's data (the .npy, whose own header is
+    # a multiple of 64 bytes) starts on a 64-byte boundary of the file
+    info = zipfile.ZipInfo(name)
+    info.compress_type = zipfile.ZIP_STORED
+    data_start = archive.fp.tell() + _LOCAL_HEADER_SIZE + len(name.encode()) + 4
+    padding = -data_start % _ALIGNMENT
+    info.extra = struct.pack('<HH', _ALIGN_EXTRA_ID, padding) + b'\0' * padding
+    archive.writestr(info, data)
+
+
+def save_bundle(bundle, path, dtype=np.float32):
+    """
+    Write ``bundle`` to the single file ``path``. The training matrix and its
+    norms are stored as ``dtype``; targets and scaler stats keep float64 so
+    predictions are not rounded.
+    """
+    ml = copy.copy(bundle["ml"])
+    ml.models = {}
+    array_members = {}
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_STORED) as archive:
+        for name, model in bundle["ml"].models.items():
+            if not isinstance(model, KNN):
+                raise TypeError("Model must be an instance of KNN.")
+            array_members[name] = {}
+            for array_name in KNN_ARRAYS:
+                value = np.asarray(_get_array(model, array_name))
+                if array_name in ('X_train', 'train_sq_norms'):
+                    value = value.astype(dtype)
+                buffer = io.BytesIO()
+                np.save(buffer, value)
+                member = f"{name}.{array_name}.npy"
+                _write_aligned(archive, member, buffer.getvalue())
+                array_members[name][array_name] = member
+            ml.models[name] = _strip_model(model)
+
+        metadata = dict(bundle)
+        metadata["ml"] = ml
+        metadata["array_members"] = array_members
+        archive.writestr(METADATA_MEMBER, pickle.dumps(metadata))
+
+
+def _mmap_member(path, archive, member):
+    """A read-only memmap of an uncompressed .npy member, or None if it cannot be mapped."""
+    info = archive.getinfo(member)
+    if info.compress_type != zipfile.ZIP_STORED:
+        return None
+    with open(path, "rb") as f:
+        f.seek(info.header_offset)
+        header = f.read(_LOCAL_HEADER_SIZE)
+        name_length, extra_length = struct.unpack('<HH', header[26:30])
+        f.seek(info.header_offset + _LOCAL_HEADER_SIZE + name_length + extra_length)
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        offset = f.tell()
+    if dtype.hasobject:
+        return None
+    return np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=shape,
+                     order='F' if fortran_order else 'C')
+
+
+def load_bundle(path, mmap=True):
+    """
+    Load a bundle written by ``save_bundle`` or a legacy pickle-only bundle.
+    With ``mmap`` the KNN arrays are mapped read-only from the bundle file
+    instead of being read into private memory.
+    """
+    if not zipfile.is_zipfile(path):
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+    with zipfile.ZipFile(path) as archive:
+        bundle = pickle.loads(archive.read(METADATA_MEMBER))
+        for name, members in bundle.pop("array_members").items():
+            model = bundle["ml"].models[name]
+            for array_name, member in members.items():
+                value = _mmap_member(path, archive, member) if mmap else None
+                if value is None:
+                    with archive.open(member) as f:
+                        value = np.load(f)
+                _set_array(model, array_name, value)
+            if model.tree is not None:
+                model.tree.X = model.X_train
+    return bundle
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a pickled KNN bundle to the memory-mappable format.")
+    parser.add_argument('source')
+    parser.add_argument('destination')
+    parser.add_argument('--float64', action='store_true', help="keep the training matrix in float64")
+    args = parser.parse_args()
+
+    with open(args.source, "rb") as f:
+        bundle = pickle.load(f)
+    save_bundle(bundle, args.destination, dtype=np.float64 if args.float64 else np.float32)
+    print(f"✅ Bundle written to {os.path.abspath(args.destination)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import numpy as np
+
+DEFAULT_CATEGORY_MAPPINGS = {
+    'AccidentType': {'Rear-end collision': 1, 'Side-impact collision': 2, 'Head-on collision': 3, 'Single vehicle accident': 4, 'Other': 5},
+    'Injury_Prognosis': {'Full recovery expected': 1, 'Partial recovery expected': 2, 'Long-term effects expected': 3, 'Permanent disability': 4},
+    'Exceptional_Circumstances': {'Yes': 1, 'No': 0},
+    'Minor_Psychological_Injury': {'Yes': 1, 'No': 0},
+    'Dominant_injury': {'Head': 1, 'Neck': 2, 'Back': 3, 'Limbs': 4, 'Internal': 5},
+    'Whiplash': {'Yes': 1, 'No': 0},
+    'Vehicle_Type': {'Car': 1, 'SUV': 2, 'Truck': 3, 'Motorcycle': 4, 'Other': 5},
+    'Weather_Conditions': {'Clear': 1, 'Rain': 2, 'Snow': 3, 'Fog': 4, 'Other': 5},
+    'Police_Report_Filed': {'Yes': 1, 'No': 0},
+    'Witness_Present': {'Yes': 1, 'No': 0},
+    'Gender': {'Male': 1, 'Female': 2, 'Other': 3}
+}
+
+DURATION_FEATURE = 'duration_days'
+
+
+class ClaimFeatureEncoder:
+    """
+    Turns claims into model input rows using a column layout fixed once from
+    a bundle's ``feature_names`` and ``category_mappings``.
+
+    Every feature is compiled up front into one of three kinds: categorical
+    (looked up in its mapping, unknown values become 0), the derived
+    ``duration_days`` (Claim_Date - Accident_Date) or numeric (missing or
+    non-numeric values become 0). Claims can be model instances or dicts.
+    """
+
+    def __init__(self, feature_names, category_mappings=None):
+        if category_mappings is None:
+            category_mappings = DEFAULT_CATEGORY_MAPPINGS
+        self.feature_names = list(feature_names)
+        self.category_mappings = category_mappings
+        self.column_index = {name: index for index, name in enumerate(self.feature_names)}
+        self.n_features = len(self.feature_names)
+        self.categorical = []
+        self.numeric = []
+        self.duration_index = None
+        for index, name in enumerate(self.feature_names):
+            if name in category_mappings:
+                self.categorical.append((index, name, category_mappings[name]))
+            elif name == DURATION_FEATURE:
+                self.duration_index = index
+            else:
+                self.numeric.append((index, name))
+
+    @classmethod
+    def from_bundle(cls, bundle):
+        return cls(bundle["feature_names"], bundle.get("category_mappings") or None)
+
+    def encode(self, claim, out=None):
+        """Encode one claim into ``out`` (a preallocated row) or a new float64 row."""
+        if out is None:
+            out = np.zeros(self.n_features, dtype=np.float64)
+        if isinstance(claim, dict):
+            get = claim.get
+        else:
+            def get(name):
+                return getattr(claim, name, None)
+
+        for index, name, mapping in self.categorical:
+            out[index] = mapping.get(get(name), 0)
+        for index, name in self.numeric:
+            value = get(name)
+            try:
+                out[index] = float(value) if value is not None else 0.0
+            except (TypeError, ValueError):
+                out[index] = 0.0
+        if self.duration_index is not None:
+            try:
+                out[self.duration_index] = (get('Claim_Date') - get('Accident_Date')).days
+            except (TypeError, AttributeError):
+                out[self.duration_index] = 0.0
+        return out
+
+    def encode_many(self, claims, out=None):
+        """Encode an iterable of claims into the rows of a (n_claims, n_features) matrix."""
+        claims = list(claims)
+        if out is None:
+            out = np.zeros((len(claims), self.n_features), dtype=np.float64)
+        for row, claim in enumerate(claims):
+            self.encode(claim, out[row])
+        return out
+
+    def encode_frame(self, frame):
+        """
+        Encode a pandas DataFrame (e.g. a cleaned CSV) column by column.
+        Columns missing from the frame are filled with 0.
+        """
+        import pandas as pd
+
+        out = np.zeros((len(frame), self.n_features), dtype=np.float64)
+        for index, name, mapping in self.categorical:
+            if name in frame:
+                column = frame[name]
+                if not pd.api.types.is_numeric_dtype(column):
+                    column = column.map(mapping)
+                out[:, index] = pd.to_numeric(column, errors='coerce').fillna(0).to_numpy()
+        for index, name in self.numeric:
+            if name in frame:
+                out[:, index] = pd.to_numeric(frame[name], errors='coerce').fillna(0).to_numpy()
+        if self.duration_index is not None:
+            if DURATION_FEATURE in frame:
+                duration = pd.to_numeric(frame[DURATION_FEATURE], errors='coerce')
+            elif 'Claim_Date' in frame and 'Accident_Date' in frame:
+                duration = (pd.to_datetime(frame['Claim_Date'], errors='coerce')
+                            - pd.to_datetime(frame['Accident_Date'], errors='coerce')).dt.days
+            else:
+                duration = pd.Series(0, index=frame.index)
+            out[:, self.duration_index] = duration.fillna(0).to_numpy()
+        return out
@@ -0,0 +1,69 @@
+import statistics
+import threading
+import time
+from django.core.management.base import BaseCommand
+from InsuranceClaimsML.batching import MicroBatcher
+from InsuranceClaimsML.registry import model_registry
+
+SAMPLE_CLAIM = {
+    'AccidentType': 'Rear-end collision',
+    'Injury_Prognosis': 'Full recovery expected',
+    'Whiplash': 'Yes',
+    'Gender': 'Male',
+    'Driver_Age': 30,
+    'Vehicle_Age': 5,
+    'Number_of_Passengers': 2,
+    'SpecialHealthExpenses': 1000,
+}
+
+
+class Command(BaseCommand):
+    help = ("Compare one model.predict per request with the /api/predict/ micro-batcher "
+            "for --clients threads each scoring single claims.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=32, help='Concurrent request threads.')
+        parser.add_argument('--requests', type=int, default=200, help='Single-claim predictions per client.')
+        parser.add_argument('--max-batch', type=int, default=64)
+        parser.add_argument('--wait-ms', type=float, nargs='+', default=[1.0, 2.0, 5.0],
+                            help='Batching windows to try.')
+
+    def handle(self, *args, **options):
+        loaded_model = model_registry.get()
+        rows = loaded_model.encoder.encode_many([SAMPLE_CLAIM])
+
+        self.stdout.write(f"{'mode':<22}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'mean batch':>12}")
+        self._report('unbatched', self._run(options, lambda: loaded_model.predict(rows)), None)
+        for wait_ms in options['wait_ms']:
+            batcher = MicroBatcher(max_batch=options['max_batch'], max_wait=wait_ms / 1000)
+            result = self._run(options, lambda: batcher.predict(loaded_model, rows))
+            self._report(f'batched ({wait_ms:g} ms)', result, batcher.stats())
+        self.stdout.write(self.style.SUCCESS('✅ Benchmark complete'))
+
+    def _run(self, options, predict):
+        latencies = []
+        lock = threading.Lock()
+
+        def client():
+            mine = []
+            for _ in range(options['requests']):
+                started = time.perf_counter()
+                predict()
+                mine.append(time.perf_counter() - started)
+            with lock:
+                latencies.extend(mine)
+
+        threads = [threading.Thread(target=client) for _ in range(options['clients'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return latencies, time.perf_counter() - started
+
+    def _report(self, label, result, stats):
+        latencies, seconds = result
+        percentiles = statistics.quantiles(latencies, n=100)
+        mean_batch = f"{stats['mean_batch_size']:.1f}" if stats else '1.0'
+        self.stdout.write(f"{label:<22}{len(latencies) / seconds:>10.0f}{percentiles[49] * 1000:>10.2f}"
+                          f"{percentiles[98] * 1000:>10.2f}{mean_batch:>12}")
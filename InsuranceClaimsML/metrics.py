@@ -0,0 +1,40 @@
+from prometheus_client import Counter, Histogram
+
+# Prometheus metrics for model serving, exported at /metrics by
+# django_prometheus. Under gunicorn/uvicorn with several workers set
+# PROMETHEUS_MULTIPROC_DIR so /metrics aggregates every worker.
+
+# Stage latencies are per call, which covers a whole batch of claims
+STAGE_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+STAGE_SECONDS = Histogram(
+    'claims_model_stage_seconds',
+    'Time spent per call in a model-serving stage (encode, transform, predict).',
+    ['stage', 'model_version'],
+    buckets=STAGE_BUCKETS,
+)
+
+MODEL_LOAD_SECONDS = Histogram(
+    'claims_model_load_seconds',
+    'Time to load a model bundle into a worker.',
+    ['model_version'],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+
+PREDICTED_CLAIMS = Counter(
+    'claims_predicted',
+    'Claims scored, including ones answered from the prediction cache.',
+    ['model_version', 'source'],
+)
+
+PREDICTION_CACHE_LOOKUPS = Counter(
+    'claims_prediction_cache_lookups',
+    'Prediction cache lookups per claim row by result (local_hit, shared_hit, miss).',
+    ['result'],
+)
+
+BATCH_SIZE = Histogram(
+    'claims_prediction_batch_size',
+    'Claims per model call made by the /api/predict/ micro-batcher.',
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024),
+)
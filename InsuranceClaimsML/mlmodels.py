@@ -1,5 +1,6 @@
 import numpy as np
 from collections import Counter
+from .neighbors import TREE_ALGORITHMS, RandomProjectionForest, auto_algorithm, brute_top_k
 
 class StandardScaler:
     def __init__(self):
@@ -21,30 +22,95 @@ class StandardScaler:
         return self.transform(X)
 
 class KNN:
-    def __init__(self, k=1, regression=True):
+    def __init__(self, k=1, regression=True, block_size=1024, algorithm='brute', leaf_size=40,
+                 n_trees=10, random_state=None):
+        if algorithm not in ('brute', 'auto', 'rp_forest') and algorithm not in TREE_ALGORITHMS:
+            raise ValueError(f"Unknown neighbour search algorithm '{algorithm}'.")
         self.k = k
         self.regression = regression
+        self.block_size = block_size
+        self.algorithm = algorithm
+        self.leaf_size = leaf_size
+        self.n_trees = n_trees
+        self.random_state = random_state
         self.X_train = None
         self.y_train = None
+        self.train_sq_norms = None
+        self.tree = None
         self.scaler = StandardScaler()
 
+    def __setstate__(self, state):
+        # Bundles pickled before batched prediction lack the newer attributes
+        self.__dict__.update(state)
+        self.__dict__.setdefault('block_size', 1024)
+        self.__dict__.setdefault('algorithm', 'brute')
+        self.__dict__.setdefault('leaf_size', 40)
+        self.__dict__.setdefault('tree', None)
+        self.__dict__.setdefault('n_trees', 10)
+        self.__dict__.setdefault('random_state', None)
+        if self.__dict__.get('train_sq_norms') is None and self.X_train is not None:
+            self.train_sq_norms = np.einsum('ij,ij->i', self.X_train, self.X_train)
+
     def fit(self, X, y):
         self.X_train = self.scaler.fit_transform(X)
         self.y_train = np.array(y)
+        self.train_sq_norms = np.einsum('ij,ij->i', self.X_train, self.X_train)
+        self.tree = None
+        algorithm = self.algorithm
+        if algorithm == 'auto':
+            algorithm = auto_algorithm(*self.X_train.shape)
+        if algorithm in TREE_ALGORITHMS:
+            self.tree = TREE_ALGORITHMS[algorithm](self.X_train, self.leaf_size)
+        elif algorithm == 'rp_forest':
+            # Opt-in approximate search; see RandomProjectionForest for why
+            # exact search stays the default
+            self.tree = RandomProjectionForest(
+                self.X_train, self.leaf_size, self.n_trees, self.random_state
+            )
 
     def predict(self, X):
-        X = self.scaler.transform(X)
-        predictions = [self._predict(x) for x in X]
-        return np.array(predictions)
+        X = self.scaler.transform(np.atleast_2d(X))
+        return self._predict_batch(X)
+
+    def kneighbors(self, X):
+        """
+        Return (distances, indices) of the k nearest training rows for each
+        row of the already-scaled matrix X, nearest first.
+
+        Distances are computed block by block with the expansion
+        ||a - b||^2 = ||a||^2 + ||b||^2 - 2ab against the precomputed training
+        norms, so each block costs a single matrix multiply. When the model was
+        fitted with a tree or rp_forest algorithm the search is delegated to
+        that index; rp_forest results are approximate.
+        """
+        if self.tree is not None:
+            return self.tree.query(X, self.k)
+        # Match the training matrix dtype so a float32 matrix is never upcast per block
+        X = np.asarray(X, dtype=self.X_train.dtype)
+        n_queries = X.shape[0]
+        k = min(self.k, self.X_train.shape[0])
+        distances = np.empty((n_queries, k), dtype=np.float64)
+        indices = np.empty((n_queries, k), dtype=np.intp)
+        for start in range(0, n_queries, self.block_size):
+            stop = min(start + self.block_size, n_queries)
+            block_distances, block_indices = self._kneighbors_block(X[start:stop], k)
+            distances[start:stop] = block_distances
+            indices[start:stop] = block_indices
+        return distances, indices
+
+    def _kneighbors_block(self, X_block, k):
+        sq_distances, k_indices = brute_top_k(self.X_train, self.train_sq_norms, X_block, k)
+        return np.sqrt(sq_distances), k_indices
 
     def _predict(self, x):
-        distances = np.linalg.norm(self.X_train - x, axis=1)
-        k_indices = np.argsort(distances)[:self.k]
+        return self._predict_batch(x[np.newaxis, :])[0]
+
+    def _predict_batch(self, X):
+        _, k_indices = self.kneighbors(X)
         k_nearest_values = self.y_train[k_indices]
         if self.regression:
-            return np.mean(k_nearest_values)
-        else:
-            return Counter(k_nearest_values).most_common(1)[0][0]
+            return np.mean(k_nearest_values, axis=1)
+        return np.array([Counter(row).most_common(1)[0][0] for row in k_nearest_values])
 
 class MLModule:
     def __init__(self):
@@ -0,0 +1,365 @@
+import numpy as np
+
+
+# Candidate (query, training row) pairs are scored in chunks of this many rows
+PAIR_CHUNK = 65536
+
+
+def _expand_ranges(owners, starts, ends):
+    """``(owner, position)`` for every position of every ``[start, end)`` range."""
+    lengths = ends - starts
+    offsets = np.arange(int(lengths.sum())) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return np.repeat(owners, lengths), np.repeat(starts, lengths) + offsets
+
+
+def _top_k_pairs(X_train, queries, pair_query, pair_row, k):
+    """
+    Exact k nearest training rows per query among candidate pairs, as squared
+    distances and indices, nearest first. Queries with fewer than k candidates
+    are padded with ``inf``/``-1``.
+    """
+    sq = np.empty(len(pair_query), dtype=np.float64)
+    for start in range(0, len(pair_query), PAIR_CHUNK):
+        stop = start + PAIR_CHUNK
+        diff = X_train[pair_row[start:stop]] - queries[pair_query[start:stop]]
+        sq[start:stop] = np.einsum('ij,ij->i', diff, diff)
+    order = np.lexsort((sq, pair_query))
+    pair_query, pair_row, sq = pair_query[order], pair_row[order], sq[order]
+    rank = np.arange(len(pair_query)) - np.searchsorted(pair_query, pair_query)
+    keep = rank < k
+    distances = np.full((queries.shape[0], k), np.inf)
+    indices = np.full((queries.shape[0], k), -1, dtype=np.intp)
+    distances[pair_query[keep], rank[keep]] = sq[keep]
+    indices[pair_query[keep], rank[keep]] = pair_row[keep]
+    return distances, indices
+
+
+def brute_top_k(X_train, train_sq_norms, X, k):
+    """
+    Exact k nearest training rows for each row of X by full distance matrix,
+    as squared distances and indices, nearest first. Uses the expansion
+    ||a - b||^2 = ||a||^2 + ||b||^2 - 2ab, so the work is one matrix multiply.
+    """
+    sq_distances = X @ X_train.T
+    sq_distances *= -2
+    sq_distances += train_sq_norms
+    sq_distances += np.einsum('ij,ij->i', X, X)[:, np.newaxis]
+    np.maximum(sq_distances, 0, out=sq_distances)
+
+    if k < sq_distances.shape[1]:
+        candidates = np.argpartition(sq_distances, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.broadcast_to(np.arange(k), sq_distances.shape).copy()
+    candidate_distances = np.take_along_axis(sq_distances, candidates, axis=1)
+    order = np.argsort(candidate_distances, axis=1)
+    return (np.take_along_axis(candidate_distances, order, axis=1),
+            np.take_along_axis(candidates, order, axis=1))
+
+
+class SpatialTree:
+    """
+    Base class for the exact neighbour-search trees used by KNN.
+
+    The tree recursively halves the training rows so that every leaf owns a
+    compact, contiguous slice ``indices[leaf_start:leaf_end]``. A batch of
+    queries is answered without walking the tree node by node: each query's
+    nearest leaf gives an upper bound on its k-th neighbour distance, every
+    leaf whose bounding region lies beyond that bound is pruned, and the
+    surviving (query, leaf) pairs are scanned together. Subclasses only decide
+    how leaves are bounded, via ``_bound_leaves`` and ``_leaf_sq_bounds``.
+
+    Measured with knn_benchmark.py (200 queries, k=3, leaf_size=40) against
+    blocked brute force, this only pays off in low dimensions on large
+    training sets: the KD-tree is 1.4x faster at d=3 with 10k rows, 5.8x at
+    100k and 8x at d=2 with 100k, but at d=5 it needs ~50k rows to win, and
+    from d=8 up pruning fails, queries fall back to brute force and the tree
+    only adds overhead (1.2-1.8x slower at d=30). The ball tree was never
+    clearly ahead of the KD-tree. ``KNN(algorithm='auto')`` picks the KD-tree
+    only where it won.
+    """
+
+    # Cap on the (queries x leaves) bound matrix built per query block
+    BOUND_BLOCK = 1 << 20
+    # Queries that would still scan more than this share of the training rows
+    # after pruning are answered by brute force, which scans faster per row
+    DENSE_FRACTION = 1 / 16
+
+    def __init__(self, X, leaf_size=40):
+        if leaf_size < 1:
+            raise ValueError("leaf_size must be at least 1.")
+        self.X = np.asarray(X, dtype=np.float64)
+        self.leaf_size = leaf_size
+        self.sq_norms = np.einsum('ij,ij->i', self.X, self.X)
+        self.indices = np.arange(self.X.shape[0])
+        self.leaf_start, self.leaf_end = self._build()
+        self._bound_leaves()
+
+    def _build(self):
+        leaf_start, leaf_end = [], []
+        stack = [(0, self.X.shape[0])]
+        while stack:
+            start, end = stack.pop()
+            points = self.X[self.indices[start:end]]
+            spread = points.max(axis=0) - points.min(axis=0) if end > start else np.zeros(1)
+            split_dim = int(np.argmax(spread))
+            if end - start <= self.leaf_size or spread[split_dim] == 0:
+                leaf_start.append(start)
+                leaf_end.append(end)
+                continue
+            mid = (end - start) // 2
+            order = np.argpartition(points[:, split_dim], mid)
+            self.indices[start:end] = self.indices[start:end][order]
+            stack.extend([(start + mid, end), (start, start + mid)])
+        return np.array(leaf_start, dtype=np.intp), np.array(leaf_end, dtype=np.intp)
+
+    def _leaf_points(self):
+        for start, end in zip(self.leaf_start, self.leaf_end):
+            yield self.X[self.indices[start:end]]
+
+    def _bound_leaves(self):
+        raise NotImplementedError
+
+    def _leaf_sq_bounds(self, X):
+        """(queries x leaves) lower bounds on the squared distance to any row of the leaf."""
+        raise NotImplementedError
+
+    def query(self, X, k):
+        """
+        Return (distances, indices) of the k nearest training rows for each
+        row of X, nearest first.
+        """
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        k = min(k, self.X.shape[0])
+        distances = np.empty((X.shape[0], k), dtype=np.float64)
+        indices = np.empty((X.shape[0], k), dtype=np.intp)
+        block_size = max(1, self.BOUND_BLOCK // len(self.leaf_start))
+        for start in range(0, X.shape[0], block_size):
+            stop = min(start + block_size, X.shape[0])
+            distances[start:stop], indices[start:stop] = self._query_block(X[start:stop], k)
+        return distances, indices
+
+    def _query_block(self, X, k):
+        bounds = self._leaf_sq_bounds(X)
+        # The k-th distance within the nearest leaf bounds the true k-th
+        # distance (inf when that leaf holds fewer than k rows)
+        nearest = bounds.argmin(axis=1)
+        pair_query, position = _expand_ranges(
+            np.arange(X.shape[0]), self.leaf_start[nearest], self.leaf_end[nearest]
+        )
+        sq, _ = _top_k_pairs(self.X, X, pair_query, self.indices[position], k)
+        # Slack keeps leaves whose rounded bound ties the k-th distance
+        keep = bounds <= sq[:, -1:] * (1 + 1e-9) + 1e-12
+        dense = keep @ (self.leaf_end - self.leaf_start) > self.X.shape[0] * self.DENSE_FRACTION
+        keep[dense] = False
+
+        query_rows, leaves = np.nonzero(keep)
+        pair_query, position = _expand_ranges(query_rows, self.leaf_start[leaves], self.leaf_end[leaves])
+        sq, found = _top_k_pairs(self.X, X, pair_query, self.indices[position], k)
+        if dense.any():
+            sq[dense], found[dense] = brute_top_k(self.X, self.sq_norms, X[dense], k)
+        return np.sqrt(sq), found
+
+
+class KDTree(SpatialTree):
+    """Axis-aligned bounding-box tree; strongest in low dimensions."""
+
+    def _bound_leaves(self):
+        # Stored feature-major so each dimension's bounds are contiguous
+        self.leaf_lower = np.array([points.min(axis=0) for points in self._leaf_points()]).T.copy()
+        self.leaf_upper = np.array([points.max(axis=0) for points in self._leaf_points()]).T.copy()
+
+    def _leaf_sq_bounds(self, X):
+        bounds = np.zeros((X.shape[0], self.leaf_lower.shape[1]))
+        for dim in range(X.shape[1]):
+            x = X[:, dim:dim + 1]
+            gap = np.maximum(self.leaf_lower[dim] - x, 0) + np.maximum(x - self.leaf_upper[dim], 0)
+            bounds += gap * gap
+        return bounds
+
+
+class BallTree(SpatialTree):
+    """
+    Centroid/radius tree. In knn_benchmark.py it was never clearly ahead of
+    KDTree at any dimension, so ``algorithm='auto'`` does not pick it.
+    """
+
+    def _bound_leaves(self):
+        centroids, radii = [], []
+        for points in self._leaf_points():
+            centroid = points.mean(axis=0)
+            diff = points - centroid
+            centroids.append(centroid)
+            radii.append(np.sqrt(np.einsum('ij,ij->i', diff, diff).max()))
+        self.leaf_centroid = np.array(centroids)
+        self.leaf_radius = np.array(radii)
+        self.leaf_sq_norms = np.einsum('ij,ij->i', self.leaf_centroid, self.leaf_centroid)
+
+    def _leaf_sq_bounds(self, X):
+        sq = X @ self.leaf_centroid.T
+        sq *= -2
+        sq += self.leaf_sq_norms
+        sq += np.einsum('ij,ij->i', X, X)[:, np.newaxis]
+        gap = np.maximum(np.sqrt(np.maximum(sq, 0)) - self.leaf_radius, 0)
+        return gap * gap
+
+
+class RandomProjectionForest:
+    """
+    Approximate neighbour search over a forest of random-projection trees.
+
+    Each tree splits its rows at the median of their projection onto a random
+    direction. A batch of queries descends every tree together to one leaf
+    each, the union of those leaves is re-ranked exactly, and the best k are
+    returned. ``n_trees`` and ``leaf_size`` are the recall/speed knobs: more
+    candidates means higher recall and slower queries.
+
+    KNN uses it only when fitted with ``algorithm='rp_forest'``, and exact
+    search should stay the default: on Cleaned_Patient_Records.csv (2.9k
+    training rows, 32 features) knn_ann_report.py finds no setting that
+    reaches 0.95 recall@3 while beating exact search. Recall 0.968 needs 64
+    trees of 10-row leaves and is ~5x slower, and every faster setting stays
+    at or below 0.67 recall. Re-run the report before picking it for a
+    deployment with a larger training set.
+    """
+
+    # Cap on the (queries x candidates x features) block gathered for scoring
+    GATHER_BLOCK = 1 << 21
+
+    def __init__(self, X, leaf_size=40, n_trees=10, random_state=None):
+        if leaf_size < 1:
+            raise ValueError("leaf_size must be at least 1.")
+        if n_trees < 1:
+            raise ValueError("n_trees must be at least 1.")
+        self.X = np.asarray(X, dtype=np.float64)
+        self.leaf_size = leaf_size
+        self.n_trees = n_trees
+        self.sq_norms = np.einsum('ij,ij->i', self.X, self.X)
+        rng = np.random.default_rng(random_state)
+        self.trees = [self._build_tree(rng) for _ in range(n_trees)]
+
+    def _build_tree(self, rng):
+        indices = np.arange(self.X.shape[0])
+        direction, threshold, left, right, start, end = [], [], [], [], [], []
+
+        def add_node(node_start, node_end):
+            direction.append(np.zeros(self.X.shape[1]))
+            threshold.append(0.0)
+            left.append(-1)
+            right.append(-1)
+            start.append(node_start)
+            end.append(node_end)
+            return len(start) - 1
+
+        stack = [add_node(0, self.X.shape[0])]
+        while stack:
+            node = stack.pop()
+            if end[node] - start[node] <= self.leaf_size:
+                continue
+            rows = indices[start[node]:end[node]]
+            node_direction = rng.normal(size=self.X.shape[1])
+            projections = self.X[rows] @ node_direction
+            mid = len(rows) // 2
+            order = np.argpartition(projections, mid)
+            indices[start[node]:end[node]] = rows[order]
+            direction[node] = node_direction
+            threshold[node] = projections[order[mid]]
+            left[node] = add_node(start[node], start[node] + mid)
+            right[node] = add_node(start[node] + mid, end[node])
+            stack.extend([left[node], right[node]])
+
+        # Each leaf's rows padded to leaf_size with -1, so a query's candidates
+        # from every tree stack into one fixed-width row
+        is_leaf = np.array(left) == -1
+        leaf_slot = np.full(len(start), -1, dtype=np.intp)
+        leaf_slot[is_leaf] = np.arange(is_leaf.sum())
+        leaf_rows = np.full((is_leaf.sum(), self.leaf_size), -1, dtype=np.intp)
+        for slot, node in enumerate(np.flatnonzero(is_leaf)):
+            leaf_rows[slot, :end[node] - start[node]] = indices[start[node]:end[node]]
+
+        return {
+            'leaf_slot': leaf_slot,
+            'leaf_rows': leaf_rows,
+            'direction': np.array(direction),
+            'threshold': np.array(threshold),
+            'left': np.array(left),
+            'right': np.array(right),
+        }
+
+    def _leaves(self, tree, X):
+        # Route every query down the tree together, one level per iteration
+        nodes = np.zeros(X.shape[0], dtype=np.intp)
+        active = tree['left'][nodes] != -1
+        while active.any():
+            current = nodes[active]
+            projections = np.einsum('ij,ij->i', X[active], tree['direction'][current])
+            go_right = projections >= tree['threshold'][current]
+            nodes[active] = np.where(go_right, tree['right'][current], tree['left'][current])
+            active = tree['left'][nodes] != -1
+        return nodes
+
+    def query(self, X, k):
+        """
+        Return approximate (distances, indices) of the k nearest training rows
+        for each row of X, nearest first. A query whose leaves hold fewer than
+        k candidates falls back to an exact scan.
+        """
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        k = min(k, self.X.shape[0])
+        distances = np.empty((X.shape[0], k), dtype=np.float64)
+        indices = np.empty((X.shape[0], k), dtype=np.intp)
+        block_size = max(1, self.GATHER_BLOCK // (self.n_trees * self.leaf_size * self.X.shape[1]))
+        for start in range(0, X.shape[0], block_size):
+            stop = min(start + block_size, X.shape[0])
+            distances[start:stop], indices[start:stop] = self._query_block(X[start:stop], k)
+        return distances, indices
+
+    def _query_block(self, X, k):
+        candidates = np.concatenate([
+            tree['leaf_rows'][tree['leaf_slot'][self._leaves(tree, X)]] for tree in self.trees
+        ], axis=1)
+        # Padding and rows reached through more than one tree are skipped
+        candidates.sort(axis=1)
+        skip = candidates == -1
+        skip[:, 1:] |= candidates[:, 1:] == candidates[:, :-1]
+
+        sq = np.matmul(self.X[candidates], X[:, :, np.newaxis])[:, :, 0]
+        sq *= -2
+        sq += self.sq_norms[candidates]
+        sq += np.einsum('ij,ij->i', X, X)[:, np.newaxis]
+        np.maximum(sq, 0, out=sq)
+        sq[skip] = np.inf
+
+        if k < sq.shape[1]:
+            top = np.argpartition(sq, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(sq.shape[1]), sq.shape)
+        top_sq = np.take_along_axis(sq, top, axis=1)
+        order = np.argsort(top_sq, axis=1)
+        top_sq = np.take_along_axis(top_sq, order, axis=1)
+        found = np.take_along_axis(candidates, np.take_along_axis(top, order, axis=1), axis=1)
+        if top_sq.shape[1] < k:
+            top_sq = np.pad(top_sq, ((0, 0), (0, k - top_sq.shape[1])), constant_values=np.inf)
+            found = np.pad(found, ((0, 0), (0, k - found.shape[1])), constant_values=-1)
+
+        short = ~np.isfinite(top_sq[:, -1])
+        if short.any():
+            top_sq[short], found[short] = brute_top_k(self.X, self.sq_norms, X[short], k)
+        return np.sqrt(top_sq), found
+
+
+# Smallest training set, per feature count, from which KDTree answered
+# queries faster than brute force in knn_benchmark.py; with more than five
+# features it never did at up to 100k rows
+KD_TREE_MIN_ROWS = {1: 5000, 2: 5000, 3: 10000, 4: 50000, 5: 50000}
+
+
+def auto_algorithm(n_rows, n_features):
+    """The search backend ``KNN(algorithm='auto')`` uses for a training set of this shape."""
+    min_rows = KD_TREE_MIN_ROWS.get(n_features)
+    return 'kd_tree' if min_rows is not None and n_rows >= min_rows else 'brute'
+
+
+TREE_ALGORITHMS = {
+    'kd_tree': KDTree,
+    'ball_tree': BallTree,
+}
@@ -0,0 +1,134 @@
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from .metrics import PREDICTION_CACHE_LOOKUPS
+
+KEY_PREFIX = 'ml:prediction'
+
+
+class PredictionCache:
+    """
+    Cache of model outputs keyed by the encoded feature row.
+
+    Claims are canonicalized by encoding them: '1000' and '1000.00', or a
+    changed free-text description, give the same row and so the same key. The
+    key also carries a token for the model that produced the value (MLModel
+    pk, version, file and the file's size and mtime, computed when the model
+    is loaded), so activating another model makes every old entry
+    unreachable at once; the in-process tier is cleared when that happens and
+    the shared tier simply lets the old entries expire.
+
+    Lookups go to a per-process LRU of ``maxsize`` rows first, then the Django
+    cache (redis when REDIS_URL is set, shared by all workers), and only the
+    rows missing from both reach the model. ``maxsize = 0`` disables caching.
+    """
+
+    def __init__(self, maxsize=10000, timeout=86400):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._local = OrderedDict()
+        self._token = None
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    @staticmethod
+    def model_token(loaded_model):
+        return loaded_model.cache_token
+
+    def keys(self, loaded_model, X):
+        token = self.model_token(loaded_model)
+        # + 0.0 turns -0.0 into 0.0 so both hash alike
+        X = np.ascontiguousarray(X, dtype=np.float64) + 0.0
+        return token, [f'{KEY_PREFIX}:{token}:{hashlib.blake2b(row.tobytes(), digest_size=16).hexdigest()}'
+                       for row in X]
+
+    def predict(self, loaded_model, X, predict):
+        """Predictions for the rows of ``X``, calling ``predict(rows)`` only for rows not cached."""
+        if not self.maxsize:
+            return predict(X)
+        token, keys = self.keys(loaded_model, X)
+        results = [None] * len(keys)
+        missing = []
+        with self._lock:
+            if token != self._token:
+                self._local.clear()
+                self._token = token
+            for index, key in enumerate(keys):
+                value = self._local.get(key)
+                if value is None:
+                    missing.append(index)
+                else:
+                    self._local.move_to_end(key)
+                    results[index] = value
+
+        shared_hits = 0
+        uncached = []
+        if missing:
+            found = cache.get_many([keys[index] for index in missing])
+            for index in missing:
+                value = found.get(keys[index])
+                if value is None:
+                    uncached.append(index)
+                else:
+                    results[index] = value
+                    shared_hits += 1
+            if uncached:
+                computed = {}
+                for index, value in zip(uncached, predict(X[uncached])):
+                    results[index] = computed[keys[index]] = float(value)
+                cache.set_many(computed, self.timeout)
+            self._remember(token, {keys[index]: results[index] for index in missing})
+
+        self._record(len(keys) - len(missing), shared_hits, len(uncached))
+        return np.array(results, dtype=np.float64)
+
+    def _remember(self, token, values):
+        with self._lock:
+            if token != self._token:
+                return
+            self._local.update(values)
+            for key in values:
+                self._local.move_to_end(key)
+            while len(self._local) > self.maxsize:
+                self._local.popitem(last=False)
+
+    def clear(self):
+        """Drop this process's entries (the shared tier is left to expire)."""
+        with self._lock:
+            self._local.clear()
+            self._token = None
+
+    def _record(self, local_hits, shared_hits, misses):
+        PREDICTION_CACHE_LOOKUPS.labels('local_hit').inc(local_hits)
+        PREDICTION_CACHE_LOOKUPS.labels('shared_hit').inc(shared_hits)
+        PREDICTION_CACHE_LOOKUPS.labels('miss').inc(misses)
+        with self._lock:
+            self._local_hits += local_hits
+            self._shared_hits += shared_hits
+            self._misses += misses
+
+    def reset_stats(self):
+        with self._lock:
+            self._local_hits = self._shared_hits = self._misses = 0
+
+    def stats(self):
+        """Hit counts and rate since the last reset_stats(), per claim row."""
+        with self._lock:
+            lookups = self._local_hits + self._shared_hits + self._misses
+            return {
+                'lookups': lookups,
+                'local_hits': self._local_hits,
+                'shared_hits': self._shared_hits,
+                'misses': self._misses,
+                'hit_rate': (self._local_hits + self._shared_hits) / lookups if lookups else 0.0,
+                'local_size': len(self._local),
+            }
+
+
+prediction_cache = PredictionCache(
+    maxsize=getattr(settings, 'PREDICTION_CACHE_SIZE', 10000),
+    timeout=getattr(settings, 'PREDICTION_CACHE_TIMEOUT', 86400),
+)
@@ -0,0 +1,201 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+from .metrics import MODEL_LOAD_SECONDS, STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_PATH = os.path.join(settings.BASE_DIR, 'knn_model_sklearn.pkl')
+
+
+def bundle_format(bundle):
+    """
+    'sklearn' for ``{"model", "scaler", "feature_names"}`` bundles (an
+    estimator fitted on scaler output) or 'custom' for trainer.py's
+    ``{"ml", "feature_names", ...}`` bundles, whose KNN standardizes its own
+    input. Anything else raises ValueError.
+    """
+    if not isinstance(bundle, dict) or "feature_names" not in bundle:
+        raise ValueError("Model bundle must be a dict with 'feature_names'.")
+    if "model" in bundle and "scaler" in bundle:
+        return 'sklearn'
+    if "ml" in bundle and len(getattr(bundle["ml"], "models", ())) == 1:
+        return 'custom'
+    raise ValueError("Model bundle must hold 'model' and 'scaler', or an 'ml' MLModule with one model.")
+
+
+class LoadedModel:
+    """An unpickled model bundle together with the MLModel row it came from."""
+
+    def __init__(self, key, bundle, pk=None, version=None, path=None):
+        self.key = key
+        self.bundle = bundle
+        self.pk = pk
+        self.version = version
+        self.path = path
+        self.cache_token = self._cache_token()
+        # Metric children resolved once per model rather than per prediction
+        self._stage_seconds = {stage: STAGE_SECONDS.labels(stage, self.label)
+                               for stage in ('encode', 'transform', 'predict')}
+
+    def _cache_token(self):
+        """
+        PredictionCache token: the MLModel row plus the file's size and mtime,
+        so a bundle retrained in place (e.g. the default knn_model_sklearn.pkl)
+        does not share cached predictions with the one it replaced.
+        """
+        try:
+            stat = os.stat(self.path)
+            file_id = (stat.st_size, stat.st_mtime_ns)
+        except (OSError, TypeError):
+            file_id = None
+        source = repr((self.pk, self.version, self.path, file_id))
+        return hashlib.blake2b(source.encode(), digest_size=8).hexdigest()
+
+    @property
+    def label(self):
+        """model_version label for metrics; 'default' for the bundled fallback model."""
+        return self.version or 'default'
+
+    def __getitem__(self, name):
+        return self.bundle[name]
+
+    @property
+    def encoder(self):
+        """ClaimFeatureEncoder for this bundle, compiled on first access."""
+        encoder = self.__dict__.get('_encoder')
+        if encoder is None:
+            from .encoding import ClaimFeatureEncoder
+            encoder = self._encoder = ClaimFeatureEncoder.from_bundle(self.bundle)
+        return encoder
+
+    def encode(self, claims):
+        """Encode claims into a model input matrix."""
+        with self._stage_seconds['encode'].time():
+            return self.encoder.encode_many(claims)
+
+    def predict(self, X):
+        """Scale and predict a matrix of encoded claims."""
+        if bundle_format(self.bundle) == 'custom':
+            # The KNN scales with its own fitted StandardScaler inside predict()
+            (model,) = self.bundle["ml"].models.values()
+            with self._stage_seconds['predict'].time():
+                return model.predict(X)
+        with self._stage_seconds['transform'].time():
+            X_scaled = self.bundle["scaler"].transform(X)
+        with self._stage_seconds['predict'].time():
+            return self.bundle["model"].predict(X_scaled)
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of the model used for serving predictions.
+
+    The active ``MLModel`` is looked up lazily on first use and its bundle is
+    kept until a different pk/version/file becomes active. Other workers
+    notice a swap within ``check_interval`` seconds; in this process the
+    ``MLModel`` save/delete signals invalidate immediately. An active model
+    that cannot be loaded or served is logged and the default bundle is
+    served in its place until the active model changes again. ``last_used`` timestamps are
+    collected in memory and written back from a background thread at most
+    once per ``flush_interval`` seconds.
+    """
+
+    def __init__(self, check_interval=5, flush_interval=60, default_path=DEFAULT_MODEL_PATH):
+        self.check_interval = check_interval
+        self.flush_interval = flush_interval
+        self.default_path = default_path
+        self._load_lock = threading.Lock()
+        self._usage_lock = threading.Lock()
+        self._current = None
+        self._stale = True
+        self._checked_at = 0.0
+        self._pending_usage = {}
+        self._flushed_at = time.monotonic()
+
+    def get(self):
+        """Return the LoadedModel to serve with, loading or swapping it if needed."""
+        current = self._current
+        if self._stale or time.monotonic() - self._checked_at >= self.check_interval:
+            current = self._refresh()
+        if current.pk is not None:
+            self._record_usage(current.pk)
+        return current
+
+    def invalidate(self):
+        """Force the next get() to re-check which model is active."""
+        self._stale = True
+
+    def _active_model_key(self):
+        from .models import MLModel
+        active = (MLModel.objects.filter(is_active=True)
+                  .values_list('pk', 'version', 'model_file').first())
+        if active is None:
+            return ('default', self.default_path), None
+        pk, version, model_file = active
+        return (pk, version, model_file), active
+
+    def _refresh(self):
+        with self._load_lock:
+            self._stale = False
+            key, active = self._active_model_key()
+            current = self._current
+            if current is None or current.key != key:
+                current = self._load(key, active)
+                # Swap by rebinding a single reference; requests already holding
+                # the previous LoadedModel finish with it undisturbed.
+                self._current = current
+            self._checked_at = time.monotonic()
+            return current
+
+    def _load(self, key, active):
+        from .bundles import load_bundle
+        if active is not None:
+            pk, version, model_file = active
+            path = os.path.join(settings.MEDIA_ROOT, model_file)
+            try:
+                with MODEL_LOAD_SECONDS.labels(version or 'default').time():
+                    bundle = load_bundle(path)
+                    bundle_format(bundle)
+                return LoadedModel(key, bundle, pk=pk, version=version, path=path)
+            except Exception:
+                # Keyed like the active model, so the broken file is not
+                # re-read on every check, only once it is replaced
+                logger.exception("Could not load ML model %s v%s from %s; serving %s instead",
+                                 pk, version, path, self.default_path)
+        with MODEL_LOAD_SECONDS.labels('default').time():
+            return LoadedModel(key, load_bundle(self.default_path), path=self.default_path)
+
+    def _record_usage(self, pk):
+        with self._usage_lock:
+            self._pending_usage[pk] = timezone.now()
+            due = time.monotonic() - self._flushed_at >= self.flush_interval
+            if due:
+                self._flushed_at = time.monotonic()
+        if due:
+            threading.Thread(target=self._flush_in_thread, daemon=True).start()
+
+    def _flush_in_thread(self):
+        try:
+            self.flush()
+        finally:
+            connections.close_all()
+
+    def flush(self):
+        """Write pending last_used timestamps, one UPDATE per model used since the last flush."""
+        from .models import MLModel
+        with self._usage_lock:
+            pending, self._pending_usage = self._pending_usage, {}
+        for pk, last_used in pending.items():
+            MLModel.objects.filter(pk=pk).update(last_used=last_used)
+
+
+model_registry = ModelRegistry(
+    check_interval=getattr(settings, 'ML_MODEL_CHECK_INTERVAL', 5),
+    flush_interval=getattr(settings, 'ML_MODEL_LAST_USED_FLUSH_INTERVAL', 60),
+)
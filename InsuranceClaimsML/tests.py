@@ -1,10 +1,26 @@
-from django.test import TestCase, Client
+from django.test import TestCase, Client, AsyncClient
 from django.urls import reverse
+from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.contrib.messages import get_messages
 from InsuranceClaimsUser.models import User, Role, Permission
 from .models import MLModel
+from .mlmodels import KNN, MLModule
+from .neighbors import KDTree, RandomProjectionForest
+from .bundles import save_bundle, load_bundle
+from .registry import ModelRegistry, model_registry
+from .encoding import ClaimFeatureEncoder
+from .batching import MicroBatcher
+from .prediction_cache import PredictionCache
+from .registry import LoadedModel
+from django.core.cache import cache
+from prometheus_client import REGISTRY
+from decimal import Decimal
+import datetime
+import numpy as np
 import os
+import pickle
+import tempfile
 
 class MLModelTest(TestCase):
     def setUp(self):
@@ -200,4 +216,503 @@ class MLModelTest(TestCase):
         self.assertEqual(response.status_code, 200)  # Stay on form
         self.assertFalse(MLModel.objects.filter(name='Invalid Model').exists())
         form = response.context['form']
-        self.assertIn('model_file', form.errors) 
\ No newline at end of file
+        self.assertIn('model_file', form.errors) 
+
+
+class KNNBatchPredictionTest(TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.X = rng.normal(size=(500, 30))
+        self.y = rng.normal(size=500)
+        self.queries = rng.normal(size=(137, 30))
+
+    def _brute_force(self, model, X):
+        X = model.scaler.transform(X)
+        predictions = []
+        for x in X:
+            distances = np.linalg.norm(model.X_train - x, axis=1)
+            predictions.append(np.mean(model.y_train[np.argsort(distances)[:model.k]]))
+        return np.array(predictions)
+
+    def test_batched_predictions_match_brute_force(self):
+        """Test that blocked prediction matches the per-row reference"""
+        model = KNN(k=5, block_size=32)
+        model.fit(self.X, self.y)
+        np.testing.assert_allclose(
+            model.predict(self.queries),
+            self._brute_force(model, self.queries)
+        )
+
+    def test_kneighbors_sorted_nearest_first(self):
+        """Test that kneighbors returns exact distances in ascending order"""
+        model = KNN(k=4)
+        model.fit(self.X, self.y)
+        X_scaled = model.scaler.transform(self.queries)
+        distances, indices = model.kneighbors(X_scaled)
+        self.assertEqual(indices.shape, (137, 4))
+        self.assertTrue(np.all(np.diff(distances, axis=1) >= 0))
+        expected = np.linalg.norm(model.X_train[indices[0]] - X_scaled[0], axis=1)
+        np.testing.assert_allclose(distances[0], expected, atol=1e-6)
+
+    def test_k_larger_than_training_set(self):
+        """Test that k is clamped to the number of training rows"""
+        model = KNN(k=50)
+        model.fit(self.X[:10], self.y[:10])
+        np.testing.assert_allclose(model.predict(self.queries[:3]), np.mean(self.y[:10]))
+
+    def test_tree_backends_match_brute_force(self):
+        """Test that KD-tree and ball-tree searches return the brute-force predictions"""
+        brute = KNN(k=3)
+        brute.fit(self.X, self.y)
+        expected = brute.predict(self.queries)
+        for algorithm in ['kd_tree', 'ball_tree']:
+            model = KNN(k=3, algorithm=algorithm, leaf_size=8)
+            model.fit(self.X, self.y)
+            np.testing.assert_allclose(model.predict(self.queries), expected, err_msg=algorithm)
+
+    def test_tree_pruning_matches_brute_force_distances(self):
+        """Test that low-dimensional tree searches prune leaves exactly, with duplicate rows and k above a leaf"""
+        rng = np.random.default_rng(1)
+        X = np.vstack([rng.normal(size=(2000, 3)), np.zeros((50, 3))])
+        queries = np.vstack([rng.normal(size=(100, 3)), np.zeros((3, 3))])
+        brute = KNN(k=12)
+        brute.fit(X, np.zeros(len(X)))
+        X_scaled = brute.scaler.transform(queries)
+        expected, _ = brute.kneighbors(X_scaled)
+        for algorithm in ['kd_tree', 'ball_tree']:
+            model = KNN(k=12, algorithm=algorithm, leaf_size=8)
+            model.fit(X, np.zeros(len(X)))
+            distances, indices = model.kneighbors(X_scaled)
+            np.testing.assert_allclose(distances, expected, atol=1e-9, err_msg=algorithm)
+            self.assertEqual(len(np.unique(indices[0])), 12)
+
+    def test_auto_algorithm_uses_tree_only_where_it_wins(self):
+        """Test that algorithm='auto' picks the KD-tree for large low-dimensional data and brute force otherwise"""
+        rng = np.random.default_rng(2)
+        model = KNN(k=3, algorithm='auto')
+        model.fit(rng.normal(size=(20000, 2)), np.zeros(20000))
+        self.assertIsInstance(model.tree, KDTree)
+        model.fit(self.X, self.y)
+        self.assertIsNone(model.tree)
+
+    def test_unknown_algorithm_rejected(self):
+        """Test that an unknown search backend is rejected"""
+        with self.assertRaises(ValueError):
+            KNN(algorithm='octree')
+
+    def test_rp_forest_recall_improves_with_trees(self):
+        """Test that approximate search recall grows with n_trees and stays close to exact"""
+        exact = KNN(k=3)
+        exact.fit(self.X, self.y)
+        X_scaled = exact.scaler.transform(self.queries)
+        _, exact_indices = exact.kneighbors(X_scaled)
+
+        recalls = []
+        for n_trees in [1, 32]:
+            forest = RandomProjectionForest(exact.X_train, leaf_size=20, n_trees=n_trees, random_state=0)
+            distances, indices = forest.query(X_scaled, 3)
+            self.assertTrue(np.all(np.diff(distances, axis=1) >= 0))
+            self.assertTrue(all(len(np.unique(row)) == 3 for row in indices))
+            recalls.append(np.mean([
+                len(np.intersect1d(found, expected)) / 3
+                for found, expected in zip(indices, exact_indices)
+            ]))
+        self.assertLess(recalls[0], recalls[1])
+        self.assertGreater(recalls[1], 0.8)
+
+    def test_rp_forest_reaches_reported_recall(self):
+        """Test that KNN(algorithm='rp_forest') reaches the recall knn_ann_report.py measured on the claims data"""
+        from knn_ann_report import load_dataset
+
+        X, y = load_dataset(os.path.join(settings.BASE_DIR, "Cleaned_Patient_Records.csv"))
+        # The report's default split: seed 0, 20% held out
+        order = np.random.default_rng(0).permutation(len(X))
+        n_test = int(len(X) * 0.2)
+        test, train = order[:n_test], order[n_test:]
+        exact = KNN(k=3)
+        exact.fit(X[train], y[train])
+        approximate = KNN(k=3, algorithm='rp_forest', leaf_size=10, n_trees=64, random_state=0)
+        approximate.fit(X[train], y[train])
+        self.assertIsInstance(approximate.tree, RandomProjectionForest)
+
+        X_test = exact.scaler.transform(X[test])
+        _, exact_indices = exact.kneighbors(X_test)
+        _, indices = approximate.kneighbors(X_test)
+        recall = np.mean([
+            len(np.intersect1d(found, expected)) / 3
+            for found, expected in zip(indices, exact_indices)
+        ])
+        # The report measured 0.968 for this setting
+        self.assertGreaterEqual(recall, 0.95)
+        np.testing.assert_allclose(approximate.predict(X[test][:5]),
+                                   y[train][indices[:5]].mean(axis=1))
+
+
+class BundleFormatTest(TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.queries = rng.normal(size=(20, 6))
+        self.ml = MLModule()
+        self.ml.add_model("knn_regressor", KNN(k=3))
+        self.ml.train("knn_regressor", rng.normal(size=(200, 6)), rng.normal(size=200))
+        self.bundle = {
+            "ml": self.ml,
+            "feature_names": [f"f{i}" for i in range(6)],
+            "category_mappings": {},
+        }
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "bundle.pkl")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_arrays_are_memory_mapped_from_the_bundle_file(self):
+        """Test that the bundle is one file whose training matrix loads as a read-only float32 memmap"""
+        save_bundle(self.bundle, self.path)
+        self.assertEqual(os.listdir(self.tmpdir.name), ["bundle.pkl"])
+        loaded = load_bundle(self.path)
+        model = loaded["ml"].models["knn_regressor"]
+        self.assertIsInstance(model.X_train, np.memmap)
+        self.assertEqual(model.X_train.dtype, np.float32)
+        self.assertFalse(model.X_train.flags.writeable)
+        self.assertEqual(model.X_train.ctypes.data % 64, 0)
+        self.assertNotIn("array_members", loaded)
+        np.testing.assert_allclose(
+            loaded["ml"].predict("knn_regressor", self.queries),
+            self.ml.predict("knn_regressor", self.queries),
+            rtol=1e-5
+        )
+
+    def test_legacy_pickle_bundles_still_load(self):
+        """Test that pickle-only bundles load unchanged"""
+        with open(self.path, "wb") as f:
+            pickle.dump(self.bundle, f)
+        loaded = load_bundle(self.path)
+        self.assertEqual(loaded["feature_names"], self.bundle["feature_names"])
+
+
+class ModelRegistryTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='ai_engineer',
+            password='aipass123',
+            full_name='AI Engineer'
+        )
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.registry = ModelRegistry(check_interval=3600, flush_interval=3600)
+
+    def tearDown(self):
+        for ml_model in MLModel.objects.all():
+            ml_model.delete()
+        self.tmpdir.cleanup()
+
+    def _bundle(self, settlement):
+        # Same shape as trainer.py's bundle; every claim settles at ``settlement``
+        rng = np.random.default_rng(0)
+        knn = KNN(k=3)
+        knn.fit(rng.normal(size=(50, 2)), np.full(50, settlement))
+        ml = MLModule()
+        ml.add_model("knn_regressor", knn)
+        return {
+            "ml": ml,
+            "feature_names": ["Driver_Age", "Vehicle_Age"],
+            "X_min": [0.0, 0.0],
+            "denom": [1.0, 1.0],
+            "category_mappings": {},
+        }
+
+    def _create_model(self, version, is_active=True, content=None):
+        if content is None:
+            content = pickle.dumps(self._bundle(float(version)))
+        return MLModel.objects.create(
+            name=f'Model {version}',
+            model_file=SimpleUploadedFile(f"model_{version}.pkl", content),
+            version=version,
+            uploaded_by=self.user,
+            is_active=is_active
+        )
+
+    def _predict(self, loaded):
+        return loaded.predict(loaded.encode([{'Driver_Age': 30, 'Vehicle_Age': 5}]))[0]
+
+    def test_loads_active_model_lazily_and_caches_it(self):
+        """Test that the active model is loaded once and then served from memory"""
+        ml_model = self._create_model('1.0')
+        loaded = self.registry.get()
+        self.assertEqual(self._predict(loaded), 1.0)
+        self.assertEqual(loaded.key, (ml_model.pk, '1.0', ml_model.model_file.name))
+        with self.assertNumQueries(0):
+            self.assertIs(self.registry.get(), loaded)
+
+    def test_swaps_when_another_model_is_activated(self):
+        """Test that activating a different model swaps it in after invalidation"""
+        self._create_model('1.0')
+        self.assertEqual(self._predict(self.registry.get()), 1.0)
+        self._create_model('2.0')
+        self.registry.invalidate()
+        self.assertEqual(self._predict(self.registry.get()), 2.0)
+
+    def test_swaps_when_the_model_file_is_replaced(self):
+        """Test that a new file on the same MLModel row is picked up without a version bump"""
+        ml_model = self._create_model('1.0')
+        self.assertEqual(self._predict(self.registry.get()), 1.0)
+        ml_model.model_file = SimpleUploadedFile("model_1.0.pkl", pickle.dumps(self._bundle(3.0)))
+        ml_model.save()
+        self.registry.invalidate()
+        self.assertEqual(self._predict(self.registry.get()), 3.0)
+
+    def test_sklearn_bundle_is_served(self):
+        """Test that the bundled default model (scaler + estimator format) predicts"""
+        loaded = self.registry.get()
+        self.assertIsNone(loaded.pk)
+        self.assertEqual(loaded.predict(loaded.encode([{'Driver_Age': 30}])).shape, (1,))
+
+    def test_uploaded_bundle_is_served_end_to_end(self):
+        """Test that a save_bundle() file uploaded as an MLModel is memory-mapped and served by model_registry"""
+        path = os.path.join(self.tmpdir.name, "bundle.pkl")
+        save_bundle(self._bundle(4.0), path)
+        with open(path, "rb") as f:
+            self._create_model('4.0', content=f.read())
+        loaded = model_registry.get()
+        self.assertEqual(loaded.version, '4.0')
+        self.assertIsInstance(loaded["ml"].models["knn_regressor"].X_train, np.memmap)
+        self.assertAlmostEqual(self._predict(loaded), 4.0)
+
+    def test_unusable_model_falls_back_to_default(self):
+        """Test that an active model that cannot be served is logged and replaced by the default bundle"""
+        for content in (b"not a pickle", pickle.dumps({"model": "model-1.0", "feature_names": []})):
+            ml_model = self._create_model('1.0', content=content)
+            self.registry.invalidate()
+            with self.assertLogs('InsuranceClaimsML.registry', level='ERROR'):
+                loaded = self.registry.get()
+            self.assertIsNone(loaded.pk)
+            self.assertEqual(loaded.path, self.registry.default_path)
+            self.assertEqual(loaded.predict(loaded.encode([{'Driver_Age': 30}])).shape, (1,))
+            # Not retried until the active model changes
+            self.registry.invalidate()
+            with self.assertNoLogs('InsuranceClaimsML.registry', level='ERROR'):
+                self.assertIs(self.registry.get(), loaded)
+            ml_model.delete()
+
+    def test_last_used_is_written_in_batches(self):
+        """Test that last_used is buffered in memory until flush()"""
+        ml_model = self._create_model('1.0')
+        for _ in range(5):
+            self.registry.get()
+        ml_model.refresh_from_db()
+        self.assertIsNone(ml_model.last_used)
+        with self.assertNumQueries(1):
+            self.registry.flush()
+        ml_model.refresh_from_db()
+        self.assertIsNotNone(ml_model.last_used)
+
+
+class ClaimFeatureEncoderTest(TestCase):
+    def setUp(self):
+        self.feature_names = ['AccidentType', 'SpecialHealthExpenses', 'Driver_Age', 'Gender',
+                              'Unmapped_Feature', 'duration_days']
+        self.encoder = ClaimFeatureEncoder(self.feature_names)
+        self.claim = {
+            'AccidentType': 'Head-on collision',
+            'SpecialHealthExpenses': Decimal('1250.50'),
+            'Driver_Age': 41,
+            'Gender': 'Unknown',
+            'Accident_Date': datetime.date(2024, 1, 1),
+            'Claim_Date': datetime.date(2024, 1, 31),
+        }
+
+    def test_encode_single_claim(self):
+        """Test that a claim is encoded into the fixed column layout"""
+        row = self.encoder.encode(self.claim)
+        np.testing.assert_array_equal(row, [3, 1250.5, 41, 0, 0, 30])
+
+    def test_encode_into_preallocated_matrix(self):
+        """Test that batches are written in place into a preallocated matrix"""
+        out = np.full((2, len(self.feature_names)), -1.0)
+        result = self.encoder.encode_many([self.claim, {}], out=out)
+        self.assertIs(result, out)
+        np.testing.assert_array_equal(out[1], np.zeros(len(self.feature_names)))
+
+    def test_encode_frame_matches_encode(self):
+        """Test that DataFrame encoding agrees with per-claim encoding"""
+        import pandas as pd
+        frame = pd.DataFrame([self.claim])
+        np.testing.assert_array_equal(self.encoder.encode_frame(frame)[0], self.encoder.encode(self.claim))
+
+
+class MicroBatcherTest(TestCase):
+    class RecordingModel:
+        def __init__(self):
+            self.calls = []
+
+        def predict(self, X):
+            self.calls.append(X.shape)
+            return X[:, 0] * 10
+
+    def test_concurrent_submissions_share_one_predict(self):
+        """Test that submissions arriving inside the wait window are predicted together and split back"""
+        model = self.RecordingModel()
+        batcher = MicroBatcher(max_batch=64, max_wait=0.2)
+        futures = [batcher.submit(model, np.array([[float(i)], [float(i) + 0.5]])) for i in range(3)]
+        results = [future.result(5) for future in futures]
+        self.assertEqual(model.calls, [(6, 1)])
+        for i, result in enumerate(results):
+            np.testing.assert_array_equal(result.predictions, [i * 10, i * 10 + 5])
+            self.assertEqual(result.batch_size, 6)
+        stats = batcher.stats()
+        self.assertEqual((stats['batches'], stats['requests'], stats['claims']), (1, 3, 6))
+
+    def test_batch_closes_at_max_batch(self):
+        """Test that a full batch is predicted without waiting for the window"""
+        model = self.RecordingModel()
+        batcher = MicroBatcher(max_batch=2, max_wait=5)
+        futures = [batcher.submit(model, np.array([[1.0]])) for _ in range(4)]
+        for future in futures:
+            future.result(2)
+        self.assertEqual(model.calls, [(2, 1), (2, 1)])
+
+    def test_models_are_not_mixed_and_errors_reach_callers(self):
+        """Test that rows for different models get separate predicts and a failure only hits its own callers"""
+        class BrokenModel:
+            def predict(self, X):
+                raise ValueError("bad model")
+
+        model = self.RecordingModel()
+        batcher = MicroBatcher(max_batch=64, max_wait=0.2)
+        ok = batcher.submit(model, np.array([[1.0]]))
+        broken = batcher.submit(BrokenModel(), np.array([[1.0]]))
+        self.assertEqual(list(ok.result(5).predictions), [10.0])
+        with self.assertRaises(ValueError):
+            broken.result(5)
+        self.assertEqual(model.calls, [(1, 1)])
+
+
+class PredictionCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.model = LoadedModel(('1', '1.0'), {}, pk=1, version='1.0', path='/models/a.pkl')
+        self.calls = []
+
+    def predict(self, rows):
+        self.calls.append(len(rows))
+        return rows.sum(axis=1)
+
+    def test_only_uncached_rows_reach_the_model(self):
+        """Test that repeated rows are answered from the LRU and only new rows are predicted"""
+        prediction_cache = PredictionCache(maxsize=100)
+        X = np.array([[1.0, 2.0], [3.0, 4.0]])
+        np.testing.assert_array_equal(prediction_cache.predict(self.model, X, self.predict), [3.0, 7.0])
+        X = np.array([[3.0, 4.0], [-0.0, 5.0], [1.0, 2.0]])
+        np.testing.assert_array_equal(prediction_cache.predict(self.model, X, self.predict), [7.0, 5.0, 3.0])
+        np.testing.assert_array_equal(prediction_cache.predict(self.model, np.array([[0.0, 5.0]]), self.predict), [5.0])
+        self.assertEqual(self.calls, [2, 1])
+        stats = prediction_cache.stats()
+        self.assertEqual((stats['lookups'], stats['local_hits'], stats['misses']), (6, 3, 3))
+        self.assertEqual(stats['hit_rate'], 0.5)
+
+    def test_shared_tier_serves_other_processes(self):
+        """Test that a second cache instance (another worker) finds values through the Django cache"""
+        X = np.array([[1.0, 2.0]])
+        PredictionCache(maxsize=100).predict(self.model, X, self.predict)
+        other_worker = PredictionCache(maxsize=100)
+        np.testing.assert_array_equal(other_worker.predict(self.model, X, self.predict), [3.0])
+        self.assertEqual(self.calls, [1])
+        self.assertEqual(other_worker.stats()['shared_hits'], 1)
+
+    def test_new_model_invalidates_entries(self):
+        """Test that another model (or a re-uploaded file) never sees the old model's predictions"""
+        prediction_cache = PredictionCache(maxsize=100)
+        X = np.array([[1.0, 2.0]])
+        prediction_cache.predict(self.model, X, self.predict)
+        for other in (LoadedModel(('2', '2.0'), {}, pk=2, version='2.0', path='/models/b.pkl'),
+                      LoadedModel(('1', '1.0'), {}, pk=1, version='1.0', path='/models/a_x1y2.pkl')):
+            prediction_cache.predict(other, X, self.predict)
+            self.assertEqual(prediction_cache.stats()['local_size'], 1)
+        self.assertEqual(self.calls, [1, 1, 1])
+
+    def test_retrained_file_invalidates_entries(self):
+        """Test that a bundle rewritten at the same path gets a new token"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "knn_model_sklearn.pkl")
+            with open(path, "wb") as f:
+                f.write(b"old model")
+            old = LoadedModel(('default', path), {}, path=path)
+            with open(path, "wb") as f:
+                f.write(b"retrained model")
+            new = LoadedModel(('default', path), {}, path=path)
+        self.assertNotEqual(PredictionCache.model_token(old), PredictionCache.model_token(new))
+        prediction_cache = PredictionCache(maxsize=100)
+        X = np.array([[1.0, 2.0]])
+        prediction_cache.predict(old, X, self.predict)
+        prediction_cache.predict(new, X, self.predict)
+        self.assertEqual(self.calls, [1, 1])
+
+    def test_lru_is_bounded(self):
+        """Test that the in-process tier keeps only the most recently used rows"""
+        prediction_cache = PredictionCache(maxsize=2)
+        for value in (1.0, 2.0, 3.0):
+            prediction_cache.predict(self.model, np.array([[value]]), self.predict)
+        self.assertEqual(prediction_cache.stats()['local_size'], 2)
+        cache.clear()
+        prediction_cache.predict(self.model, np.array([[1.0]]), self.predict)
+        self.assertEqual(self.calls, [1, 1, 1, 1])
+
+    def test_disabled(self):
+        """Test that maxsize=0 always calls the model"""
+        prediction_cache = PredictionCache(maxsize=0)
+        for _ in range(2):
+            prediction_cache.predict(self.model, np.array([[1.0]]), self.predict)
+        self.assertEqual(self.calls, [1, 1])
+
+
+class PrometheusMetricsTest(TestCase):
+    def sample(self, name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0.0
+
+    def test_prediction_stages_are_recorded(self):
+        """Test that scoring a claim observes encode/transform/predict latency and counts the claim"""
+        from InsuranceClaimsCustomer.scoring import predict_settlements
+        from .prediction_cache import prediction_cache
+        cache.clear()
+        prediction_cache.clear()
+        claim = {'AccidentType': 'Other', 'Driver_Age': 41, 'SpecialHealthExpenses': 1234}
+        before = {stage: self.sample('claims_model_stage_seconds_count', stage=stage, model_version='default')
+                  for stage in ('encode', 'transform', 'predict')}
+        claimed = self.sample('claims_predicted_total', model_version='default', source='scoring')
+        hits = self.sample('claims_prediction_cache_lookups_total', result='local_hit')
+
+        predict_settlements([claim])
+        predict_settlements([claim])
+
+        self.assertEqual(self.sample('claims_model_stage_seconds_count', stage='encode', model_version='default'),
+                         before['encode'] + 2)
+        for stage in ('transform', 'predict'):
+            self.assertEqual(self.sample('claims_model_stage_seconds_count', stage=stage, model_version='default'),
+                             before[stage] + 1)
+        self.assertEqual(self.sample('claims_predicted_total', model_version='default', source='scoring'), claimed + 2)
+        self.assertEqual(self.sample('claims_prediction_cache_lookups_total', result='local_hit'), hits + 1)
+
+    def test_metrics_endpoint_access(self):
+        """Test that /metrics is only served to staff and allowlisted scrapers"""
+        staff = User.objects.create_user(username='ops', password='opspass123', full_name='Ops', is_staff=True)
+        User.objects.create_user(username='plain', password='plainpass123', full_name='Plain')
+        self.assertEqual(Client().get('/metrics').status_code, 302)
+        client = Client()
+        client.login(username='plain', password='plainpass123')
+        self.assertEqual(client.get('/metrics').status_code, 404)
+        client.force_login(staff)
+        self.assertEqual(client.get('/metrics').status_code, 200)
+        with self.settings(METRICS_ALLOWED_NETWORKS=['10.0.0.0/8']):
+            self.assertEqual(Client(REMOTE_ADDR='192.168.1.5').get('/metrics').status_code, 302)
+            response = Client(REMOTE_ADDR='10.1.2.3').get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'claims_model_stage_seconds', response.content)
+        self.assertIn(b'django_http_requests_total_by_view_transport_method', response.content)
+
+    async def test_metrics_endpoint_access_under_asgi(self):
+        """Test that the async middleware path serves staff and redirects anonymous users"""
+        staff = await User.objects.acreate(username='ops', full_name='Ops', is_staff=True)
+        client = AsyncClient()
+        self.assertEqual((await client.get('/metrics')).status_code, 302)
+        await client.aforce_login(staff)
+        self.assertEqual((await client.get('/metrics')).status_code, 200)
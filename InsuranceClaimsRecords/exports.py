@@ -0,0 +1,72 @@
+import csv
+import io
+import zlib
+from django.utils.dateparse import parse_date
+from .models import Record
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+class ExportError(ValueError):
+    """Raised for export query parameters that cannot be applied."""
+
+
+def export_queryset(params):
+    """
+    Build the ``values_list`` queryset and header for an export from request
+    GET parameters: ``fields`` (comma separated Record field names), ``status``
+    and an inclusive ``date_from``/``date_to`` range on ``accident_date``.
+    """
+    all_fields = [field.name for field in Record._meta.fields]
+    fields = all_fields
+    if params.get('fields'):
+        fields = [name.strip() for name in params['fields'].split(',') if name.strip()]
+        unknown = [name for name in fields if name not in all_fields]
+        if unknown:
+            raise ExportError(f"Unknown field(s): {', '.join(unknown)}")
+
+    records = Record.objects.all()
+    if params.get('status'):
+        statuses = dict(Record.STATUS_CHOICES)
+        if params['status'] not in statuses:
+            raise ExportError(f"Unknown status: {params['status']}")
+        records = records.filter(status=params['status'])
+    for param, lookup in (('date_from', 'accident_date__gte'), ('date_to', 'accident_date__lte')):
+        if params.get(param):
+            try:
+                value = parse_date(params[param])
+            except ValueError:
+                value = None
+            if value is None:
+                raise ExportError(f"{param} must be a date in YYYY-MM-DD format")
+            records = records.filter(**{lookup: value})
+
+    return records.order_by('record_id').values_list(*fields), fields
+
+
+def stream_csv(rows, header, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield CSV text for ``header`` and ``rows``, fetching rows from the database
+    ``chunk_size`` at a time (a server-side cursor where the backend has one)
+    and emitting one string per chunk.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    for count, row in enumerate(rows.iterator(chunk_size=chunk_size), start=1):
+        writer.writerow(row)
+        if count % chunk_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def gzip_stream(chunks):
+    """Gzip-compress an iterable of strings on the fly."""
+    compressor = zlib.compressobj(wbits=31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
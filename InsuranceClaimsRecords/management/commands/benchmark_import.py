@@ -0,0 +1,89 @@
+import os
+import tempfile
+import time
+from io import StringIO
+import pandas as pd
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Max
+from InsuranceClaimsRecords.models import Record
+
+MODES = ['row-by-row', 'bulk', 'copy']
+
+
+class Command(BaseCommand):
+    help = ("Compare import_csv modes (row-by-row, bulk_create, COPY) on a CSV replicated to --rows rows. "
+            "Row-by-row runs on --sample-rows rows and its full-size time is extrapolated.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', default=os.path.join(settings.BASE_DIR, 'MLModel', 'Synthetic_Data_For_Students.csv'),
+                            help='Source CSV that is repeated to build the benchmark input.')
+        parser.add_argument('--rows', type=int, default=1_000_000,
+                            help='Rows in the replicated CSV.')
+        parser.add_argument('--sample-rows', type=int, default=5000,
+                            help='Rows imported in row-by-row mode before extrapolating.')
+        parser.add_argument('--modes', nargs='+', choices=MODES, default=MODES)
+        parser.add_argument('--chunk-size', type=int, default=50000)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--keep', action='store_true',
+                            help='Keep the imported rows instead of deleting them after each mode.')
+
+    def handle(self, *args, **options):
+        modes = options['modes']
+        if 'copy' in modes and connection.vendor != 'postgresql':
+            raise CommandError(f"copy mode needs PostgreSQL, the default database is {connection.vendor}")
+
+        workdir = tempfile.mkdtemp(prefix='benchmark_import_')
+        full_path = os.path.join(workdir, 'full.csv')
+        sample_path = os.path.join(workdir, 'sample.csv')
+        source = pd.read_csv(options['file'])
+        self.replicate(source, full_path, options['rows'])
+        self.replicate(source, sample_path, min(options['sample_rows'], options['rows']))
+        self.stdout.write(f"📄 {options['rows']} rows written to {full_path}")
+
+        results = []
+        try:
+            for mode in modes:
+                path = sample_path if mode == 'row-by-row' else full_path
+                imported, elapsed = self.run_mode(mode, path, options)
+                rate = imported / elapsed if elapsed > 0 else 0.0
+                estimate = options['rows'] / rate if rate else float('nan')
+                results.append((mode, imported, elapsed, rate, estimate))
+                self.stdout.write(f"⏱️ {mode}: {imported} rows in {elapsed:.2f}s ({rate:,.0f} rows/sec)")
+        finally:
+            for path in (full_path, sample_path):
+                os.remove(path)
+            os.rmdir(workdir)
+
+        self.stdout.write(f"\n{'mode':<12}{'rows':>10}{'seconds':>10}{'rows/sec':>12}{'est. ' + str(options['rows']):>16}")
+        for mode, imported, elapsed, rate, estimate in results:
+            self.stdout.write(f"{mode:<12}{imported:>10}{elapsed:>10.2f}{rate:>12,.0f}{estimate:>15.1f}s")
+        self.stdout.write(self.style.SUCCESS("✅ Benchmark complete"))
+
+    def replicate(self, source, path, rows):
+        """Write ``rows`` rows to ``path`` by repeating ``source``, one copy at a time."""
+        written = 0
+        with open(path, 'w', newline='') as f:
+            while written < rows:
+                part = source.iloc[:rows - written]
+                part.to_csv(f, header=written == 0, index=False)
+                written += len(part)
+
+    def run_mode(self, mode, path, options):
+        start_id = Record.objects.aggregate(Max('record_id'))['record_id__max'] or 0
+        started = time.perf_counter()
+        call_command('import_csv', file=path, row_by_row=mode == 'row-by-row', copy=mode == 'copy',
+                     chunk_size=options['chunk_size'], batch_size=options['batch_size'],
+                     stdout=StringIO(), stderr=StringIO())
+        elapsed = time.perf_counter() - started
+        imported = Record.objects.filter(record_id__gt=start_id).count()
+        if not options['keep']:
+            # Raw DELETE: the ORM collector would load every imported row to check cascades.
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"DELETE FROM {connection.ops.quote_name(Record._meta.db_table)} WHERE record_id > %s",
+                    [start_id],
+                )
+        return imported, elapsed
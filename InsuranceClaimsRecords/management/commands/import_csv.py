@@ -1,12 +1,62 @@
+import datetime
+import io
 import os
+import time
+import numpy as np
 import pandas as pd
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.conf import settings
+from django.db import connection, transaction
 from InsuranceClaimsRecords.models import Record
 
+RECORD_TYPE = "Insurance Claim"
+COPY_NULL = r"\N"
+
+# Record field -> (normalized CSV column, kind)
+FIELD_SOURCES = {
+    'settlement_value': ('settlementvalue', 'decimal'),
+    'accident_type': ('accidenttype', 'str'),
+    'injury_prognosis': ('injury_prognosis', 'str'),
+    'special_health_expenses': ('specialhealthexpenses', 'decimal'),
+    'special_reduction': ('specialreduction', 'decimal'),
+    'special_overage': ('specialoverage', 'decimal'),
+    'general_rest': ('generalrest', 'decimal'),
+    'special_additional_injury': ('specialadditionalinjury', 'decimal'),
+    'special_earnings_loss': ('specialearningsloss', 'decimal'),
+    'special_usage_loss': ('specialusageloss', 'decimal'),
+    'special_medications': ('specialmedications', 'decimal'),
+    'special_asset_damage': ('specialassetdamage', 'decimal'),
+    'special_rehabilitation': ('specialrehabilitation', 'decimal'),
+    'special_fixes': ('specialfixes', 'decimal'),
+    'general_fixed': ('generalfixed', 'decimal'),
+    'general_uplift': ('generaluplift', 'decimal'),
+    'special_loaner_vehicle': ('specialloanervehicle', 'decimal'),
+    'special_trip_costs': ('specialtripcosts', 'decimal'),
+    'special_journey_expenses': ('specialjourneyexpenses', 'str'),
+    'special_therapy': ('specialtherapy', 'str'),
+    'exceptional_circumstances': ('exceptional_circumstances', 'bool'),
+    'minor_psychological_injury': ('minor_psychological_injury', 'bool'),
+    'dominant_injury': ('dominant_injury', 'str'),
+    'whiplash': ('whiplash', 'bool'),
+    'vehicle_type': ('vehicle_type', 'str'),
+    'weather_conditions': ('weather_conditions', 'str'),
+    'vehicle_age': ('vehicle_age', 'int'),
+    'driver_age': ('driver_age', 'int'),
+    'number_of_passengers': ('number_of_passengers', 'int'),
+    'accident_description': ('accident_description', 'str'),
+    'injury_description': ('injury_description', 'str'),
+    'police_report_filed': ('police_report_filed', 'bool'),
+    'witness_present': ('witness_present', 'bool'),
+    'gender': ('gender', 'str'),
+    'accident_date': ('accident_date', 'date'),
+    'claim_date': ('claim_date', 'date'),
+}
+
 def parse_boolean(value):
     if isinstance(value, str):
         return value.strip().lower() in ['yes', 'true', '1']
+    if pd.isna(value):
+        return False
     return bool(value)
 
 def safe_str(value):
@@ -38,23 +88,154 @@ def safe_date(value):
     except:
         return None
 
+def normalize_columns(df):
+    df.columns = df.columns.str.strip().str.lower().str.replace(" ", "_").str.replace(r'[^a-z0-9_]', '', regex=True)
+    return df
+
+def clean_frame(df):
+    """
+    Vectorized equivalent of the safe_* helpers: returns a DataFrame with one
+    column per Record field (missing values as None) and a Series holding the
+    rejection reason for each row, or None for rows that can be imported.
+    """
+    cleaned = {}
+    reasons = pd.Series(None, index=df.index, dtype=object)
+
+    def reject(mask, reason):
+        reasons[mask & reasons.isna()] = reason
+
+    for field_name, (column, kind) in FIELD_SOURCES.items():
+        source = df[column] if column in df else pd.Series(np.nan, index=df.index)
+        field = Record._meta.get_field(field_name)
+        if kind == 'decimal':
+            values = pd.to_numeric(source, errors='coerce').round(field.decimal_places)
+            limit = 10 ** (field.max_digits - field.decimal_places)
+            reject(values.abs() >= limit, f"{field_name} out of range")
+        elif kind == 'int':
+            values = np.trunc(pd.to_numeric(source, errors='coerce')).astype('Int64')
+        elif kind == 'bool':
+            if pd.api.types.is_numeric_dtype(source):
+                values = source.fillna(0).astype(bool)
+            else:
+                values = source.astype(str).str.strip().str.lower().isin(['yes', 'true', '1'])
+        elif kind == 'date':
+            values = pd.to_datetime(source, errors='coerce', format='mixed').dt.date
+        else:
+            values = source.where(source.notna(), "").astype(str)
+            reject(values.str.len() > field.max_length, f"{field_name} too long")
+        cleaned[field_name] = values
+
+    cleaned = pd.DataFrame(cleaned, index=df.index).astype(object)
+    cleaned = cleaned.where(cleaned.notna(), None)
+    return cleaned, reasons
+
+def build_records(cleaned):
+    return [Record(record_type=RECORD_TYPE, **row) for row in cleaned.to_dict('records')]
+
 class Command(BaseCommand):
     help = "Import records from CSV file into the database"
 
+    def add_arguments(self, parser):
+        parser.add_argument('--file', default=os.path.join(settings.BASE_DIR, 'MLModel', 'Patient_records.csv'),
+                            help='CSV file to import.')
+        parser.add_argument('--row-by-row', action='store_true',
+                            help='Legacy mode: one Record.objects.create per row with per-row output.')
+        parser.add_argument('--copy', action='store_true',
+                            help='PostgreSQL only: COPY each cleaned chunk into a staging table, then merge into Record.')
+        parser.add_argument('--chunk-size', type=int, default=50000,
+                            help='CSV rows read and cleaned at a time.')
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Rows per INSERT statement in bulk mode.')
+
     def handle(self, *args, **options):
-        file_path = os.path.join(settings.BASE_DIR, 'MLModel', 'Patient_records.csv')
+        file_path = options['file']
 
         if not os.path.exists(file_path):
             self.stderr.write(self.style.ERROR("CSV file not found"))
             return
 
-        df = pd.read_csv(file_path)
-        df.columns = df.columns.str.strip().str.lower().str.replace(" ", "_").str.replace(r'[^a-z0-9_]', '', regex=True)
+        if options['copy'] and options['row_by_row']:
+            raise CommandError("--copy and --row-by-row are mutually exclusive")
+        if options['copy'] and connection.vendor != 'postgresql':
+            raise CommandError(f"--copy needs PostgreSQL, the default database is {connection.vendor}")
+
+        started = time.perf_counter()
+        if options['row_by_row']:
+            imported, rejected = self.import_row_by_row(file_path)
+        elif options['copy']:
+            imported, rejected = self.import_copy(file_path, options['chunk_size'])
+        else:
+            imported, rejected = self.import_bulk(file_path, options['chunk_size'], options['batch_size'])
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Imported {imported} rows in {elapsed:.2f}s, rejected {sum(rejected.values())}"
+        ))
+        for reason, count in sorted(rejected.items(), key=lambda item: -item[1]):
+            self.stderr.write(self.style.WARNING(f"  {count} rows rejected: {reason}"))
+
+    def import_bulk(self, file_path, chunk_size, batch_size):
+        imported = 0
+        rejected = {}
+        with transaction.atomic():
+            for chunk in pd.read_csv(file_path, chunksize=chunk_size):
+                cleaned, reasons = clean_frame(normalize_columns(chunk))
+                for reason, count in reasons.value_counts().items():
+                    rejected[reason] = rejected.get(reason, 0) + count
+                records = build_records(cleaned[reasons.isna()])
+                Record.objects.bulk_create(records, batch_size=batch_size)
+                imported += len(records)
+        return imported, rejected
+
+    def import_copy(self, file_path, chunk_size):
+        """
+        Stream every cleaned chunk through COPY ... FROM STDIN into a temporary
+        staging table, then merge it into Record with one INSERT ... SELECT.
+        Only one chunk is held in memory at a time.
+        """
+        qn = connection.ops.quote_name
+        fields = list(FIELD_SOURCES)
+        columns = ", ".join(qn(Record._meta.get_field(name).column) for name in fields)
+        staging = qn("import_csv_staging")
+        imported = 0
+        rejected = {}
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TEMPORARY TABLE {staging} ON COMMIT DROP AS "
+                f"SELECT {columns} FROM {qn(Record._meta.db_table)} WITH NO DATA"
+            )
+            copy_sql = f"COPY {staging} ({columns}) FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')"
+            for chunk in pd.read_csv(file_path, chunksize=chunk_size):
+                cleaned, reasons = clean_frame(normalize_columns(chunk))
+                for reason, count in reasons.value_counts().items():
+                    rejected[reason] = rejected.get(reason, 0) + count
+                accepted = cleaned[reasons.isna()]
+                buffer = io.StringIO()
+                accepted[fields].to_csv(buffer, header=False, index=False, na_rep=COPY_NULL)
+                buffer.seek(0)
+                cursor.cursor.copy_expert(copy_sql, buffer)
+                imported += len(accepted)
+
+            # created/last_modified/status have no database defaults; fill them
+            # the way auto_now_add, auto_now and the field default would.
+            today = datetime.date.today()
+            cursor.execute(
+                f"INSERT INTO {qn(Record._meta.db_table)} "
+                f"({columns}, {qn('record_type')}, {qn('created_date')}, {qn('last_modified_date')}, {qn('status')}) "
+                f"SELECT {columns}, %s, %s, %s, %s FROM {staging}",
+                [RECORD_TYPE, today, today, Record._meta.get_field('status').default],
+            )
+        return imported, rejected
+
+    def import_row_by_row(self, file_path):
+        df = normalize_columns(pd.read_csv(file_path))
+        imported = 0
+        rejected = {}
 
         for index, row in df.iterrows():
             try:
                 Record.objects.create(
-                    record_type="Insurance Claim",
+                    record_type=RECORD_TYPE,
                     settlement_value=safe_decimal(row.get("settlementvalue")),
                     accident_type=safe_str(row.get("accidenttype")),
                     injury_prognosis=safe_str(row.get("injury_prognosis")),
@@ -92,6 +273,9 @@ class Command(BaseCommand):
                     accident_date=safe_date(row.get("accident_date")),
                     claim_date=safe_date(row.get("claim_date")),
                 )
+                imported += 1
                 self.stdout.write(self.style.SUCCESS(f"✅ Imported row {index + 1}"))
             except Exception as e:
+                rejected[str(e)] = rejected.get(str(e), 0) + 1
                 self.stderr.write(self.style.ERROR(f"❌ Error on row {index + 1}: {str(e)}"))
+        return imported, rejected
@@ -0,0 +1,41 @@
+# Generated by Django 5.1.6 on 2026-10-18 20:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('InsuranceClaimsRecords', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='record',
+            name='InsuranceCl_status_a3e857_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='record',
+            name='InsuranceCl_acciden_ac6feb_idx',
+        ),
+        migrations.AddIndex(
+            model_name='record',
+            index=models.Index(fields=['status', 'record_id'], name='InsuranceCl_status_e00861_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='record',
+            index=models.Index(fields=['status', 'accident_date'], name='InsuranceCl_status_c97e66_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='record',
+            index=models.Index(fields=['accident_date', 'record_id'], name='InsuranceCl_acciden_ded28f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='record',
+            index=models.Index(fields=['claim_date', 'record_id'], name='InsuranceCl_claim_d_84d95b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='record',
+            index=models.Index(fields=['settlement_value', 'record_id'], name='InsuranceCl_settlem_09e01d_idx'),
+        ),
+    ]
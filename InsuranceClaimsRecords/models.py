@@ -1,10 +1,36 @@
 from django.db import models
+from django.db.models import F
+
+# Columns the records list may be sorted on. Each leads a B-tree index that
+# ends in record_id (see Record.Meta.indexes), so ORDER BY <field>, record_id
+# in either direction -- and keyset seeks on it -- are served by an index
+# scan instead of sorting the whole table.
+SORTABLE_FIELDS = {
+    'accident_date': 'Accident date',
+    'claim_date': 'Claim date',
+    'settlement_value': 'Settlement value',
+    'status': 'Status',
+    'record_id': 'Record ID',
+}
 
 class RecordManager(models.Manager):
+    def parse_sort(self, value, default='accident_date'):
+        """Turn a ?sort= value such as '-claim_date' into (field, descending), or the default if not sortable."""
+        value = value or ''
+        field_name = value.lstrip('-')
+        if field_name not in SORTABLE_FIELDS:
+            return default, False
+        return field_name, value.startswith('-')
+
     def sort_by(self, field_name, descending=False):
+        if field_name not in SORTABLE_FIELDS:
+            raise ValueError(f"Records cannot be sorted by {field_name!r}")
+        if field_name == 'record_id':
+            return self.order_by('-record_id' if descending else 'record_id')
+        # NULLs sort as the largest value, the order the indexes store them in
         if descending:
-            field_name = f"-{field_name}"
-        return self.order_by(field_name)
+            return self.order_by(F(field_name).desc(nulls_first=True), '-record_id')
+        return self.order_by(F(field_name).asc(nulls_last=True), 'record_id')
 
 class Record(models.Model):
     record_id = models.AutoField(primary_key=True)
@@ -60,8 +86,11 @@ class Record(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Pending')
     class Meta:
         indexes = [
-            models.Index(fields=['status']),
-            models.Index(fields=['accident_date']),
+            models.Index(fields=['status', 'record_id']),
+            models.Index(fields=['status', 'accident_date']),
+            models.Index(fields=['accident_date', 'record_id']),
+            models.Index(fields=['claim_date', 'record_id']),
+            models.Index(fields=['settlement_value', 'record_id']),
         ]
     objects = RecordManager()
     def __str__(self):
@@ -1,9 +1,20 @@
 from django.test import TestCase, Client
 from django.urls import reverse
 from django.contrib.auth import get_user_model
-from .models import Record
+from InsuranceClaimsAPI.pagination import KeysetPaginator
+from .models import Record, SORTABLE_FIELDS
 from .forms import RecordForm
 from django.utils import timezone
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from unittest import skipIf, skipUnless
+from io import StringIO
+import gzip
+import os
+import tempfile
 
 User = get_user_model()
 
@@ -92,6 +103,12 @@ class RecordViewTest(TestCase):
         self.assertContains(response, 'Test')
         self.assertTemplateUsed(response, 'records.html')
 
+    def test_sorted_records_defers_text_columns(self):
+        response = self.client.get(reverse('sorted_records'))
+        self.assertNotIn('accident_description', response.context['fields'])
+        record = next(iter(response.context['records']))
+        self.assertEqual(record.get_deferred_fields(), {'accident_description', 'injury_description'})
+
     def test_create_record_view(self):
         response = self.client.get(reverse('create_record'))
         self.assertEqual(response.status_code, 200)
@@ -133,7 +150,28 @@ class RecordViewTest(TestCase):
         response = self.client.get(reverse('export_csv'))
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response['Content-Type'], 'text/csv')
-        self.assertIn('record_id', response.content.decode())
+        self.assertIn('record_id', b''.join(response.streaming_content).decode())
+
+    def test_export_records_csv_filters(self):
+        Record.objects.create(record_type='Approved one', status='Approved', accident_date='2024-03-01')
+        Record.objects.create(record_type='Approved old', status='Approved', accident_date='2020-03-01')
+        response = self.client.get(reverse('export_csv'), {
+            'fields': 'record_id,record_type', 'status': 'Approved', 'date_from': '2024-01-01',
+        })
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'record_id,record_type')
+        self.assertEqual([line.split(',')[1] for line in lines[1:]], ['Approved one'])
+
+    def test_export_records_csv_gzip(self):
+        response = self.client.get(reverse('export_csv'), {'gzip': '1'})
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertIn('Patient_records.csv.gz', response['Content-Disposition'])
+        content = gzip.decompress(b''.join(response.streaming_content)).decode()
+        self.assertIn('Test', content)
+
+    def test_export_records_csv_rejects_unknown_field(self):
+        response = self.client.get(reverse('export_csv'), {'fields': 'record_id,password'})
+        self.assertEqual(response.status_code, 400)
 
     def test_pagination(self):
         # Create 15 records to trigger pagination (10 per page)
@@ -156,3 +194,186 @@ class RecordViewTest(TestCase):
         self.client.login(username='user2', password='user2pass')
         response = self.client.get(reverse('sorted_records'))
         self.assertEqual(response.status_code, 302)  # Redirect to login or permission denied
+
+class ImportCsvCommandTest(TestCase):
+    CSV = (
+        "SettlementValue,AccidentType,Whiplash,Driver Age,Gender,Accident Date,Claim Date\n"
+        "1520.5,Rear end,Yes,34.7,Male,2023-11-10 11:22:24.508901,2024-01-02\n"
+        ",Other,,not-a-number,Female,not-a-date,\n"
+        "99999999999,Other,No,50,Other,2023-01-01,2023-02-01\n"
+    )
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(handle, 'w') as f:
+            f.write(self.CSV)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_bulk_import_cleans_and_rejects(self):
+        out, err = StringIO(), StringIO()
+        call_command('import_csv', file=self.path, batch_size=2, stdout=out, stderr=err)
+        self.assertIn('Imported 2 rows', out.getvalue())
+        self.assertIn('1 rows rejected: settlement_value out of range', err.getvalue())
+
+        first, second = Record.objects.order_by('record_id')
+        self.assertEqual(float(first.settlement_value), 1520.5)
+        self.assertTrue(first.whiplash)
+        self.assertEqual(first.driver_age, 34)
+        self.assertEqual(first.accident_date.isoformat(), '2023-11-10')
+        self.assertIsNone(second.settlement_value)
+        self.assertFalse(second.whiplash)
+        self.assertIsNone(second.driver_age)
+        self.assertIsNone(second.accident_date)
+        self.assertEqual(second.injury_prognosis, '')
+
+    def test_bulk_matches_row_by_row(self):
+        # Only rows both modes accept; a failed create would abort the test transaction
+        with open(self.path, 'w') as f:
+            f.write("".join(self.CSV.splitlines(keepends=True)[:3]))
+        call_command('import_csv', file=self.path, row_by_row=True, stdout=StringIO(), stderr=StringIO())
+        fields = [f.name for f in Record._meta.fields if f.name != 'record_id']
+        legacy = list(Record.objects.values_list(*fields))
+        Record.objects.all().delete()
+        call_command('import_csv', file=self.path, stdout=StringIO(), stderr=StringIO())
+        self.assertEqual(list(Record.objects.values_list(*fields)), legacy)
+
+    @skipIf(connection.vendor == 'postgresql', "--copy is supported on PostgreSQL")
+    def test_copy_requires_postgresql(self):
+        with self.assertRaises(CommandError):
+            call_command('import_csv', file=self.path, copy=True, stdout=StringIO(), stderr=StringIO())
+        self.assertFalse(Record.objects.exists())
+
+    @skipUnless(connection.vendor == 'postgresql', "COPY is PostgreSQL only")
+    def test_copy_matches_bulk(self):
+        err = StringIO()
+        call_command('import_csv', file=self.path, copy=True, chunk_size=2, stdout=StringIO(), stderr=err)
+        self.assertIn('1 rows rejected: settlement_value out of range', err.getvalue())
+        fields = [f.name for f in Record._meta.fields if f.name != 'record_id']
+        copied = list(Record.objects.order_by('record_id').values_list(*fields))
+        Record.objects.all().delete()
+        call_command('import_csv', file=self.path, stdout=StringIO(), stderr=StringIO())
+        self.assertEqual(list(Record.objects.order_by('record_id').values_list(*fields)), copied)
+        self.assertEqual(len(copied), 2)
+
+class KeysetPaginationTest(TestCase):
+    def setUp(self):
+        dates = ['2024-01-03', None, '2024-01-01', '2024-01-03', None, '2024-01-02', '2024-01-01']
+        for i, accident_date in enumerate(dates * 2):
+            Record.objects.create(record_type=f'Keyset{i}', accident_date=accident_date)
+
+    def walk(self, sort):
+        paginator = KeysetPaginator(Record.objects.all(), sort, per_page=3)
+        pages = [paginator.page()]
+        while pages[-1].has_next():
+            pages.append(paginator.page(pages[-1].next_cursor))
+        return paginator, pages
+
+    def expected(self, sort):
+        records = list(Record.objects.all())
+        with_date = sorted((r for r in records if r.accident_date), key=lambda r: (r.accident_date, r.record_id))
+        without = sorted((r for r in records if not r.accident_date), key=lambda r: r.record_id)
+        ordered = with_date + without
+        return [r.record_id for r in (ordered[::-1] if sort.startswith('-') else ordered)]
+
+    def test_forward_walk_visits_every_row_once(self):
+        for sort in ('accident_date', '-accident_date', 'record_id', '-record_id'):
+            with self.subTest(sort=sort):
+                _, pages = self.walk(sort)
+                seen = [r.record_id for page in pages for r in page]
+                if sort.endswith('record_id'):
+                    expected = sorted(seen, reverse=sort.startswith('-'))
+                else:
+                    expected = self.expected(sort)
+                self.assertEqual(seen, expected)
+                self.assertFalse(pages[0].has_previous())
+
+    def test_previous_returns_to_earlier_page(self):
+        paginator, pages = self.walk('-accident_date')
+        for earlier, later in zip(pages, pages[1:]):
+            back = paginator.page(later.previous_cursor)
+            self.assertEqual([r.record_id for r in back], [r.record_id for r in earlier])
+        self.assertFalse(paginator.page(pages[1].previous_cursor).has_previous())
+
+    def test_foreign_or_tampered_cursor_gives_first_page(self):
+        _, pages = self.walk('accident_date')
+        first = [r.record_id for r in pages[0]]
+        other = KeysetPaginator(Record.objects.all(), '-accident_date', per_page=3)
+        same = KeysetPaginator(Record.objects.all(), 'accident_date', per_page=3)
+        self.assertNotEqual([r.record_id for r in other.page(pages[1].next_cursor)], first)
+        self.assertEqual([r.record_id for r in same.page('garbage')], first)
+        self.assertEqual([r.record_id for r in other.page(pages[0].next_cursor)][:1],
+                         [r.record_id for r in other.page()][:1])
+
+    def test_sorted_records_follows_cursor_links(self):
+        User.objects.create_user(username='keyset', password='keysetpass', full_name='Key Set', is_superuser=True)
+        self.client.login(username='keyset', password='keysetpass')
+        response = self.client.get(reverse('sorted_records'), {'sort': 'accident_date'})
+        self.assertTrue(response.context['keyset'])
+        page = response.context['records']
+        response = self.client.get(reverse('sorted_records'), {'sort': 'accident_date', 'cursor': page.next_cursor})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r.record_id for r in response.context['records']], self.expected('accident_date')[10:])
+
+class SortableFieldsTest(TestCase):
+    def setUp(self):
+        for i in range(30):
+            Record.objects.create(
+                record_type=f'Sort{i}',
+                accident_date=None if i % 7 == 0 else f'2024-01-{i % 28 + 1:02d}',
+                claim_date=f'2024-02-{i % 28 + 1:02d}',
+                settlement_value=i % 5 * 100,
+                status=['Pending', 'Approved', 'Rejected'][i % 3],
+            )
+
+    def test_parse_sort_only_accepts_sortable_fields(self):
+        self.assertEqual(Record.objects.parse_sort('-claim_date'), ('claim_date', True))
+        self.assertEqual(Record.objects.parse_sort('status'), ('status', False))
+        self.assertEqual(Record.objects.parse_sort('accident_description'), ('accident_date', False))
+        self.assertEqual(Record.objects.parse_sort(None), ('accident_date', False))
+        with self.assertRaises(ValueError):
+            Record.objects.sort_by('injury_description')
+
+    def test_sort_by_descending_puts_nulls_first(self):
+        records = list(Record.objects.sort_by('accident_date', descending=True))
+        self.assertIsNone(records[0].accident_date)
+        expected = sorted(records, key=lambda r: (r.accident_date is None, r.accident_date or 0, r.record_id), reverse=True)
+        self.assertEqual(records, expected)
+
+    def test_unsortable_column_falls_back_to_default(self):
+        User.objects.create_user(username='sorter', password='sorterpass', full_name='Sort Er', is_superuser=True)
+        self.client.login(username='sorter', password='sorterpass')
+        response = self.client.get(reverse('sorted_records'), {'sort': '-injury_description'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['sort_by'], 'accident_date')
+
+    @skipUnless(connection.vendor == 'postgresql', "Row estimates come from PostgreSQL's pg_class")
+    def test_estimated_count_is_cached_across_pages(self):
+        cache.clear()
+        paginator = KeysetPaginator(Record.objects.all(), 'accident_date', per_page=3)
+        with CaptureQueriesContext(connection) as queries:
+            first = paginator.page()
+            paginator.page(first.next_cursor)
+        self.assertEqual(sum('pg_class' in q['sql'] for q in queries), 1)
+
+    @skipUnless(connection.vendor == 'postgresql', "EXPLAIN output checked is PostgreSQL's")
+    def test_every_sort_is_index_served(self):
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE " + connection.ops.quote_name(Record._meta.db_table))
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        for field in SORTABLE_FIELDS:
+            for sort in (field, f'-{field}'):
+                paginator = KeysetPaginator(Record.objects.all(), sort, per_page=10)
+                first = paginator.page()
+                with CaptureQueriesContext(connection) as queries:
+                    paginator.page(first.next_cursor)
+                    paginator.page(paginator.page(first.next_cursor).previous_cursor)
+                legacy = str(Record.objects.sort_by(field, sort.startswith('-'))[:10].query)
+                statements = [q['sql'] for q in queries if 'pg_class' not in q['sql']] + [legacy]
+                for sql in statements:
+                    with self.subTest(sort=sort, sql=sql), connection.cursor() as cursor:
+                        cursor.execute("EXPLAIN " + sql)
+                        plan = "\n".join(row[0] for row in cursor.fetchall())
+                        self.assertIn("Index", plan)
+                        self.assertNotRegex(plan, r"(?m)^\s*(->\s*)?(Incremental )?Sort\b")
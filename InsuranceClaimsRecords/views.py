@@ -2,11 +2,16 @@ from django.core.paginator import Paginator
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import UserPassesTestMixin
-from django.http import HttpResponse
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
 from django.contrib import messages
-import csv
-from .models import Record
+from InsuranceClaimsAPI.pagination import KeysetPaginator
+from InsuranceClaimsAPI.projection import ListColumns
+from .models import Record, SORTABLE_FIELDS
 from .forms import RecordForm
+from .exports import ExportError, export_queryset, gzip_stream, stream_csv
+
+# Columns shown by records.html; the descriptions are only loaded by the edit page
+RECORD_LIST_COLUMNS = ListColumns(Record)
 
 def has_record_permission(user):
     return user.is_authenticated and (
@@ -22,16 +27,22 @@ def sorted_records(request):
     if not has_record_permission(request.user):
         messages.error(request, "You don't have permission to view records.")
         return redirect('accounts:login')
-    sort_by = request.GET.get('sort', 'accident_date')
-    records_list = Record.objects.all().order_by(sort_by)
-    paginator = Paginator(records_list, 10)
+    sort_field, descending = Record.objects.parse_sort(request.GET.get('sort'))
+    sort_by = f"-{sort_field}" if descending else sort_field
     page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    fields = [field.name for field in Record._meta.fields]
+    if page_number:
+        # Numbered pages (COUNT + OFFSET) are kept for existing links
+        records_list = RECORD_LIST_COLUMNS.apply(Record.objects.sort_by(sort_field, descending))
+        page_obj = Paginator(records_list, 10).get_page(page_number)
+    else:
+        records_list = RECORD_LIST_COLUMNS.apply(Record.objects.all(), sort_field)
+        page_obj = KeysetPaginator(records_list, sort_by, 10).page(request.GET.get('cursor'))
     return render(request, 'records.html', {
         'records': page_obj,
-        'fields': fields,
-        'sort_by': sort_by
+        'fields': RECORD_LIST_COLUMNS.names,
+        'sort_by': sort_by,
+        'sortable_fields': SORTABLE_FIELDS,
+        'keyset': not page_number,
     })
 
 @login_required
@@ -39,14 +50,19 @@ def export_records_csv(request):
     if not has_record_permission(request.user):
         messages.error(request, "You don't have permission to export records.")
         return redirect('sorted_records')
-    records = Record.objects.all()
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="Patient_records.csv"'
-    writer = csv.writer(response)
-    fields = [field.name for field in Record._meta.fields]
-    writer.writerow(fields)
-    for record in records:
-        writer.writerow([getattr(record, field) for field in fields])
+    try:
+        rows, fields = export_queryset(request.GET)
+    except ExportError as e:
+        return HttpResponseBadRequest(str(e))
+    content = stream_csv(rows, fields)
+    filename = 'Patient_records.csv'
+    content_type = 'text/csv'
+    if request.GET.get('gzip') in ('1', 'true', 'yes'):
+        content = gzip_stream(content)
+        filename += '.gz'
+        content_type = 'application/gzip'
+    response = StreamingHttpResponse(content, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
     return response
 
 @login_required
@@ -1,5 +1,5 @@
 from django.apps import AppConfig
-from django.db.models.signals import post_migrate
+from django.db.models.signals import m2m_changed, post_delete, post_migrate, post_save
 
 
 class InsuranceclaimsuserConfig(AppConfig):
@@ -8,9 +8,21 @@ class InsuranceclaimsuserConfig(AppConfig):
 
     def ready(self):
         from .models import Role, Permission
+        from .permissions import invalidate_permissions
         from django.contrib.auth import get_user_model
         User = get_user_model()
 
+        for model in (Role, Permission):
+            post_save.connect(invalidate_permissions, sender=model, dispatch_uid=f'permissions_save_{model.__name__}')
+            post_delete.connect(invalidate_permissions, sender=model, dispatch_uid=f'permissions_delete_{model.__name__}')
+        m2m_changed.connect(invalidate_permissions, sender=Role.extends.through, dispatch_uid='permissions_extends')
+
+        from django.contrib.auth.models import Group
+        from .utils import invalidate_group_names
+        m2m_changed.connect(invalidate_group_names, sender=User.groups.through, dispatch_uid='group_names_membership')
+        post_save.connect(invalidate_group_names, sender=Group, dispatch_uid='group_names_save')
+        post_delete.connect(invalidate_group_names, sender=Group, dispatch_uid='group_names_delete')
+
         def setup_roles_and_permissions(sender, **kwargs):
             # Define the roles and their permissions
             roles_config = {
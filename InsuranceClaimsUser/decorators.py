@@ -2,6 +2,7 @@ from functools import wraps
 from django.contrib.auth.decorators import user_passes_test
 from django.core.exceptions import PermissionDenied
 from django.shortcuts import redirect
+from .utils import get_group_names
 
 def group_required(*group_names):
     """
@@ -14,7 +15,7 @@ def group_required(*group_names):
             if not request.user.is_authenticated:
                 return redirect('accounts:login')
             
-            if not any(request.user.groups.filter(name=group_name).exists() for group_name in group_names):
+            if get_group_names(request.user).isdisjoint(group_names):
                 raise PermissionDenied("You don't have permission to access this page.")
             
             return view_func(request, *args, **kwargs)
@@ -1,21 +1,54 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
 from django.shortcuts import redirect
 from django.urls import reverse
 
+# URL names and path prefixes reachable without logging in; extend them with
+# the PUBLIC_URL_NAMES / PUBLIC_URL_PREFIXES settings (e.g. a health check)
+DEFAULT_PUBLIC_URL_NAMES = ('accounts:login', 'accounts:signup', 'home')
+
+
+class PublicPathMatcher:
+    """Exact public paths in a frozenset plus a tuple of public prefixes for str.startswith."""
+
+    def __init__(self, paths=(), prefixes=()):
+        self.paths = frozenset(paths)
+        self.prefixes = tuple(prefix for prefix in prefixes if prefix)
+
+    def __call__(self, path):
+        return path in self.paths or path.startswith(self.prefixes)
+
+
+def build_public_path_matcher():
+    names = getattr(settings, 'PUBLIC_URL_NAMES', DEFAULT_PUBLIC_URL_NAMES)
+    prefixes = getattr(settings, 'PUBLIC_URL_PREFIXES', (settings.STATIC_URL,))
+    return PublicPathMatcher((reverse(name) for name in names), prefixes)
+
+
 class AuthenticationMiddleware:
+    # Async-capable so ASGI requests reach async views without a thread hop
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        # Resolved once when the middleware chain is built, not on every request
+        self.is_public = build_public_path_matcher()
+        self.login_url = reverse('accounts:login')
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
-        # List of URLs that don't require authentication
-        public_urls = [
-            reverse('accounts:login'),
-            reverse('accounts:signup'),
-            reverse('home'),
-        ]
-
-        # Check if the current URL is not in the public URLs list
-        if not request.user.is_authenticated and request.path not in public_urls:
-            return redirect('accounts:login')
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        # Redirect anonymous users unless the URL is public
+        if not request.user.is_authenticated and not self.is_public(request.path):
+            return redirect(self.login_url)
 
         response = self.get_response(request)
-        return response 
\ No newline at end of file
+        return response
+
+    async def __acall__(self, request):
+        if not self.is_public(request.path) and not (await request.auser()).is_authenticated:
+            return redirect(self.login_url)
+        return await self.get_response(request)
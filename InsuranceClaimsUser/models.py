@@ -3,6 +3,7 @@ from django.db import models
 import re
 from django.core.exceptions import ValidationError
 from InsuranceClaimsRecords.models import Record
+from .permissions import permissions_generation, role_permission_table
 
 class CustomUserManager(BaseUserManager):
     def create_user(self, username, password, full_name, **extra_fields):
@@ -62,42 +63,24 @@ class User(AbstractUser):
         super().save(*args, **kwargs)
     
     def check_permission(self, permission):
-        if not self.role:
+        if not self.role_id:
             return False
-        
-        permissions = self._get_all_role_permissions(self.role)
-        split_permission = permission.split('.')
-        return self._check_split_permission(split_permission, permissions)
-    
-    def _get_all_role_permissions(self, role, collected_permissions=None):
+        return self.permission_table().check(permission)
+
+    def permission_table(self):
         """
-        First, recursively collect permissions from parent's roles,
-        then update with the current role's permissions so that the child's
-        settings override the parent's.
+        The compiled PermissionTable of this user's role (see
+        permissions.role_permission_table), memoized on the instance -- i.e.
+        for the request that loaded the user -- until a Role, Permission or
+        Role.extends change in this process bumps the generation.
         """
-        if collected_permissions is None:
-            collected_permissions = {}
-        for extended_role in role.extends.all():
-            self._get_all_role_permissions(extended_role, collected_permissions)
-        for perm in role.permissions.all():
-            collected_permissions[perm.name] = perm.is_allowed
-        return collected_permissions
-    
-    def _check_split_permission(self, split_permission, permissions):
-        if len(split_permission) == 1:
-            has_permission = permissions.get(split_permission[0])
-            if has_permission is not None:
-                return has_permission
-            return permissions.get(".*", False)
-        
-        permission_str = ".".join(split_permission)
-        permission_value = permissions.get(permission_str)
-        
-        if permission_value is None:
-            return self._check_split_permission(split_permission[:-1], permissions)
-        
-        return permission_value
-    
+        generation = permissions_generation()
+        cached = self.__dict__.get('_permission_table')
+        if cached is None or cached[:2] != (generation, self.role_id):
+            cached = (generation, self.role_id, role_permission_table(self.role_id))
+            self._permission_table = cached
+        return cached[2]
+
     def raise_without_permission(self, permission):
         if not self.check_permission(permission):
             raise PermissionError(f"User does not have permission: {permission}")
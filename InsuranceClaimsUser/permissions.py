@@ -0,0 +1,140 @@
+import threading
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY = 'permissions:version'
+TABLE_KEY = 'permissions:role:{role_id}:v{version}'
+
+_lock = threading.Lock()
+# Bumped synchronously by the signals in this process; per-request memos compare against it
+_generation = 0
+# Compiled tables already fetched by this process for the current shared version
+_local_version = None
+_local_tables = {}
+
+
+def permissions_generation():
+    """Counter bumped in this process whenever a Role, Permission or Role.extends link changes."""
+    return _generation
+
+
+def permissions_version():
+    """The shared version counter all workers key their compiled tables on."""
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 1, timeout=None)
+        version = cache.get(VERSION_KEY, 1)
+    return version
+
+
+def _bump_version():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:  # key missing or evicted
+        cache.add(VERSION_KEY, 1, timeout=None)
+
+
+def invalidate_permissions(*args, **kwargs):
+    """
+    Signal receiver: make every compiled PermissionTable stale, in this process
+    immediately and in every worker through the shared version counter. The
+    counter is bumped again on commit so no worker can cache a table it built
+    from the pre-commit rows under the new version.
+    """
+    global _generation
+    with _lock:
+        _generation += 1
+    _bump_version()
+    transaction.on_commit(_bump_version)
+
+
+def collect_role_permissions(role, collected=None, _resolving=None):
+    """
+    Flatten ``role`` and the roles it extends into ``{permission name: is_allowed}``.
+    Parents are applied first so the child's settings override them.
+    """
+    if collected is None:
+        collected = {}
+    if _resolving is None:
+        _resolving = set()
+    if role.pk in _resolving:  # ignore inheritance cycles
+        return collected
+    _resolving.add(role.pk)
+    for extended_role in role.extends.all():
+        collect_role_permissions(extended_role, collected, _resolving)
+    for name, is_allowed in role.permissions.values_list('name', 'is_allowed'):
+        collected[name] = is_allowed
+    _resolving.discard(role.pk)
+    return collected
+
+
+class PermissionTable:
+    """
+    A role's resolved permissions compiled into a prefix trie over the dotted
+    name parts. Each node holds the value of a plain entry (``a.b``, which
+    also covers everything below it) and of a wildcard entry (``a.b.*``,
+    which covers only what is below it); ``.*`` is the wildcard at the root.
+    ``check('a.b.c')`` walks at most depth nodes and the deepest matching
+    entry wins, a wildcard beating a plain entry on the same node.
+    """
+
+    VALUE = 0
+    WILDCARD = 1
+    CHILDREN = 2
+
+    def __init__(self, permissions):
+        self.permissions = permissions
+        self.root = [None, None, {}]
+        for name, allowed in permissions.items():
+            wildcard = name == '.*' or name.endswith('.*')
+            parts = name[:-2].split('.') if wildcard else name.split('.')
+            node = self.root
+            for part in parts if parts != [''] else []:
+                node = node[self.CHILDREN].setdefault(part, [None, None, {}])
+            node[self.WILDCARD if wildcard else self.VALUE] = allowed
+
+    @classmethod
+    def for_role(cls, role):
+        return cls(collect_role_permissions(role))
+
+    def check(self, permission):
+        parts = permission.split('.')
+        allowed = False
+        node = self.root
+        for depth, part in enumerate(parts):
+            if node[self.WILDCARD] is not None:
+                allowed = node[self.WILDCARD]
+            node = node[self.CHILDREN].get(part)
+            if node is None:
+                return allowed
+            if node[self.VALUE] is not None:
+                allowed = node[self.VALUE]
+        return allowed
+
+
+def role_permission_table(role_id):
+    """
+    The compiled PermissionTable for ``role_id``: from this process if it has
+    one for the current shared version, else from the cache backend, else
+    built from the database and stored in the cache for the other workers.
+    """
+    global _local_version, _local_tables
+    version = permissions_version()
+    with _lock:
+        if version != _local_version:
+            _local_version, _local_tables = version, {}
+        table = _local_tables.get(role_id)
+    if table is not None:
+        return table
+
+    key = TABLE_KEY.format(role_id=role_id, version=version)
+    table = cache.get(key)
+    if table is None:
+        from .models import Role
+        table = PermissionTable.for_role(Role.objects.get(pk=role_id))
+        cache.set(key, table, getattr(settings, 'PERMISSION_CACHE_TIMEOUT', 3600))
+    with _lock:
+        if version == _local_version:
+            _local_tables[role_id] = table
+    return table
@@ -1,6 +1,7 @@
 from django import template
 from django.contrib.auth.models import Group
 from django.core.exceptions import PermissionDenied
+from InsuranceClaimsUser.utils import get_group_names
 
 register = template.Library()
 
@@ -13,7 +14,7 @@ def has_group(user, group_name):
     """
     if not user.is_authenticated:
         return False
-    return user.groups.filter(name=group_name).exists()
+    return group_name in get_group_names(user)
 
 @register.filter(name='has_any_group')
 def has_any_group(user, group_names):
@@ -24,7 +25,7 @@ def has_any_group(user, group_names):
     """
     if not user.is_authenticated:
         return False
-    return any(user.groups.filter(name=name).exists() for name in group_names.split(','))
+    return not get_group_names(user).isdisjoint(group_names.split(','))
 
 @register.simple_tag
 def has_all_groups(user, *group_names):
@@ -35,7 +36,7 @@ def has_all_groups(user, *group_names):
     """
     if not user.is_authenticated:
         return False
-    return all(user.groups.filter(name=group_name).exists() for group_name in group_names)
+    return get_group_names(user).issuperset(group_names)
 
 @register.simple_tag
 def get_visible_links(user):
@@ -47,6 +48,7 @@ def get_visible_links(user):
         return []
     
     visible_links = []
+    groups = get_group_names(user)
     
     # Common links for all authenticated users
     visible_links.extend([
@@ -56,13 +58,13 @@ def get_visible_links(user):
     ])
     
     # Role-specific links
-    if user.groups.filter(name='customer').exists():
+    if 'customer' in groups:
         visible_links.extend([
             {'url': 'customer:submit_claim', 'name': 'Submit Claim'},
             {'url': 'customer:my_claims', 'name': 'My Claims'}
         ])
     
-    if user.groups.filter(name='finance').exists():
+    if 'finance' in groups:
         visible_links.extend([
             {'url': 'records:process_claims', 'name': 'Process Claims'},
             {'url': 'records:financial_reports', 'name': 'Financial Reports'},
@@ -71,14 +73,14 @@ def get_visible_links(user):
             {'url': 'accounts:invoice_generation', 'name': 'Generate Invoices'},
         ])
     
-    if user.groups.filter(name='ai_engineer').exists():
+    if 'ai_engineer' in groups:
         visible_links.extend([
             {'url': 'ml:ai_dashboard', 'name': 'AI Dashboard'},
             {'url': 'ml:model_training', 'name': 'Model Training'},
             {'url': 'records:all_records', 'name': 'All Records'}
         ])
     
-    if user.groups.filter(name='admin').exists():
+    if 'admin' in groups:
         visible_links.extend([
             {'url': 'accounts:admin_dashboard', 'name': 'Admin Dashboard'},
             {'url': 'accounts:user_list', 'name': 'User Management'},
@@ -4,12 +4,30 @@ from django.urls import reverse
 from django.contrib.auth.mixins import UserPassesTestMixin
 from django.contrib.messages import get_messages
 from django.core.exceptions import ValidationError
-from .models import Role, Permission, User
+from django.core.cache import cache
+from . import permissions
+from .models import Role, Permission, User, BillingRecord
 from .forms import (
     CustomUserCreationForm, CustomUserChangeForm, LoginForm,
     AdminUserCreationForm, ProfileUpdateForm, FinanceUserCreationForm
 )
 from .utils import validate_username, validate_password, validate_full_name
+from .utils import get_group_names, get_user_roles, has_role
+from .decorators import group_required
+from .templatetags import group_tags
+from django.contrib.auth.models import Group
+from django.core.exceptions import PermissionDenied
+from django.db import connection
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.test import RequestFactory, override_settings
+from django.contrib.auth.models import AnonymousUser
+from unittest.mock import patch
+from .middleware import AuthenticationMiddleware
+from django.test.utils import CaptureQueriesContext
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from InsuranceClaimsAPI.profiling import QueryProfilerMiddleware, _record_query, fingerprint
+from InsuranceClaimsRecords.models import Record
 
 class TestCustomUserManager(TestCase):
     def test_create_user(self):
@@ -137,6 +155,59 @@ class TestUserPermissions(TestCase):
         # Child role's permission should override the parent's.
         self.assertFalse(self.user.check_permission("shared.permission"))
 
+    def test_repeated_checks_use_no_queries(self):
+        parent_role = Role.objects.create(name="ParentRole")
+        Permission.objects.create(name="parent.permission", role=parent_role, is_allowed=True)
+        self.role.extends.add(parent_role)
+        self.assertTrue(self.user.check_permission("parent.permission"))
+        with self.assertNumQueries(0):
+            self.assertTrue(self.user.check_permission("parent.permission.child"))
+            self.assertTrue(self.user.check_permission("test.permission"))
+            self.assertFalse(self.user.check_permission("test.denied"))
+            self.assertFalse(self.user.check_permission("other"))
+
+    def test_permission_changes_invalidate_memo(self):
+        self.assertFalse(self.user.check_permission("late.permission"))
+        permission = Permission.objects.create(name="late.permission", role=self.role, is_allowed=True)
+        self.assertTrue(self.user.check_permission("late.permission"))
+        permission.delete()
+        self.assertFalse(self.user.check_permission("late.permission"))
+        parent_role = Role.objects.create(name="ParentRole")
+        Permission.objects.create(name="late.permission", role=parent_role, is_allowed=True)
+        self.assertFalse(self.user.check_permission("late.permission"))
+        self.role.extends.add(parent_role)
+        self.assertTrue(self.user.check_permission("late.permission"))
+
+    def test_prefix_wildcard_permission(self):
+        Permission.objects.create(name="claims.*", role=self.role, is_allowed=True)
+        Permission.objects.create(name="claims.delete", role=self.role, is_allowed=False)
+        self.assertTrue(self.user.check_permission("claims.view"))
+        self.assertTrue(self.user.check_permission("claims.view.all"))
+        self.assertFalse(self.user.check_permission("claims.delete"))
+        self.assertFalse(self.user.check_permission("claims"))
+        self.assertFalse(self.user.check_permission("billing.view"))
+
+    def test_compiled_table_is_shared_between_workers(self):
+        self.assertTrue(self.user.check_permission("test.permission"))
+        # Another worker: nothing memoized in-process, the table comes from the cache
+        permissions._local_tables.clear()
+        other_worker_user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertTrue(other_worker_user.check_permission("test.permission"))
+        # A change made by another worker only bumps the shared version
+        Permission.objects.filter(name="test.permission").update(is_allowed=False)
+        cache.incr(permissions.VERSION_KEY)
+        next_request_user = User.objects.get(pk=self.user.pk)
+        self.assertFalse(next_request_user.check_permission("test.permission"))
+
+    def test_inheritance_cycle_terminates(self):
+        parent_role = Role.objects.create(name="ParentRole")
+        Permission.objects.create(name="parent.permission", role=parent_role, is_allowed=True)
+        self.role.extends.add(parent_role)
+        parent_role.extends.add(self.role)
+        self.assertTrue(self.user.check_permission("parent.permission"))
+        self.assertTrue(self.user.check_permission("test.permission"))
+
 class TestForms(TestCase):
     def setUp(self):
         self.role = Role.objects.create(name="TestRole")
@@ -714,3 +785,179 @@ class TestUserAuthentication(TestCase):
         response = self.client.get(reverse('accounts:logout'))
         self.assertRedirects(response, reverse('accounts:login'))
         self.assertFalse(response.wsgi_request.user.is_authenticated)
+
+class TestGroupNames(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="groupuser",
+            password="test123",
+            full_name="Group User"
+        )
+        self.auditors = Group.objects.create(name="auditors")
+        self.reviewers = Group.objects.create(name="reviewers")
+        self.user.groups.add(self.auditors, self.reviewers)
+        self.user = User.objects.get(pk=self.user.pk)
+
+    def test_checks_share_one_query(self):
+        with self.assertNumQueries(1):
+            self.assertTrue(has_role(self.user, "auditors"))
+            self.assertFalse(has_role(self.user, "admin"))
+            self.assertTrue(group_tags.has_group(self.user, "reviewers"))
+            self.assertTrue(group_tags.has_any_group(self.user, "admin,auditors"))
+            self.assertTrue(group_tags.has_all_groups(self.user, "auditors", "reviewers"))
+            self.assertFalse(group_tags.has_all_groups(self.user, "auditors", "admin"))
+            self.assertEqual(get_user_roles(self.user), ["auditors", "reviewers"])
+
+    def test_membership_changes_are_seen(self):
+        self.assertFalse(has_role(self.user, "finance"))
+        self.user.groups.add(Group.objects.create(name="finance"))
+        self.assertTrue(has_role(self.user, "finance"))
+        self.user.groups.remove(self.auditors)
+        self.assertFalse(has_role(self.user, "auditors"))
+
+    def test_anonymous_user_has_no_groups(self):
+        from django.contrib.auth.models import AnonymousUser
+        with self.assertNumQueries(0):
+            self.assertFalse(group_tags.has_group(AnonymousUser(), "auditors"))
+            self.assertEqual(group_tags.get_visible_links(AnonymousUser()), [])
+
+    def test_nav_render_runs_at_most_one_groups_query(self):
+        request = RequestFactory().get('/')
+        request.user = self.user
+        with CaptureQueriesContext(connection) as queries:
+            render_to_string('base.html', request=request)
+        group_queries = [q['sql'] for q in queries if 'auth_group' in q['sql']]
+        self.assertLessEqual(len(group_queries), 1)
+
+    def test_group_required_uses_cached_names(self):
+        @group_required("auditors")
+        def view(request):
+            return HttpResponse("ok")
+
+        request = RequestFactory().get('/')
+        request.user = self.user
+        get_group_names(self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(view(request).status_code, 200)
+        self.user.groups.remove(self.auditors)
+        with self.assertRaises(PermissionDenied):
+            view(request)
+
+class TestAuthenticationMiddleware(TestCase):
+    def setUp(self):
+        self.middleware = AuthenticationMiddleware(lambda request: HttpResponse("ok"))
+        self.factory = RequestFactory()
+
+    def get(self, path, user=None):
+        request = self.factory.get(path)
+        request.user = user or AnonymousUser()
+        return self.middleware(request)
+
+    def test_public_urls_and_prefixes_pass(self):
+        for path in (reverse('accounts:login'), reverse('accounts:signup'), reverse('home'), '/static/css/site.css'):
+            with self.subTest(path=path):
+                self.assertEqual(self.get(path).status_code, 200)
+
+    def test_anonymous_redirected_from_private_url(self):
+        response = self.get('/records/records/')
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response.url, reverse('accounts:login'))
+
+    def test_only_named_api_views_are_public(self):
+        self.assertEqual(self.get(reverse('api_predict')).status_code, 200)
+        self.assertEqual(self.get('/api/other/').status_code, 302)
+
+    def test_matcher_does_no_url_resolution_per_request(self):
+        with patch('InsuranceClaimsUser.middleware.reverse') as mock_reverse:
+            self.assertEqual(self.get(reverse('accounts:login')).status_code, 200)
+            self.assertEqual(self.get('/records/records/').status_code, 302)
+        mock_reverse.assert_not_called()
+
+    @override_settings(PUBLIC_URL_PREFIXES=['/static/', '/health/'])
+    def test_configured_prefixes(self):
+        middleware = AuthenticationMiddleware(lambda request: HttpResponse("ok"))
+        request = self.factory.get('/health/live')
+        request.user = AnonymousUser()
+        self.assertEqual(middleware(request).status_code, 200)
+
+    async def test_async_chain(self):
+        async def get_response(request):
+            return HttpResponse("ok")
+
+        middleware = AuthenticationMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+        for path, status in ((reverse('accounts:login'), 200), ('/records/records/', 302)):
+            request = self.factory.get(path)
+
+            async def auser():
+                return AnonymousUser()
+
+            request.auser = auser
+            with self.subTest(path=path):
+                self.assertEqual((await middleware(request)).status_code, status)
+
+
+class TestQueryProfilerMiddleware(TestCase):
+    def setUp(self):
+        finance = Role.objects.create(name='finance')
+        self.user = User.objects.create_user(username='auditor', password='Password123!', email='auditor@example.com', full_name='Auditor',
+                                             role=finance, is_staff=True)
+        for amount in (100, 200, 300):
+            BillingRecord.objects.create(record=Record.objects.create(record_type='Claim'), amount=amount,
+                                         description='Bill', created_by=self.user)
+        self.client.login(username='auditor', password='Password123!')
+
+    def test_header_profiles_request_for_staff(self):
+        with self.assertLogs('InsuranceClaimsAPI.profiling', level='INFO') as logs:
+            response = self.client.get(reverse('accounts:billing_list'), HTTP_X_PROFILE_QUERIES='1')
+        self.assertEqual(response.status_code, 200)
+        self.assertGreaterEqual(int(response['X-Query-Count']), 3)
+        # bill.record is loaded once per bill
+        self.assertGreaterEqual(int(response['X-Duplicate-Queries']), 2)
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertIn('/finance/billing/', logs.output[0])
+        self.assertIn('3x SELECT', logs.output[0])
+
+    def test_unprofiled_and_non_staff_requests(self):
+        self.assertNotIn('X-Query-Count', self.client.get(reverse('accounts:billing_list')))
+        User.objects.filter(pk=self.user.pk).update(is_staff=False)
+        response = self.client.get(reverse('accounts:billing_list'), HTTP_X_PROFILE_QUERIES='1')
+        self.assertNotIn('X-Query-Count', response)
+
+    @override_settings(QUERY_PROFILER_ENABLED=True, QUERY_PROFILER_SLOW_REQUEST_MS=0, QUERY_PROFILER_SLOW_QUERY_MS=0)
+    def test_enabled_logs_slow_requests_and_queries(self):
+        middleware = QueryProfilerMiddleware(lambda request: HttpResponse(str(User.objects.count())))
+        request = RequestFactory().get('/anything/')
+        request.user = AnonymousUser()
+        with self.assertLogs('InsuranceClaimsAPI.profiling', level='WARNING') as logs:
+            response = middleware(request)
+        self.assertNotIn('X-Query-Count', response)
+        self.assertIn('GET /anything/', logs.output[0])
+        self.assertTrue(any('Slow query' in line for line in logs.output[1:]))
+
+    async def test_async_chain_records_sync_to_async_queries(self):
+        async def get_response(request):
+            return HttpResponse(str(await User.objects.acount()))
+
+        # Loaded from sync code, as BaseHandler.load_middleware does
+        middleware = await sync_to_async(QueryProfilerMiddleware)(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+        request = RequestFactory().get('/anything/', HTTP_X_PROFILE_QUERIES='1')
+        user = self.user
+
+        async def auser():
+            return user
+
+        request.auser = auser
+        response = await middleware(request)
+        self.assertEqual(response['X-Query-Count'], '1')
+
+    def test_middleware_installs_query_recorder(self):
+        connection.execute_wrappers[:] = [wrapper for wrapper in connection.execute_wrappers
+                                          if wrapper is not _record_query]
+        QueryProfilerMiddleware(lambda request: HttpResponse())
+        self.assertIn(_record_query, connection.execute_wrappers)
+
+    def test_fingerprint(self):
+        self.assertEqual(fingerprint('SELECT * FROM t WHERE id IN (%s, %s, %s) AND  name = \'x\' LIMIT 21'),
+                         'SELECT * FROM t WHERE id IN (%s, ...) AND name = %s LIMIT %s')
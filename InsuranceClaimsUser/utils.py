@@ -52,6 +52,26 @@ def validate_full_name(full_name):
 def clean_full_name(full_name):
     return ' '.join(full_name.split())
 
+_groups_generation = 0
+
+def invalidate_group_names(*args, **kwargs):
+    """Signal receiver: group membership or a group changed, reload memoized group names."""
+    global _groups_generation
+    _groups_generation += 1
+
+def get_group_names(user):
+    """
+    Names of the groups ``user`` belongs to, fetched with one query and memoized
+    on the user instance (i.e. for the request that loaded it).
+    """
+    if not user.is_authenticated:
+        return frozenset()
+    cached = getattr(user, '_group_names', None)
+    if cached is None or cached[0] != _groups_generation:
+        cached = (_groups_generation, frozenset(user.groups.values_list('name', flat=True)))
+        user._group_names = cached
+    return cached[1]
+
 def role_required(*role_names):
     """
     Decorator for views that checks whether a user has a particular role.
@@ -62,7 +82,7 @@ def role_required(*role_names):
             if not request.user.is_authenticated:
                 raise PermissionDenied
             
-            if not any(request.user.groups.filter(name=role_name).exists() for role_name in role_names):
+            if get_group_names(request.user).isdisjoint(role_names):
                 raise PermissionDenied
             
             return view_func(request, *args, **kwargs)
@@ -73,13 +93,13 @@ def has_role(user, role_name):
     """
     Helper function to check if a user has a specific role.
     """
-    return user.groups.filter(name=role_name).exists()
+    return role_name in get_group_names(user)
 
 def get_user_roles(user):
     """
     Returns a list of role names the user belongs to.
     """
-    return list(user.groups.values_list('name', flat=True))
+    return sorted(get_group_names(user))
 
 def group_required(*group_names):
     """
@@ -92,7 +112,7 @@ def group_required(*group_names):
             if not request.user.is_authenticated:
                 return redirect('login')
             
-            if not any(request.user.groups.filter(name=group_name).exists() for group_name in group_names):
+            if get_group_names(request.user).isdisjoint(group_names):
                 raise PermissionDenied("You don't have permission to access this page.")
             
             return view_func(request, *args, **kwargs)
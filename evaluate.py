@@ -2,6 +2,7 @@ import pandas as pd
 import numpy as np
 import pickle
 from sklearn.metrics import mean_squared_error, r2_score, mean_absolute_error
+from InsuranceClaimsML.encoding import ClaimFeatureEncoder
 
 # --- 1. Load model bundle ---
 with open("knn_model_sklearn.pkl", "rb") as f:
@@ -10,6 +11,7 @@ with open("knn_model_sklearn.pkl", "rb") as f:
 model = bundle["model"]
 scaler = bundle["scaler"]
 feature_names = bundle["feature_names"]
+encoder = ClaimFeatureEncoder.from_bundle(bundle)
 
 # --- 2. Load your CSV ---
 csv_path = "Cleaned_Patient_Records.csv"
@@ -19,8 +21,8 @@ df = pd.read_csv(csv_path)
 drop_columns = ["Accident_Description", "Injury_Description", "Accident_Date", "Claim_Date"]
 df = df.drop(columns=drop_columns, errors='ignore')
 
-# --- 4. Prepare features and target ---
-X = df[feature_names]
+# --- 4. Prepare features and target (same encoding as the web view) ---
+X = encoder.encode_frame(df)
 y = df["SettlementValue"]
 
 # --- 5. Normalize X ---
@@ -0,0 +1,73 @@
+import argparse
+import time
+import numpy as np
+from InsuranceClaimsML.mlmodels import KNN
+
+# Benchmarks the neighbour-search backends of InsuranceClaimsML.mlmodels.KNN
+# on synthetic data and reports, per dimensionality, the smallest training set
+# size at which each tree backend beats brute force on query time. The
+# KD_TREE_MIN_ROWS table behind KNN(algorithm='auto') in
+# InsuranceClaimsML/neighbors.py comes from this crossover.
+#
+#   python knn_benchmark.py --sizes 1000 10000 100000 --dims 2 3 5 8 30
+
+ALGORITHMS = ['brute', 'kd_tree', 'ball_tree']
+
+
+def time_algorithm(algorithm, X, y, queries, k, repeats):
+    model = KNN(k=k, algorithm=algorithm)
+    start = time.perf_counter()
+    model.fit(X, y)
+    build_time = time.perf_counter() - start
+    query_time = float('inf')
+    # Best of several runs, so timer noise on fast runs cannot fake a crossover
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predictions = model.predict(queries)
+        query_time = min(query_time, time.perf_counter() - start)
+    return build_time, query_time, predictions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare KNN neighbour-search backends.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--dims', type=int, nargs='+', default=[2, 3, 5, 8, 30])
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=3)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    crossover = {}
+
+    print(f"{'dims':>5} {'rows':>9} {'algorithm':>10} {'build s':>9} {'query s':>9} {'ms/query':>9}")
+    for dims in args.dims:
+        for size in args.sizes:
+            X = rng.normal(size=(size, dims))
+            y = rng.normal(size=size)
+            queries = rng.normal(size=(args.queries, dims))
+
+            results = {}
+            for algorithm in ALGORITHMS:
+                results[algorithm] = time_algorithm(algorithm, X, y, queries, args.k, args.repeats)
+                build_time, query_time, _ = results[algorithm]
+                print(f"{dims:>5} {size:>9} {algorithm:>10} {build_time:>9.3f} {query_time:>9.3f} "
+                      f"{1000 * query_time / args.queries:>9.3f}")
+
+            brute_predictions = results['brute'][2]
+            for algorithm in ALGORITHMS[1:]:
+                if not np.allclose(results[algorithm][2], brute_predictions):
+                    print(f"⚠️  {algorithm} predictions differ from brute force")
+                if results[algorithm][1] < results['brute'][1]:
+                    crossover.setdefault((dims, algorithm), size)
+
+    print("\nCrossover (smallest training set where the tree answers queries faster than brute force):")
+    for dims in args.dims:
+        for algorithm in ALGORITHMS[1:]:
+            size = crossover.get((dims, algorithm))
+            print(f"  d={dims:<3} {algorithm:<10} {size if size else 'not reached'}")
+
+
+if __name__ == "__main__":
+    main()
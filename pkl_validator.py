@@ -1,10 +1,10 @@
-import pickle
 import pandas as pd
+from InsuranceClaimsML.bundles import load_bundle
 
 def validate_pkl(path):
     try:
-        with open(path, 'rb') as f:
-            bundle = pickle.load(f)
+        # Reads both plain pickles and save_bundle() files
+        bundle = load_bundle(path)
 
         print(f"✅ Loaded bundle from {path}")
         print(f"📦 Keys found:", bundle.keys())
@@ -1,8 +1,9 @@
 import pandas as pd
 import numpy as np
-import pickle
 import os
 from InsuranceClaimsML.mlmodels import KNN, MLModule
+from InsuranceClaimsML.bundles import save_bundle
+from InsuranceClaimsML.encoding import ClaimFeatureEncoder, DEFAULT_CATEGORY_MAPPINGS
 
 # Load the cleaned dataset
 csv_path = "/Users/bearcheung/Documents/Year3/AAI/Project/Insurance-Claims/Cleaned_Patient_Records.csv"
@@ -31,8 +32,9 @@ ml = MLModule()
 knn_regressor = KNN(k=3, regression=True)
 ml.add_model("knn_regressor", knn_regressor)
 
-# --- Step 4: Train the model ---
-ml.train("knn_regressor", X.values.astype(float), y.values.astype(float))
+# --- Step 4: Train the model on the same encoding used for serving ---
+encoder = ClaimFeatureEncoder(list(X.columns))
+ml.train("knn_regressor", encoder.encode_frame(X), y.values.astype(float))
 
 # --- Step 5: Prepare feature info for saving ---
 feature_names = list(X.columns)
@@ -40,20 +42,8 @@ X_min = pd.Series(X.min().astype(float))
 denom = pd.Series((X.max() - X.min()).astype(float))
 denom[denom == 0] = 1  # avoid division by zero
 
-# Category mappings (optional - put your real mappings here)
-category_mappings = {
-    'AccidentType': {'Rear-end collision': 1, 'Side-impact collision': 2, 'Head-on collision': 3, 'Single vehicle accident': 4, 'Other': 5},
-    'Injury_Prognosis': {'Full recovery expected': 1, 'Partial recovery expected': 2, 'Long-term effects expected': 3, 'Permanent disability': 4},
-    'Exceptional_Circumstances': {'Yes': 1, 'No': 0},
-    'Minor_Psychological_Injury': {'Yes': 1, 'No': 0},
-    'Dominant_injury': {'Head': 1, 'Neck': 2, 'Back': 3, 'Limbs': 4, 'Internal': 5},
-    'Whiplash': {'Yes': 1, 'No': 0},
-    'Vehicle_Type': {'Car': 1, 'SUV': 2, 'Truck': 3, 'Motorcycle': 4, 'Other': 5},
-    'Weather_Conditions': {'Clear': 1, 'Rain': 2, 'Snow': 3, 'Fog': 4, 'Other': 5},
-    'Police_Report_Filed': {'Yes': 1, 'No': 0},
-    'Witness_Present': {'Yes': 1, 'No': 0},
-    'Gender': {'Male': 1, 'Female': 2, 'Other': 3}
-}
+# Category mappings shared with the web view's encoder
+category_mappings = DEFAULT_CATEGORY_MAPPINGS
 
 # --- Step 6: Save the model bundle ---
 model_bundle = {
@@ -64,8 +54,9 @@ model_bundle = {
     "category_mappings": category_mappings
 }
 
+# One uploadable file; the training matrix, targets and scaler stats are stored
+# inside it as aligned .npy members that load_bundle() memory-maps
 save_path = "knn_model_bundle_15.pkl"
-with open(save_path, "wb") as f:
-    pickle.dump(model_bundle, f)
+save_bundle(model_bundle, save_path)
 
 print(f"✅ Model bundle saved successfully at: {os.path.abspath(save_path)}")
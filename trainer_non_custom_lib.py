@@ -3,6 +3,7 @@ import numpy as np
 import pickle
 from sklearn.neighbors import KNeighborsRegressor
 from sklearn.preprocessing import StandardScaler
+from InsuranceClaimsML.encoding import ClaimFeatureEncoder
 
 # 1. Load your CSV
 df = pd.read_csv('/Users/bearcheung/Documents/Year3/AAI/Project/Insurance-Claims/MLModel/Cleaned_Patient_Records.csv')
@@ -11,8 +12,10 @@ df = pd.read_csv('/Users/bearcheung/Documents/Year3/AAI/Project/Insurance-Claims
 drop_columns = ["Accident_Description", "Injury_Description", "Accident_Date", "Claim_Date"]
 df = df.drop(columns=drop_columns, errors='ignore')
 
-# 3. Prepare X and y
-X = df.drop(columns=["SettlementValue"])
+# 3. Prepare X and y with the encoder the web view uses for serving
+feature_names = list(df.drop(columns=["SettlementValue"]).columns)
+encoder = ClaimFeatureEncoder(feature_names)
+X = encoder.encode_frame(df)
 y = df["SettlementValue"]
 
 # 4. Standardize X
@@ -27,7 +30,8 @@ knn.fit(X_scaled, y)
 bundle = {
     "model": knn,
     "scaler": scaler,
-    "feature_names": list(X.columns)
+    "feature_names": feature_names,
+    "category_mappings": encoder.category_mappings
 }
 with open('knn_model_sklearn.pkl', 'wb') as f:
     pickle.dump(bundle, f)